@@ -0,0 +1,8 @@
+echo "############### Checking ls"
+ls
+echo "############### Moving to python folder"
+cd python/
+echo "############### Running benchmarks"
+# small sizes to track regressions, the defaults are for full measurements
+python -m pytest benchmarks --benchmark-json=benchmarks.json --synthetic-events 10000 --synthetic-rounds 1 --fold-events 1000000 --gbn-events 200000 --cache-events 500000
+cd ../
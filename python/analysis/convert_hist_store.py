@@ -0,0 +1,37 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from coffea.util import load, save
+
+sys.path.insert(0, os.getcwd())
+from base_class.hist import store
+
+#
+# Convert between the pickled .coffea output and the HDF5 histogram store (.h5).
+#
+#   python analysis/convert_hist_store.py -i hists/histAll.coffea -o hists/histAll.h5
+#   python analysis/convert_hist_store.py -i hists/histAll.h5 -o hists/histAll.coffea
+#
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Convert coffea outputs to and from the HDF5 histogram store', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-i', '--input', dest='input_file', required=True, help='Input .coffea or .h5 file.')
+    parser.add_argument('-o', '--output', dest='output_file', required=True, help='Output .h5 or .coffea file.')
+    parser.add_argument('--compression', dest='compression', default='gzip', help='HDF5 compression filter.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.info(f"\nRunning with these parameters: {args}")
+
+    tstart = time.time()
+    if args.input_file.endswith('.h5'):
+        hists = store.HistStore(args.input_file)
+        output = hists.extras() | {'hists': {name: hists[name] for name in hists.keys()}}
+        save(output, args.output_file)
+    else:
+        store.save(load(args.input_file), args.output_file, compression=args.compression)
+    logging.info(f'\nSaved {args.output_file} in {time.time() - tstart:.1f}s')
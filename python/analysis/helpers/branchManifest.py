@@ -0,0 +1,127 @@
+import copyreg
+import logging
+from collections.abc import Mapping
+from functools import lru_cache
+
+import awkward as ak
+import numpy as np
+import yaml
+from coffea.nanoevents import NanoAODSchema, NanoEventsFactory
+
+#
+# Column pruning for the processors.
+#   trace() runs a processor once on a tiny input and records the branches it touches.
+#   The manifest is saved as yml and turned into a schema (for NanoEventsFactory/runner) or a branch filter (for TreeReader/Chain).
+#   Branches not in the manifest are removed from the form, so a processor reading them fails instead of silently reading more.
+#   check_complete() compares the output with the pruned schema against the unpruned output, which also catches processors that only read a branch if it exists.
+#
+
+
+class MissingBranchError(KeyError):
+    pass
+
+
+def _process(processor_instance, file, metadata, treename, entry_stop, schemaclass, access_log=None):
+    events = NanoEventsFactory.from_root(file, treepath=treename, entry_stop=entry_stop,
+                                         schemaclass=schemaclass, metadata=dict(metadata),
+                                         access_log=access_log).events()
+    return processor_instance.process(events)
+
+
+def trace(processor_instance, file, metadata, treename='Events', entry_stop=None, schemaclass=NanoAODSchema):
+    """Run processor_instance.process once on file and return the set of branches it read."""
+    accessed = []
+    _process(processor_instance, file, metadata, treename, entry_stop, schemaclass, access_log=accessed)
+    return set(accessed)
+
+
+def check_manifest(accessed, manifest):
+    """Raise MissingBranchError if any accessed branch is not in manifest."""
+    missing = set(accessed) - set(manifest)
+    if missing:
+        raise MissingBranchError(f'Branches read but missing from the manifest: {sorted(missing)}')
+
+
+def check_complete(processor_instance, file, metadata, manifest, treename='Events', entry_stop=None, schemaclass=NanoAODSchema):
+    """Raise MissingBranchError if processor_instance.process fails or gives a different output when the schema is pruned to manifest."""
+    baseline = _process(processor_instance, file, metadata, treename, entry_stop, schemaclass)
+    try:
+        pruned = _process(processor_instance, file, metadata, treename, entry_stop, pruned_schema(manifest, schemaclass))
+    except (AttributeError, KeyError, ValueError) as e:
+        raise MissingBranchError(f'The processor fails with the pruned schema: {e}') from e
+    if not _same_output(baseline, pruned):
+        raise MissingBranchError('The processor output with the pruned schema differs from the unpruned output')
+
+
+def _same_output(a, b):
+    if isinstance(a, Mapping):
+        return isinstance(b, Mapping) and a.keys() == b.keys() and all(_same_output(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return isinstance(b, (list, tuple)) and len(a) == len(b) and all(map(_same_output, a, b))
+    if isinstance(a, ak.Array) or isinstance(b, ak.Array):
+        return ak.to_list(a) == ak.to_list(b)
+    if isinstance(a, (np.ndarray, np.generic, float)) or isinstance(b, (np.ndarray, np.generic, float)):
+        a, b = np.asarray(a), np.asarray(b)
+        return np.array_equal(a, b, equal_nan=a.dtype.kind in 'fc' and b.dtype.kind in 'fc')
+    return bool(np.all(a == b))
+
+
+def save_manifest(path, branches, **info):
+    with open(path, 'w') as f:
+        yaml.safe_dump(info | {'branches': sorted(branches)}, f)
+    logging.info(f'Saved {len(branches)} branches to {path}')
+
+
+def load_manifest(path):
+    with open(path) as f:
+        return frozenset(yaml.safe_load(f)['branches'])
+
+
+def branch_filter(manifest):
+    """Filter for base_class.root TreeReader/Chain."""
+    return _BranchFilter(frozenset(manifest))
+
+
+class _BranchFilter:
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+    def __call__(self, branches):
+        return _keep(branches, self.manifest)
+
+
+def _keep(branches, manifest):
+    """Branches in manifest plus the counters of the kept collections."""
+    keep = {b for b in branches if b in manifest}
+    for b in list(keep):
+        counter = f'n{b.split("_")[0]}'
+        if counter in branches:
+            keep.add(counter)
+    return keep
+
+
+class _PrunedSchemaMeta(type(NanoAODSchema)):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _pruned_schema(manifest, base):
+    def __init__(self, base_form, *args, **kwargs):
+        keep = _keep(base_form['contents'].keys(), manifest)
+        base_form = dict(base_form)
+        base_form['contents'] = {k: v for k, v in base_form['contents'].items() if k in keep}
+        base.__init__(self, base_form, *args, **kwargs)
+
+    return _PrunedSchemaMeta(f'Pruned{base.__name__}', (base,), {'__init__': __init__, '_manifest': manifest, '_base': base})
+
+
+def pruned_schema(manifest, base=NanoAODSchema):
+    """Subclass of base that only exposes the branches in manifest. The class can be pickled and sent to workers."""
+    return _pruned_schema(frozenset(manifest), base)
+
+
+def _reduce_pruned_schema(cls):
+    return _pruned_schema, (cls._manifest, cls._base)
+
+
+copyreg.pickle(_PrunedSchemaMeta, _reduce_pruned_schema)
@@ -0,0 +1,96 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from coffea import processor
+from coffea.util import load, save
+
+#
+# Chunk-level checkpoints of a processor, to resume a job that failed partway through.
+#   The output of each chunk is saved in a shard {path}/{config hash}/{dataset}/{file uuid}_{entrystart}_{entrystop}_{input hash}.coffea.
+#   The input hash covers the dataset metadata (xs, lumi, kFactor, trigger, FvT files...) and the uuids of the friend files,
+#   so a new cross section or a regenerated FvT.root gives new shards instead of reusing stale ones.
+#   When the job is run again, the chunks with a shard are not processed and their saved output is returned instead.
+#   The chunks are accumulated in the same order, so the output is the same as the one of a job that never failed.
+#   The shards are written to a temporary file first, a chunk killed while saving is processed again.
+#
+
+_SHARD = '.coffea'
+# the entry range and the file are already in the shard name, the filename changes with the redirector
+_CHUNK_METADATA = {'filename', 'fileuuid', 'entrystart', 'entrystop'}
+FRIEND_FILES = ('FvT.root', 'SvB.root', 'SvB_MA.root', 'SvB_newSBDef.root', 'SvB_MA_newSBDef.root')
+
+
+def config_hash(processor_class, config):
+    """Hash of the processor class and its arguments. A change of either invalidates the checkpoints."""
+    content = json.dumps([f'{processor_class.__module__}.{processor_class.__qualname__}', config], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def shards(path, config_hash):
+    """Saved shards of config_hash."""
+    return glob.glob(os.path.join(path, config_hash, '*', f'*{_SHARD}'))
+
+
+def friend_files(metadata, names=FRIEND_FILES):
+    """Existing friend files of a chunk: names next to the input file and the FvT_file(s) of the dataset."""
+    from base_class.system.eos import EOS
+
+    directory = EOS(metadata['filename']).parent
+    candidates = [directory / name for name in names]
+    candidates += [EOS(f) for f in [metadata.get('FvT_file'), *metadata.get('FvT_files', [])] if f]
+    return [str(path) for path, exists in zip(candidates, EOS.exists_many(*candidates)) if exists]
+
+
+def input_hash(metadata, friends=()):
+    """Hash of the chunk metadata without the entry range and of the uuids of the friend files."""
+    from base_class.root._cache import FileCache
+
+    uuids = {}
+    for path in friends:
+        with FileCache.open(path) as file:
+            uuids[os.path.basename(path)] = str(file.file.uuid)
+    content = json.dumps([{k: v for k, v in metadata.items() if k not in _CHUNK_METADATA}, uuids], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+class Checkpoint(processor.ProcessorABC):
+    """
+    Wrap processor_instance to save the output of each chunk in path and reuse it when the job is run again.
+    Empty outputs (failed chunks) are not saved.
+
+    friends: function of the chunk metadata that returns the friend files read by the processor, e.g. friend_files
+    """
+
+    def __init__(self, processor_instance, path, config_hash, friends=None):
+        self.processor_instance = processor_instance
+        self.path = path
+        self.config_hash = config_hash
+        self.friends = friends
+
+    def shard(self, metadata):
+        friends = self.friends(metadata) if self.friends is not None else ()
+        return os.path.join(self.path, self.config_hash, metadata['dataset'],
+                            f"{metadata['fileuuid']}_{metadata['entrystart']}_{metadata['entrystop']}_{input_hash(metadata, friends)}{_SHARD}")
+
+    def process(self, events):
+        shard = self.shard(events.metadata)
+        if os.path.exists(shard):
+            try:
+                return load(shard)
+            except Exception as error:
+                logging.warning(f'Cannot read checkpoint {shard}, process the chunk again: {error}')
+
+        output = self.processor_instance.process(events)
+        if output:
+            os.makedirs(os.path.dirname(shard), exist_ok=True)
+            tmp = f'{shard}.{uuid.uuid4().hex}.tmp'
+            save(output, tmp)
+            os.replace(tmp, shard)
+        return output
+
+    def postprocess(self, accumulator):
+        return self.processor_instance.postprocess(accumulator)
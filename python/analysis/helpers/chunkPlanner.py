@@ -0,0 +1,194 @@
+import copy
+import logging
+import re
+import threading
+import time
+import tracemalloc
+
+import yaml
+from coffea import processor
+from coffea.nanoevents import NanoAODSchema, NanoEventsFactory
+
+from base_class.system.memory import rss
+
+#
+# Per-dataset chunk sizes that keep each worker under a memory budget.
+#   A few hundred events of the first file of each dataset are run through the processor to measure the peak memory and time per event.
+#   After a warm-up pass, the cost per event is the slope between two event counts, so one-time and per-chunk costs are not counted per event.
+#   The memory kept after the warm-up and the intercept of the slope are fixed costs, subtracted from the budget before dividing by the cost per event.
+#   The measurement runs on a copy of the processor that does not write any output files.
+#   The chunk size is rounded down to a fixed ladder (1, 2, 5 x 10^n) so small fluctuations of the measurement give the same plan,
+#   and the plan is saved so the same fileset splits can be reproduced.
+#
+
+_UNITS = {'': 1, 'B': 1, 'KB': 1e3, 'MB': 1e6, 'GB': 1e9, 'TB': 1e12, 'KIB': 2**10, 'MIB': 2**20, 'GIB': 2**30, 'TIB': 2**40}
+
+
+def parse_memory(memory):
+    """'4GB' -> 4e9 bytes"""
+    if isinstance(memory, (int, float)):
+        return int(memory)
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([a-zA-Z]*)\s*', memory)
+    if match is None or match.group(2).upper() not in _UNITS:
+        raise ValueError(f'Cannot parse memory "{memory}"')
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+class PeakMemory:
+    """Peak RSS increase (sampled in a thread) and peak traced allocations inside the context."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._rss = max(self._rss, rss())
+
+    def __enter__(self):
+        self._baseline = rss()
+        self._rss = self._baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        tracemalloc.start()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        _, traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self._rss = max(self._rss, rss())
+        self.peak = max(self._rss - self._baseline, traced)
+
+
+# processor attributes that make process() write files, disabled while measuring
+_OUTPUT_ATTRIBUTES = ('make_classifier_input',)
+
+
+def _without_outputs(processor_instance):
+    """Shallow copy of processor_instance with the output attributes set to None."""
+    processor_instance = copy.copy(processor_instance)
+    for attr in _OUTPUT_ATTRIBUTES:
+        if getattr(processor_instance, attr, None) is not None:
+            setattr(processor_instance, attr, None)
+    return processor_instance
+
+
+def measure(processor_instance, file, metadata, nEvents=300, treename='Events', schemaclass=NanoAODSchema):
+    """
+    Run file through a copy of processor_instance without output files. Returns (bytes per event, seconds per event, fixed bytes).
+
+    A warm-up pass absorbs the one-time costs (numba JIT, correction and model loading).
+    The peak memory and the time are then measured on nEvents and 4 x nEvents events and the slope is returned.
+    The fixed bytes are the memory kept after the warm-up pass plus the intercept of the memory slope.
+    The time is taken from separate runs without tracemalloc.
+    """
+    from base_class.root import Chunk
+
+    processor_instance = _without_outputs(processor_instance)
+    chunk = Chunk(file, name=treename, fetch=True)
+    large = min(4 * nEvents, chunk.num_entries)
+    small = max(large // 4, 1)
+
+    def events(n):
+        # new events for each run, so the columns are read again
+        _metadata = dict(metadata) | {'filename': str(file), 'treename': treename, 'fileuuid': str(chunk.uuid),
+                                      'entrystart': 0, 'entrystop': n}
+        return NanoEventsFactory.from_root(file, treepath=treename, entry_stop=n,
+                                           schemaclass=schemaclass, metadata=_metadata).events()
+
+    before = rss()
+    tracemalloc.start()
+    processor_instance.process(events(small))
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = max(rss() - before, traced)
+    peak, elapsed = {}, {}
+    for n in (small, large):
+        _events = events(n)
+        with PeakMemory() as memory:
+            processor_instance.process(_events)
+        peak[n] = memory.peak
+        _events = events(n)
+        start = time.perf_counter()
+        processor_instance.process(_events)
+        elapsed[n] = time.perf_counter() - start
+    bytes_per_event, intercept = _fit(peak, small, large)
+    return bytes_per_event, _fit(elapsed, small, large)[0], retained + intercept
+
+
+def _fit(values, small, large):
+    """Increase per event between small and large and the value at zero events, or the average and zero if the increase can not be measured."""
+    if large > small:
+        slope = (values[large] - values[small]) / (large - small)
+        if slope > 0:
+            return slope, max(values[small] - slope * small, 0)
+    return values[large] / large, 0
+
+
+def round_chunksize(size, min_chunksize, max_chunksize):
+    """Largest value of the 1, 2, 5 x 10^n ladder below size, clipped to [min_chunksize, max_chunksize]."""
+    rounded = min_chunksize
+    scale = 1
+    while scale <= size:
+        for step in (1, 2, 5):
+            if min_chunksize <= step * scale <= size:
+                rounded = step * scale
+        scale *= 10
+    return int(min(max(rounded, min_chunksize), max_chunksize))
+
+
+def plan_chunksizes(fileset, processor_instance, memory, max_chunksize, min_chunksize=1_000, nEvents=300, schemaclass=NanoAODSchema):
+    """
+    Measure each dataset in fileset and return {dataset: {'chunksize', 'bytes_per_event', 'seconds_per_event', 'fixed_bytes'}}.
+    memory: budget of one chunk including the fixed memory of the processor, e.g. '2GB'
+    """
+    budget = parse_memory(memory)
+    plan = {}
+    for dataset, files in fileset.items():
+        try:
+            bytes_per_event, seconds_per_event, fixed_bytes = measure(processor_instance, files['files'][0], files['metadata'] | {'dataset': dataset},
+                                                                      nEvents=nEvents, schemaclass=schemaclass)
+        except Exception as error:
+            logging.warning(f'Could not measure {dataset}, use chunksize={max_chunksize}: {error}')
+            plan[dataset] = {'chunksize': max_chunksize}
+            continue
+        if fixed_bytes >= budget:
+            logging.warning(f'{dataset}: the fixed memory {fixed_bytes/1e6:.0f} MB exceeds the budget {budget/1e6:.0f} MB, use chunksize={min_chunksize}')
+        chunksize = round_chunksize(max(budget - fixed_bytes, 0) / max(bytes_per_event, 1), min_chunksize, max_chunksize)
+        plan[dataset] = {'chunksize': chunksize,
+                         'bytes_per_event': float(bytes_per_event),
+                         'seconds_per_event': float(seconds_per_event),
+                         'fixed_bytes': float(fixed_bytes)}
+        logging.info(f'{dataset}: {bytes_per_event/1e3:.1f} kB/event + {fixed_bytes/1e6:.1f} MB, {seconds_per_event*1e3:.3f} ms/event -> chunksize={chunksize}')
+    return plan
+
+
+def save_plan(path, plan):
+    with open(path, 'w') as f:
+        yaml.safe_dump(plan, f)
+
+
+def load_plan(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def run_planned(fileset, plan, run, default_chunksize):
+    """
+    Call run(sub_fileset, chunksize) once per distinct chunk size and accumulate the (output, metrics).
+    The groups are processed in order of chunk size, so the splits only depend on the plan.
+    """
+    groups = {}
+    for dataset in fileset:
+        chunksize = plan.get(dataset, {}).get('chunksize', default_chunksize)
+        groups.setdefault(chunksize, {})[dataset] = fileset[dataset]
+    outputs, metrics = [], []
+    for chunksize in sorted(groups):
+        logging.info(f'\nRunning {len(groups[chunksize])} datasets with chunksize={chunksize}')
+        output, metric = run(groups[chunksize], chunksize)
+        outputs.append(output)
+        metrics.append(metric)
+    return processor.accumulate(outputs), processor.accumulate(metrics)
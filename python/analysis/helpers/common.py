@@ -11,17 +11,11 @@ import correctionlib
 import cachetools
 import logging
 import copy
+from functools import partial
+from analysis.helpers.correctionFunctions import cached_correction, correction_set
 
 # following example here: https://github.com/CoffeaTeam/coffea/blob/master/tests/test_jetmet_tools.py#L529
-def init_jet_factory(weight_sets, event, isMC):   #### AGE: this is temporary, it should be updated with correctionlib
-
-    event['Jet', 'pt_raw']    = (1 - event.Jet.rawFactor) * event.Jet.pt
-    event['Jet', 'mass_raw']  = (1 - event.Jet.rawFactor) * event.Jet.mass
-    nominal_jet = event.Jet
-    # nominal_jet['pt_raw']   = (1 - nominal_jet.rawFactor) * nominal_jet.pt
-    # nominal_jet['mass_raw'] = (1 - nominal_jet.rawFactor) * nominal_jet.mass
-    if isMC: nominal_jet['pt_gen'] = ak.values_astype(ak.fill_none(nominal_jet.matched_gen.pt, 0), np.float32)
-    nominal_jet['rho']      = ak.broadcast_arrays(event.fixedGridRhoFastjetAll, nominal_jet.pt)[0]
+def _build_jet_factory(weight_sets, isMC):
 
     from coffea.lookup_tools import extractor
     extract = extractor()
@@ -62,6 +56,23 @@ def init_jet_factory(weight_sets, event, isMC):   #### AGE: this is temporary, i
     else:
         logging.warning('WARNING: No uncertainties were loaded in the jet factory')
 
+    return jet_factory
+
+
+def init_jet_factory(weight_sets, event, isMC):   #### AGE: this is temporary, it should be updated with correctionlib
+
+    event['Jet', 'pt_raw']    = (1 - event.Jet.rawFactor) * event.Jet.pt
+    event['Jet', 'mass_raw']  = (1 - event.Jet.rawFactor) * event.Jet.mass
+    nominal_jet = event.Jet
+    # nominal_jet['pt_raw']   = (1 - nominal_jet.rawFactor) * nominal_jet.pt
+    # nominal_jet['mass_raw'] = (1 - nominal_jet.rawFactor) * nominal_jet.mass
+    if isMC: nominal_jet['pt_gen'] = ak.values_astype(ak.fill_none(nominal_jet.matched_gen.pt, 0), np.float32)
+    nominal_jet['rho']      = ak.broadcast_arrays(event.fixedGridRhoFastjetAll, nominal_jet.pt)[0]
+
+    # the extractor and JECStack are only built once per worker
+    jet_factory = cached_correction(f'jet_factory_isMC={isMC}', [weight_set.split()[-1] for weight_set in weight_sets],
+                                    partial(_build_jet_factory, weight_sets, isMC))
+
     jec_cache = cachetools.Cache(np.inf)
     jet_variations = jet_factory.build(nominal_jet, lazy_cache=jec_cache)
 
@@ -80,7 +91,7 @@ def jet_corrections( uncorr_jets,
                     variation='nom'
                     ):
 
-    JECFile = correctionlib.CorrectionSet.from_file(jercFile)
+    JECFile = correction_set(jercFile)
     # preparing jets
     uncorr_jets['pt_raw'] = (1 - uncorr_jets['rawFactor']) * uncorr_jets['pt']
     uncorr_jets['mass_raw'] = (1 - uncorr_jets['rawFactor']) * uncorr_jets['mass']
@@ -140,7 +151,7 @@ def apply_btag_sf( events, jets,
     This nees a work to make it more generic
     '''
 
-    btagSF = correctionlib.CorrectionSet.from_file(correction_file)[correction_type]
+    btagSF = correction_set(correction_file)[correction_type]
 
     selev = {}
     #central = 'central'
@@ -1,11 +1,61 @@
+import hashlib
+import os
 import pickle
+import threading
+from functools import partial
+
+#
+# Per-process registry of correction objects.
+#   Each worker builds a correction once, the first time a chunk asks for it.
+#   Entries are keyed by file path and content hash, so an updated file is picked up without restarting the worker.
+#
+_registry = {}
+_content_hashes = {}
+_registry_lock = threading.RLock()
+
+
+def _content_hash(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _content_hashes:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(partial(f.read, 1 << 20), b''):
+                digest.update(block)
+        _content_hashes[key] = digest.hexdigest()
+    return _content_hashes[key]
+
+
+def cached_correction(kind, paths, build):
+    """Return build() for the files in paths, building it only once per worker process"""
+    with _registry_lock:
+        key = (kind, *((path, _content_hash(path)) for path in paths))
+        if key not in _registry:
+            _registry[key] = build()
+        return _registry[key]
+
+
+def correction_set(correction_file):
+    import correctionlib
+    return cached_correction('correctionlib', [correction_file],
+                             partial(correctionlib.CorrectionSet.from_file, correction_file))
+
+
+def lumi_mask(goldenJSON):
+    from coffea.lumi_tools import LumiMask
+    return cached_correction('LumiMask', [goldenJSON], partial(LumiMask, goldenJSON))
+
+
+def _load_pickle(file):
+    with open(file, 'rb') as f:
+        return pickle.load(f)
+
 
 def btagSF_norm(dataset, btagSF_norm_file='ZZ4b/nTupleAnalysis/weights/btagSF_norm.pkl'):
     try:
-        with open(btagSF_norm_file, 'rb') as f:
-            btagSF_norm = pickle.load(f)
-            print(f'btagSF_norm[{dataset}] = {btagSF_norm[dataset]}')
-            return btagSF_norm[dataset]
+        btagSF_norm = cached_correction('pickle', [btagSF_norm_file], partial(_load_pickle, btagSF_norm_file))
+        print(f'btagSF_norm[{dataset}] = {btagSF_norm[dataset]}')
+        return btagSF_norm[dataset]
     except FileNotFoundError:
         return 1.0
 
@@ -0,0 +1,195 @@
+import logging
+import os
+import uuid
+from functools import partial
+from glob import glob
+
+from analysis.helpers.correctionFunctions import cached_correction
+
+#
+# Batched inference of k-fold HCR ensembles (SvB, SvB_MA, FvT).
+#   Each fold is exported once to TorchScript (or ONNX) in a per-user cache and loaded once per worker process.
+#   The exports are keyed by the size and mtime of the checkpoint and written atomically, so workers sharing a model directory never read a partial file.
+#   Events are sorted by fold with a single gather, evaluated in fixed-size micro-batches and scattered back.
+#
+
+
+def _cache_dir():
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'hh4b', 'HCR')
+
+
+def _export_path(path, backend, batch_size, export_dir=None):
+    stat = os.stat(path)
+    suffix = 'onnx' if backend == 'onnx' else 'pt'
+    return os.path.join(export_dir or _cache_dir(),
+                        f'{os.path.basename(path)}.{stat.st_size}_{stat.st_mtime_ns}.{backend}_b{batch_size}.{suffix}')
+
+
+def _example_inputs(batch_size):
+    import torch
+    j = torch.rand(batch_size, 4, 4) * torch.tensor([200, 2, 3, 20]).view(1, 4, 1) + torch.tensor([40, -1, -1.5, 5]).view(1, 4, 1)
+    o = torch.zeros(batch_size, 5, 8)
+    o[:, 4, :] = -1
+    a = torch.tensor([[8, 4, 1, 1]], dtype=torch.float).repeat(batch_size, 1)
+    return j, o, a
+
+
+def _export_fold(hcr, path, backend, batch_size, export_dir=None):
+    """Trace one fold with a fixed batch size and save it. Returns the path of the exported model or None if it could not be saved."""
+    import torch
+
+    export = _export_path(path, backend, batch_size, export_dir)
+    if os.path.exists(export):
+        return export
+
+    example = _example_inputs(batch_size)
+    tmp = f'{export}.{uuid.uuid4().hex}.tmp'
+    try:
+        os.makedirs(os.path.dirname(export), exist_ok=True)
+        if backend == 'onnx':
+            torch.onnx.export(hcr, example, tmp,
+                              input_names=['j', 'o', 'a'],
+                              output_names=['c_logits', 'q_logits'])
+        else:
+            with torch.no_grad():
+                traced = torch.jit.trace(hcr, example, check_trace=False)
+            torch.jit.save(traced, tmp)
+        os.replace(tmp, export)
+    except OSError as error:
+        logging.warning(f'Could not save {export}: {error}')
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return None
+    logging.info(f'Exported {path} to {export}')
+    return export
+
+
+class _TorchFold:
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, j, o, a):
+        import torch
+        with torch.no_grad():
+            return self.model(j, o, a)
+
+
+class _ONNXFold:
+    def __init__(self, export, threads):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(export, sess_options=options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, j, o, a):
+        import torch
+        c_logits, q_logits = self.session.run(None, {'j': j.numpy(), 'o': o.numpy(), 'a': a.numpy()})
+        return torch.from_numpy(c_logits), torch.from_numpy(q_logits)
+
+
+def _load_folds(HCR_path, backend, batch_size, threads, export_dir=None):
+    import torch
+    from analysis.helpers.networks import HCREnsemble
+
+    torch.set_num_threads(threads)
+    ensemble = HCREnsemble(HCR_path)
+    paths = sorted(glob(HCR_path))
+    folds = []
+    for path, hcr in zip(paths, ensemble.HCRs):
+        if backend == 'eager':
+            folds.append(_TorchFold(hcr))
+            continue
+        export = _export_fold(hcr, path, backend, batch_size, export_dir)
+        if backend == 'onnx':
+            if export is None:
+                raise RuntimeError(f'ONNX export of {path} is required for the onnx backend')
+            folds.append(_ONNXFold(export, threads))
+        elif export is None:
+            with torch.no_grad():
+                folds.append(_TorchFold(torch.jit.trace(hcr, _example_inputs(batch_size), check_trace=False)))
+        else:
+            folds.append(_TorchFold(torch.jit.load(export, map_location='cpu').eval()))
+    return folds, ensemble.HCRs[0].nC
+
+
+class HCRInference:
+    """
+    Drop-in replacement for HCREnsemble in the processors.
+
+    The object only holds the configuration, so it is cheap to send to workers.
+    The fold models are built on the first call and cached per worker process.
+
+    backend: 'torchscript' (default), 'onnx' (requires onnxruntime) or 'eager'
+    batch_size: number of events per micro-batch, the last batch of each fold is padded
+    threads: number of intra-op threads
+    export_dir: directory of the exported folds, default to ~/.cache/hh4b/HCR (or $XDG_CACHE_HOME/hh4b/HCR)
+    """
+
+    def __init__(self, HCR_path, backend='torchscript', batch_size=4096, threads=1, export_dir=None):
+        if backend not in ('torchscript', 'onnx', 'eager'):
+            raise ValueError(f'Unknown HCR inference backend "{backend}"')
+        self.HCR_path = HCR_path
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = threads
+        self.export_dir = export_dir
+
+    @property
+    def folds(self):
+        paths = sorted(glob(self.HCR_path))
+        if not paths:
+            raise FileNotFoundError(f'No HCR model matches {self.HCR_path}')
+        return cached_correction(f'HCR_{self.backend}_b{self.batch_size}_t{self.threads}', paths,
+                                 partial(_load_folds, self.HCR_path, self.backend, self.batch_size, self.threads, self.export_dir))
+
+    def _run(self, fold, j, o, a):
+        import torch
+        n = j.shape[0]
+        c_logits, q_logits = [], []
+        for start in range(0, n, self.batch_size):
+            batch = [x[start:start + self.batch_size] for x in (j, o, a)]
+            size = batch[0].shape[0]
+            if size < self.batch_size:
+                # pad with copies of the first event to keep the traced shapes
+                batch = [torch.cat([x, x[:1].expand(self.batch_size - size, *x.shape[1:])]) for x in batch]
+            c, q = fold(*batch)
+            c_logits.append(c[:size])
+            q_logits.append(q[:size])
+        return torch.cat(c_logits), torch.cat(q_logits)
+
+    def __call__(self, j, o, a, e):
+        import torch
+        folds, nC = self.folds
+        j, o, a = (torch.as_tensor(x, dtype=torch.float) for x in (j, o, a))
+        e = torch.as_tensor(e).long()
+
+        c_logits = torch.zeros(j.shape[0], nC)
+        q_logits = torch.zeros(j.shape[0], 3)
+        if j.shape[0] == 0:
+            return c_logits, q_logits
+
+        # gather the events of each fold into contiguous blocks, events without a fold keep zero logits as in HCREnsemble
+        selected = torch.nonzero((e >= 0) & (e < len(folds))).squeeze(1)
+        order = selected[torch.argsort(e[selected], stable=True)]
+        counts = torch.bincount(e[order], minlength=len(folds)).tolist()
+        j, o, a = j[order], o[order], a[order]
+        start = 0
+        c_sorted, q_sorted = [], []
+        for fold, count in zip(folds, counts):
+            if count:
+                c, q = self._run(fold, j[start:start + count], o[start:start + count], a[start:start + count])
+                c_sorted.append(c)
+                q_sorted.append(q)
+            start += count
+        # scatter back to the original order
+        if c_sorted:
+            c_logits[order] = torch.cat(c_sorted)
+            q_logits[order] = torch.cat(q_sorted)
+
+        # shift logits to have mean zero over quadjets/classes. Has no impact on output of softmax, just makes logits easier to interpret
+        c_logits = c_logits - c_logits.mean(dim=-1, keepdim=True)
+        q_logits = q_logits - q_logits.mean(dim=-1, keepdim=True)
+
+        return c_logits, q_logits
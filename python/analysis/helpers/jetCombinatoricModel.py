@@ -3,6 +3,7 @@ import logging
 import awkward as ak
 import numpy as np
 import yaml
+from scipy.special import comb
 from base_class.math.random import Squares
 
 
@@ -44,29 +45,27 @@ class jetCombinatoricModel:
             except KeyError:
                 logging.error(f'No {self.cut} key in JCM file. Keys are {self.data.keys()}')
 
+    def _pseudoTagProbs(self, maxLightJets, maxPseudoTags=12):
+        nbt = 3 # number of required b-tags
+        nlt = np.arange(maxLightJets + 1, dtype=float)[:, np.newaxis] # number of light jets
+        npt = np.arange(maxPseudoTags + 1)[np.newaxis, :] # number of pseudo-tags
+        nnt = np.maximum(nlt - npt, 0) # number of not tagged jets (b-tagged or pseudo-tagged)
+        ncr = comb(nlt, npt) # number of ways to get npt pseudo-tags, zero if npt>nlt
+        probs = self.t * ncr * self.p**npt * (1-self.p)**nnt
+        pair = (ncr > 0) & (npt > 0) & ((nbt + npt) % 2 == 0) # even number of tags boost from pair production enhancement term
+        probs[pair] *= (1 + self.e/np.where(pair, nlt, 1)**self.d)[pair]
+        return probs
+
     def __call__(self, untagged_jets, event=None):
         nEvent = len(untagged_jets)
-        maxPseudoTags = 12
-        nbt = 3 # number of required b-tags
         nlt = ak.to_numpy( ak.num(untagged_jets, axis=1) ) # number of light jets
-        nPseudoTagProb = np.zeros((maxPseudoTags+1, nEvent))
-        nPseudoTagProb[0] = self.t * (1-self.p)**nlt
-        for npt in range(1,maxPseudoTags+1): # iterate over all possible number of pseudo-tags
-            nt  = nbt + npt # number of tagged jets (b-tagged or pseudo-tagged)
-            nnt = nlt - npt # number of not tagged jets (b-tagged or pseudo-tagged)
-            nnt[nnt<0] = 0 # in cases where npt>nlt, set nnt to zero
-            ncr = ak.to_numpy( ak.num(ak.combinations(untagged_jets, npt)) ) # number of ways to get npt pseudo-tags
-            w_npt = self.t * ncr * self.p**npt * (1-self.p)**nnt
-            if (nt%2)==0: # event number of tags boost from pair production enhancement term
-                w_npt *= 1 + self.e/nlt**self.d
-            nPseudoTagProb[npt] = w_npt
-        w = np.sum(nPseudoTagProb[1:], axis=0)
+        probs = self._pseudoTagProbs(nlt.max(initial=0))
+        w = probs[:, 1:].sum(axis=1)[nlt]
         if event is None:
             prob = np.random.uniform(0, 1, size=nEvent)
         else:
             prob = self._rng.float(event)
-        r = prob*w + nPseudoTagProb[0] # random number between nPseudoTagProb[0] and nPseudoTagProb.sum(axis=0)
-        r = r.reshape(1,nEvent).repeat(maxPseudoTags+1,0)
-        c = np.array([nPseudoTagProb[:npt+1].sum(axis=0) for npt in range(maxPseudoTags+1)]) # cumulative prob
-        npt = (r>c).sum(axis=0)
+        r = prob*w + probs[nlt, 0] # random number between nPseudoTagProb[0] and nPseudoTagProb.sum(axis=0)
+        c = np.cumsum(probs, axis=1)[nlt] # cumulative prob
+        npt = (r[:, np.newaxis] > c).sum(axis=1)
         return w, npt
@@ -2,11 +2,11 @@ import numpy as np
 import awkward as ak
 from coffea.nanoevents import NanoEventsFactory, NanoAODSchema, BaseSchema
 from analysis.helpers.common import init_jet_factory, jet_corrections, mask_event_decision, drClean
-from coffea.lumi_tools import LumiMask
+from analysis.helpers.correctionFunctions import lumi_mask
 
 def apply_event_selection_4b( event, isMC, corrections_metadata, *, isMixedData=False, isTTForMixed=False, isDataForMixed=False):
 
-    lumimask = LumiMask(corrections_metadata['goldenJSON'])
+    lumimask = lumi_mask(corrections_metadata['goldenJSON'])
     event['lumimask'] = np.full(len(event), True) if isMC else np.array( lumimask(event.run, event.luminosityBlock) )
 
     event['passHLT'] = np.full(len(event), True) if (isMC or isMixedData) else mask_event_decision( event, decision="OR", branch="HLT", list_to_mask=event.metadata['trigger']  )
@@ -0,0 +1,146 @@
+import time
+
+from base_class.system.memory import rss
+
+#
+# Wall time, CPU time and RSS delta of the named stages of a processor, for each dataset.
+#   The profile is returned in the processor output and added across chunks by coffea.
+#   When profiling is disabled, NO_PROFILE is used instead: each stage is a shared no-op context.
+#
+
+_FIELDS = ('calls', 'wall', 'cpu', 'rss')
+
+
+class _Stage:
+    __slots__ = ('_profile', '_key', '_start')
+
+    def __init__(self, profile, key):
+        self._profile = profile
+        self._key = key
+
+    def __enter__(self):
+        self._start = (time.perf_counter(), time.process_time(), rss())
+        return self
+
+    def __exit__(self, *exc):
+        wall, cpu, memory = self._start
+        stage = self._profile.stages.setdefault(self._key, [0, 0.0, 0.0, 0])
+        stage[0] += 1
+        stage[1] += time.perf_counter() - wall
+        stage[2] += time.process_time() - cpu
+        stage[3] += rss() - memory
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class StageProfile:
+    """
+    Accumulate the cost of each stage with
+
+        prof = StageProfile(dataset)
+        with prof('selection'):
+            ...
+
+    or, for consecutive stages of a long function,
+
+        prof.start('selection')
+        ...
+        prof.start('hists')
+        ...
+        prof.stop()
+
+    Nested stages are recorded independently, so their times are also included in the outer stage.
+    """
+
+    def __init__(self, dataset=''):
+        self.dataset = dataset
+        self.stages = {}
+        self._current = None
+
+    def __call__(self, stage):
+        return _Stage(self, (self.dataset, stage))
+
+    def start(self, stage):
+        """Stop the current stage and start the next one."""
+        self.stop()
+        self._current = self(stage).__enter__()
+
+    def stop(self):
+        if self._current is not None:
+            self._current.__exit__(None, None, None)
+            self._current = None
+
+    def __bool__(self):
+        return True
+
+    def __iadd__(self, other):
+        if isinstance(other, StageProfile):
+            for key, values in other.stages.items():
+                stage = self.stages.setdefault(key, [0, 0.0, 0.0, 0])
+                for i, value in enumerate(values):
+                    stage[i] += value
+            return self
+        return NotImplemented
+
+    def __add__(self, other):
+        if isinstance(other, StageProfile):
+            profile = StageProfile(self.dataset)
+            profile += self
+            profile += other
+            return profile
+        return NotImplemented
+
+    def breakdown(self, by_dataset=False):
+        """{stage: {calls, wall, cpu, rss}} summed over datasets, or {(dataset, stage): ...} if by_dataset."""
+        merged = {}
+        for (dataset, stage), values in self.stages.items():
+            key = (dataset, stage) if by_dataset else stage
+            total = merged.setdefault(key, [0, 0.0, 0.0, 0])
+            for i, value in enumerate(values):
+                total[i] += value
+        return {k: dict(zip(_FIELDS, v)) for k, v in merged.items()}
+
+    def table(self, by_dataset=False):
+        """Breakdown table sorted by wall time."""
+        breakdown = self.breakdown(by_dataset)
+        total = sum(v['wall'] for v in breakdown.values()) or 1.0
+        name = lambda k: '/'.join(k) if by_dataset else k
+        width = max([len(name(k)) for k in breakdown] + [5])
+        lines = [f'{"stage":<{width}} {"calls":>8} {"wall [s]":>10} {"cpu [s]":>10} {"wall %":>7} {"rss [MB]":>10}']
+        for k, v in sorted(breakdown.items(), key=lambda x: -x[1]['wall']):
+            lines.append(f'{name(k):<{width}} {v["calls"]:>8} {v["wall"]:>10.2f} {v["cpu"]:>10.2f} '
+                         f'{100 * v["wall"] / total:>6.1f}% {v["rss"] / 1e6:>10.1f}')
+        return '\n'.join(lines)
+
+
+class _NoProfile:
+    """Disabled profile, every stage is the same no-op context."""
+
+    _stage = _NoStage()
+
+    def __call__(self, stage):
+        return self._stage
+
+    def start(self, stage):
+        pass
+
+    def stop(self):
+        pass
+
+    def __bool__(self):
+        return False
+
+
+NO_PROFILE = _NoProfile()
+
+
+def stage_profile(enabled, dataset=""):
+    return StageProfile(dataset) if enabled else NO_PROFILE
@@ -1,5 +1,6 @@
 import awkward as ak
 import numba
+import numpy as np
 
 mW, mt = 80.4, 173.0
 
@@ -188,3 +189,129 @@ def buildTop(input_jets, top_cand_idx):
     rec_top_cands = rec_top_cands[ak.argsort(  rec_top_cands.xW ** 2 + rec_top_cands.xbW ** 2, axis=1, ascending=True)]
 
     return rec_top_cands
+
+
+def _xyzt(pt, eta, phi, mass):
+    # same ufuncs as PtEtaPhiMLorentzVector.x, y, z and t, so the values are identical to buildTop
+    return pt * np.cos(phi), pt * np.sin(phi), pt * np.sinh(eta), np.hypot(pt * np.cosh(eta), mass)
+
+
+@numba.njit
+def _less(a, b):
+    # ascending order of np.argsort, nan last
+    return a < b or (np.isnan(b) and not np.isnan(a))
+
+
+@numba.njit
+def find_best_tops_kernel(offsets, btag, x, y, z, t, bx, by, bz, bt, consts, k):
+    """Fused search for the best k top candidates in each event
+
+       Enumerates the same (b, j, l) triplets as find_tops_kernel, computes xW and xbW in place
+       and keeps only the k candidates with the smallest xW^2 + xbW^2. Jets are expected to be sorted by btag.
+       Takes the cartesian components of the jets (x, y, z, t) and of the b-regressed jets (bx, by, bz, bt),
+       the remaining arithmetic follows buildTop step by step in the same precision (mW and 0.10 are given
+       in consts in the precision of the jets), so the same candidates are selected.
+       Returns the number of candidates per event and flat buffers of jet indices, xW and xbW.
+    """
+    c_mW, c_xW = consts[0], consts[1]
+    nEvents = len(offsets) - 1
+    counts = np.zeros(nEvents, dtype=np.int64)
+    idx = np.empty((nEvents * k, 3), dtype=np.int64)
+    xWs = np.empty(nEvents * k, dtype=x.dtype)
+    xbWs = np.empty(nEvents * k, dtype=np.float64)
+    chi2s = np.empty(k, dtype=np.float64)
+
+    for iEvent in range(nEvents):
+        o = offsets[iEvent]
+        nJets = offsets[iEvent + 1] - o
+        first = iEvent * k
+        n = 0
+        for ib in range(0, min(3, nJets)):
+            b = o + ib
+            for ij in range(2, nJets):
+                if ij == ib:
+                    continue
+                if btag[b] < btag[o + ij]:
+                    continue
+                j = o + ij
+                for il in range(2, nJets):
+                    if il == ib or il == ij:
+                        continue
+                    if btag[j] < btag[o + il]:
+                        continue
+                    l = o + il
+
+                    Wx, Wy, Wz, Wt = x[j] + x[l], y[j] + y[l], z[j] + z[l], t[j] + t[l]
+                    mW_p = np.sqrt(Wt * Wt - Wx * Wx - Wy * Wy - Wz * Wz)
+                    xW = (mW_p - c_mW) / (c_xW * mW_p)
+                    scale = c_mW / mW_p
+
+                    # the b-regressed jet can be in a higher precision (phi is promoted by PtEtaPhiMLorentzVector.multiply)
+                    tx, ty = bx[b] + Wx * scale, by[b] + Wy * scale
+                    tz, tt = bz[b] + Wz * scale, bt[b] + Wt * scale
+                    m2 = np.float64(tt) * np.float64(tt) - np.float64(tx) * np.float64(tx) - np.float64(ty) * np.float64(ty) - np.float64(tz) * np.float64(tz)
+                    mbW = np.sqrt(m2)
+                    xbW = (mbW - mt) / (0.05 * mbW)
+                    chi2 = np.float64(xW * xW) + xbW * xbW
+
+                    # insert into the sorted top-k buffer, ties keep the enumeration order
+                    if n == k and not _less(chi2, chi2s[n - 1]):
+                        continue
+                    pos = n if n < k else k - 1
+                    while pos > 0 and _less(chi2, chi2s[pos - 1]):
+                        chi2s[pos] = chi2s[pos - 1]
+                        idx[first + pos] = idx[first + pos - 1]
+                        xWs[first + pos] = xWs[first + pos - 1]
+                        xbWs[first + pos] = xbWs[first + pos - 1]
+                        pos -= 1
+                    chi2s[pos] = chi2
+                    idx[first + pos, 0] = ib
+                    idx[first + pos, 1] = ij
+                    idx[first + pos, 2] = il
+                    xWs[first + pos] = xW
+                    xbWs[first + pos] = xbW
+                    if n < k:
+                        n += 1
+        counts[iEvent] = n
+
+    keep = np.empty(counts.sum(), dtype=np.int64)
+    i = 0
+    for iEvent in range(nEvents):
+        for c in range(counts[iEvent]):
+            keep[i] = iEvent * k + c
+            i += 1
+    return counts, idx[keep], xWs[keep], xbWs[keep]
+
+
+def find_best_tops(input_jets, k=1):
+    """ Returns the k best reconstructed top candidates of each event sorted by xW^2 + xbW^2
+
+        Equivalent to buildTop(input_jets, find_tops(input_jets))[:, :k] without building all the triplets.
+        input_jets must be sorted by btagDeepFlavB in descending order.
+    """
+    counts = ak.to_numpy(ak.num(input_jets))
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    flat = ak.flatten(input_jets)
+    pt, eta, phi, mass, btag, bRegCorr = (ak.to_numpy(flat[field]) for field in ("pt", "eta", "phi", "mass", "btagDeepFlavB", "bRegCorr"))
+
+    # b * b.bRegCorr as in PtEtaPhiMLorentzVector.multiply
+    scale = np.abs(bRegCorr)
+    b = _xyzt(pt * scale, eta * np.sign(bRegCorr), phi % (2 * np.pi) - (np.pi * (bRegCorr < 0)), mass * scale)
+    xyzt = _xyzt(pt, eta, phi, mass)
+    dtype = xyzt[0].dtype
+    consts = np.array([mW, 0.10], dtype=dtype)
+
+    n, idx, xW, xbW = find_best_tops_kernel(offsets, btag, *xyzt, *np.broadcast_arrays(*b), consts, k)
+
+    # gather by the global jet index, jagged indexing of argsorted jets is not reliable in awkward 1
+    first = np.repeat(offsets[:-1], n)
+    rec_top_cands = ak.zip({
+        "b" : ak.unflatten(flat[first + idx[:, 0]], n),
+        "j" : ak.unflatten(flat[first + idx[:, 1]], n),
+        "l" : ak.unflatten(flat[first + idx[:, 2]], n),
+    })
+    rec_top_cands["xW"]  = ak.unflatten(xW, n)
+    rec_top_cands["xbW"] = ak.unflatten(xbW, n)
+
+    return rec_top_cands
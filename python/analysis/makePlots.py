@@ -6,137 +6,29 @@ import hist
 import argparse
 import tempfile
 os.environ['MPLCONFIGDIR'] = tempfile.mkdtemp()
-import matplotlib.pyplot as plt
-from coffea.util import load
+import matplotlib
+matplotlib.use('Agg')
 import numpy as np
 
 sys.path.insert(0, os.getcwd())
-from base_class.plots.plots import makePlot, make2DPlot, load_config, load_hists, read_axes_and_cuts, parse_args
+from base_class.plots.plots import load_config, load_hists, read_axes_and_cuts, parse_args
+from base_class.plots.jobs import plan_jobs, run_jobs
 import base_class.plots.iPlot_config as cfg
 
 np.seterr(divide='ignore', invalid='ignore')
 
 def doPlots(varList, cutList, debug=False):
 
-    if args.doTest:
-        varList = ["SvB_MA.ps_zz", "SvB_MA.ps_zh", "SvB_MA.ps_hh", "quadJet_selected.lead_vs_subl_m", "quadJet_min_dr.close_vs_other_m"]
+    jobs = plan_jobs(varList, cfg.plotModifiers, cfg.plotConfig, outputFolder=args.outputFolder, doTest=args.doTest)
+    if debug:
+        for job in jobs:
+            print(job)
 
-    #
-    #  Nominal 1D Plots
-    #
-    for v in varList:
-        if debug: print(f"plotting 1D ...{v}")
-
-        vDict = cfg.plotModifiers.get(v, {})
-        print(v, vDict, vDict.get("2d", False))
-        if vDict.get("2d", False):
-            continue
-
-        cut = "passPreSel"
-        tag = "fourTag"
-
-        vDict["ylabel"] = "Entries"
-        vDict["doRatio"] = cfg.plotConfig.get("doRatio", True)
-        vDict["legend"] = True
-
-        for region in ["SR", "SB"]:
-
-            if debug: print(f"plotting 1D ...{v}")
-            plot_args  = {}
-            plot_args["var"] = v
-            plot_args["cut"] = cut
-            plot_args["region"] = region
-            plot_args["outputFolder"] = args.outputFolder
-            plot_args = plot_args | vDict
-            if debug: print(plot_args)
-            fig = makePlot(cfg.hists[0], cutList, cfg.plotConfig,
-                           **plot_args)
-            plt.close()
-
-    #
-    #  2D Plots
-    #
-    for v in varList:
-        print(v)
-
-        vDict = cfg.plotModifiers.get(v, {})
-
-        if not vDict.get("2d", False):
-            continue
-
-        vDict["ylabel"] = "Entries"
-        vDict["doRatio"] = cfg.plotConfig.get("doRatio", True)
-        vDict["legend"] = True
-
-        for process in ["data", "Multijet", "HH4b", "TTToHadronic"]:
-            for region in ["SR", "SB"]:
-
-                plot_args  = {}
-                plot_args["var"] = v
-                plot_args["cut"] = cut
-                plot_args["region"] = region
-                plot_args["outputFolder"] = args.outputFolder
-                plot_args = plot_args | vDict
-
-                if debug: print("process is ",process)
-                if debug: print(plot_args)
-
-                fig = make2DPlot(cfg.hists[0], process, cutList, cfg.plotConfig,
-                                 **plot_args)
-                plt.close()
-
-    #
-    #  Comparison Plots
-    #
-    varListComp = []
-    if args.doTest:
-        varListComp = ["v4j.mass", "SvB_MA.ps", "quadJet_selected.xHH"]
-
-        for v in varListComp:
-            print(v)
-
-            vDict = cfg.plotModifiers.get(v, {})
-
-            vDict["ylabel"] = "Entries"
-            vDict["doRatio"] = cfg.plotConfig.get("doRatio", True)
-            vDict["legend"] = True
-
-            for process in ["data", "Multijet", "HH4b", "TTToHadronic"]:
-
-                #
-                # Comp Cuts
-                #
-                for region in ["SR", "SB"]:
-
-                    plot_args  = {}
-                    plot_args["var"] = v
-                    plot_args["cut"] = ["passPreSel", "failSvB", "passSvB"]
-                    plot_args["region"] = region
-                    plot_args["outputFolder"] = args.outputFolder
-                    plot_args["process"] = process
-                    plot_args["norm"] = True
-                    plot_args = plot_args | vDict
-
-                    if debug: print(plot_args)
-
-                    fig = makePlot(cfg.hists[0], cutList, cfg.plotConfig,
-                                   **plot_args)
-
-
-                    plt.close()
-
-                #
-                # Comp Regions
-                #
-                fig = makePlot(cfg.hists[0], cutList, cfg.plotConfig, var=v,
-                               cut="passPreSel",
-                               region=["SR", "SB"],
-                               process=process,
-                               outputFolder=args.outputFolder,
-                               **vDict
-                               )
-
-                plt.close()
+    tstart = time.time()
+    report = run_jobs(jobs, cfg.hists[0], cutList, cfg.plotConfig, workers=args.workers,
+                      cache=None if args.noCache else args.outputFolder)
+    print(f"{len(jobs)} plots with {args.workers} workers: {report['rendered']} rendered, {report['skipped']} unchanged")
+    print(f"  projections {report['project']:.1f}s, rendering {report['render']:.1f}s, total {time.time() - tstart:.1f}s")
 
 
 if __name__ == '__main__':
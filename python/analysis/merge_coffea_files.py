@@ -1,7 +1,150 @@
 import argparse
+import itertools
 import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from coffea.util import load, save
 
+sys.path.insert(0, os.getcwd())
+
+#
+# Merge coffea outputs with a pairwise tree reduction over a process pool.
+#   Each task loads a few files, merges them and saves the partial sum to a temporary file,
+#   so a worker never holds more than fan_in outputs and the depth is log(N)/log(fan_in).
+#   Histograms are added on their boost-histogram storage views.
+#
+
+
+def _additive(h):
+    import boost_histogram as bh
+    return h.storage_type in (bh.storage.Double, bh.storage.Int64, bh.storage.AtomicInt64, bh.storage.Weight, bh.storage.Unlimited)
+
+
+def _is_category(axis):
+    import boost_histogram as bh
+    return isinstance(axis, (bh.axis.StrCategory, bh.axis.IntCategory))
+
+
+def _add_view(view, other, index=...):
+    if view.dtype.names is None:
+        view[index] += other
+    else:
+        for field in view.dtype.names:
+            view[field][index] += other[field]
+
+
+def _union_axis(a, b):
+    categories = [*a] + [c for c in b if c not in set(a)]
+    return type(a)(categories, name=a.name, label=a.label, growth=True)
+
+
+def add_hist(a, b):
+    """a + b, reusing a when the axes are identical. Falls back to hist addition for non-additive storages or incompatible axes."""
+    if not (_additive(a) and a.storage_type == b.storage_type and len(a.axes) == len(b.axes)):
+        a += b
+        return a
+    if a.axes == b.axes:
+        _add_view(a.view(flow=True), b.view(flow=True))
+        return a
+    # grow the category axes to the union of both
+    axes = []
+    for x, y in zip(a.axes, b.axes):
+        if _is_category(x) and _is_category(y) and type(x) == type(y) and x.traits.growth and y.traits.growth:
+            axes.append(_union_axis(x, y))
+        elif x == y:
+            axes.append(x)
+        else:
+            a += b
+            return a
+    merged = type(a)(*axes, storage=a.storage_type(), name=a.name, label=a.label)
+    if any(_is_category(x) and x.extent != len(x) for h in (a, b, merged) for x in h.axes):
+        a += b
+        return a
+    view = merged.view(flow=True)
+    for h in (a, b):
+        other = h.view(flow=True)
+        for index in _merged_blocks(merged, h):
+            _add_view(view, other[tuple(i for _, i in index)], tuple(m for m, _ in index))
+    return merged
+
+
+def _merged_blocks(merged, h):
+    """Pairs of (merged index, h index) that cover all bins of h with basic indexing. Contiguous categories are sliced, the others are added one by one."""
+    axes = []
+    for m, x in zip(merged.axes, h.axes):
+        if not _is_category(x):
+            axes.append([(slice(None), slice(None))])
+            continue
+        positions = [m.index(c) for c in x]
+        if positions == [*range(positions[0], positions[0] + len(positions))]:
+            axes.append([(slice(positions[0], positions[0] + len(positions)), slice(None))])
+        else:
+            axes.append([*zip(positions, range(len(positions)))])
+    return itertools.product(*axes)
+
+
+def merge_outputs(output, other):
+    for ikey in other.keys():
+        if ikey not in output:
+            output[ikey] = other[ikey]
+        elif 'hists' in ikey:
+            for ihist in other[ikey].keys():
+                if ihist in output[ikey]:
+                    output[ikey][ihist] = add_hist(output[ikey][ihist], other[ikey][ihist])
+                else:
+                    output[ikey][ihist] = other[ikey][ihist]
+        elif isinstance(output[ikey], (dict, set)):
+            output[ikey] = output[ikey] | other[ikey]
+        else:
+            output[ikey] = output[ikey] + other[ikey]
+    return output
+
+
+def merge_files(files, output_file, remove=()):
+    """Merge files one by one into output_file and remove the files in remove afterwards."""
+    output = load(files[0])
+    for ifile in files[1:]:
+        logging.info(f'Merging {ifile}')
+        output = merge_outputs(output, load(ifile))
+    save(output, output_file)
+    for ifile in remove:
+        os.remove(ifile)
+    return output_file
+
+
+def tree_merge(files, output_file, workers=1, fan_in=2, tmpdir=None):
+    """Merge files with a tree reduction over workers processes. The inputs are never modified."""
+    tmpdir = tempfile.mkdtemp(dir=tmpdir)
+    level = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while len(files) > 1:
+                tasks = []
+                for i in range(0, len(files), fan_in):
+                    group = files[i:i + fan_in]
+                    if len(group) == 1:
+                        tasks.append(None)
+                        continue
+                    partial_file = os.path.join(tmpdir, f'level{level}_{i // fan_in}.coffea')
+                    remove = [f for f in group if f.startswith(tmpdir)]
+                    tasks.append(pool.submit(merge_files, group, partial_file, remove))
+                files = [files[i * fan_in] if task is None else task.result() for i, task in enumerate(tasks)]
+                level += 1
+        if files[0].startswith(tmpdir):
+            shutil.move(files[0], output_file)
+        else:
+            shutil.copy(files[0], output_file)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return output_file
+
+
 if __name__ == '__main__':
 
     #
@@ -12,28 +155,15 @@ if __name__ == '__main__':
     parser.add_argument('-o', '--output', dest="output_file",
                         default="hists.coffea", help='Output file.')
     parser.add_argument('-f', '--files', nargs='+', dest='files_to_merge', default=[], help="List of files to merge")
+    parser.add_argument('-j', '--workers', dest='workers', type=int, default=1, help='Number of processes.')
+    parser.add_argument('--fan-in', dest='fan_in', type=int, default=2, help='Number of files merged in each task.')
+    parser.add_argument('--tmpdir', dest='tmpdir', default=None, help='Directory for the partial sums.')
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
     logging.info(f"\nRunning with these parameters: {args}")
 
-    output = {}
-
-    output = load(args.files_to_merge[0])
-    for ifile in args.files_to_merge[1:]:
-        logging.info(f'Merging {ifile}')
-        iout = load(ifile)
-        for ikey in output.keys():
-            if 'hists' in ikey:
-                for ihist in output['hists'].keys():
-                    try:
-                        output['hists'][ihist] += iout['hists'][ihist]
-                    except KeyError:
-                        pass
-            else:
-                output[ikey] = output[ikey] | iout[ikey]
-
-
+    tstart = time.time()
     hfile = f'{args.output_file}'
-    logging.info(f'\nSaving file {hfile}')
-    save(output, hfile)
+    tree_merge(args.files_to_merge, hfile, workers=args.workers, fan_in=args.fan_in, tmpdir=args.tmpdir)
+    logging.info(f'\nSaved file {hfile} in {time.time() - tstart:.1f}s')
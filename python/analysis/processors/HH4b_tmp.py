@@ -1,7 +1,6 @@
 import time
 import awkward as ak
 import numpy as np
-import correctionlib
 import yaml
 import warnings
 
@@ -28,6 +27,7 @@ from analysis.helpers.cutflow import cutFlow
 from analysis.helpers.FriendTreeSchema import FriendTreeSchema
 from analysis.helpers.correctionFunctions import btagVariations
 from analysis.helpers.correctionFunctions import btagSF_norm as btagSF_norm_file
+from analysis.helpers.correctionFunctions import correction_set
 
 
 from analysis.helpers.jetCombinatoricModel import jetCombinatoricModel
@@ -252,7 +252,7 @@ class analysis(processor.ProcessorABC):
 
             # puWeight
             puWeight = list(
-                correctionlib.CorrectionSet.from_file(
+                correction_set(
                     self.corrections_metadata[year]["PU"]
                 ).values()
             )[0]
@@ -308,7 +308,7 @@ class analysis(processor.ProcessorABC):
         # Calculate and apply btag scale factors
         #
         if isMC and self.apply_btagSF:
-            btagSF = correctionlib.CorrectionSet.from_file(
+            btagSF = correction_set(
                 self.corrections_metadata[year]["btagSF"]
             )["deepJet_shape"]
             selev["weight"] = apply_btag_sf(
@@ -2,14 +2,13 @@ import time
 import gc
 import awkward as ak
 import numpy as np
-import correctionlib
 import yaml
 import warnings
 
-from analysis.helpers.networks import HCREnsemble
-from analysis.helpers.topCandReconstruction import find_tops, dumpTopCandidateTestVectors, buildTop, mW, mt, find_tops_slow
+from analysis.helpers.inference import HCRInference
+from analysis.helpers.topCandReconstruction import find_tops, dumpTopCandidateTestVectors, buildTop, mW, mt, find_tops_slow, find_best_tops
 
-from coffea.nanoevents import NanoEventsFactory, NanoAODSchema
+from coffea.nanoevents import NanoAODSchema
 from coffea import processor
 
 from base_class.hist import Collection, Fill
@@ -17,16 +16,17 @@ from base_class.physics.object import LorentzVector, Jet, Muon, Elec
 from analysis.helpers.hist_templates import SvBHists, FvTHists, QuadJetHists, WCandHists, TopCandHists
 
 from analysis.helpers.cutflow import cutFlow
-from analysis.helpers.FriendTreeSchema import FriendTreeSchema
 from analysis.helpers.correctionFunctions import btagVariations
 from analysis.helpers.correctionFunctions import btagSF_norm as btagSF_norm_file
+from analysis.helpers.correctionFunctions import correction_set
 
 from analysis.helpers.jetCombinatoricModel import jetCombinatoricModel
 from analysis.helpers.common import apply_btag_sf
 from analysis.helpers.selection_basic_4b import apply_event_selection_4b, apply_object_selection_4b
+from analysis.helpers.stageProfile import stage_profile
 import logging
 
-from base_class.root import TreeReader, Chunk
+from base_class.root import TreeReader, Chunk, FriendJoin
 
 #
 # Setup
@@ -34,6 +34,46 @@ from base_class.root import TreeReader, Chunk
 NanoAODSchema.warn_missing_crossrefs = False
 warnings.filterwarnings("ignore")
 
+# friend tree fields, read as "name_field", are the ones filled by the histogram templates plus the ones used by the processor
+# quad jet scores
+QUADJET_FIELDS = {'q_1234', 'q_1324', 'q_1423'}
+# FvT histograms not filled for the mixed datasets
+FvT_MIXED_SKIP = ['pt', 'pm3', 'pm4']
+
+
+def FvT_fields(skip=None, quadJet=True):
+    """Fields of the FvT friend tree read by the processor and FvTHists. "FvT" is the branch "name", "frac_err" is computed from "std"."""
+    fields = (FvTHists.fields(skip) - {'FvT', 'frac_err'}) | {'std'}
+    if quadJet:
+        fields |= QUADJET_FIELDS
+    return fields
+
+
+def SvB_fields():
+    """Fields of the SvB friend trees read by setSvBVars, the quad jets and SvBHists. "ps_zz", "ps_zh" and "ps_hh" are computed by setSvBVars."""
+    return (SvBHists.fields() - {'ps_zz', 'ps_zh', 'ps_hh'}) | {'pzz', 'pzh', 'phh'} | QUADJET_FIELDS
+
+
+def friend_branches(name, fields, weight=False):
+    """Branches "name_field" of a friend tree, and the FvT weight "name" if weight."""
+    return ({name} if weight else set()) | {f'{name}_{field}' for field in fields}
+
+
+def read_friends(friends, target, branches):
+    """Read the branches of each friend tree, raise KeyError if any of them is missing."""
+    data = friends.arrays(target, filter=lambda available: set(available) & set().union(*branches.values()))
+    for name, required in branches.items():
+        missing = required - set(data[name].fields)
+        if missing:
+            raise KeyError(f'Friend tree "{name}" does not have the branches {sorted(missing)}')
+    return {name: friend_collection(data[name], name) for name in data}
+
+
+def friend_collection(data, name):
+    """Friend tree branches "name_*" and "name" as one collection, same as FriendTreeSchema."""
+    return ak.zip({(k[len(name) + 1:] if k.startswith(f'{name}_') else k): data[k] for k in data.fields}, depth_limit=1)
+
+
 def setSvBVars(SvBName, event):
     largest_name = np.array(['None', 'ZZ', 'ZH', 'HH'])
 
@@ -60,7 +100,7 @@ def setSvBVars(SvBName, event):
 
 
 class analysis(processor.ProcessorABC):
-    def __init__(self, *, JCM = None, addbtagVariations=None, SvB=None, SvB_MA=None, threeTag = True, apply_trigWeight = True, apply_btagSF = True, apply_FvT = True, run_SvB = True, run_topreco = True, corrections_metadata='analysis/metadata/corrections.yml', make_classifier_input: str = None):
+    def __init__(self, *, JCM = None, addbtagVariations=None, SvB=None, SvB_MA=None, threeTag = True, apply_trigWeight = True, apply_btagSF = True, apply_FvT = True, run_SvB = True, run_topreco = True, corrections_metadata='analysis/metadata/corrections.yml', make_classifier_input: str = None, profile: bool = False):
         logging.debug('\nInitialize Analysis Processor')
         self.blind = False
         print('Initialize Analysis Processor')
@@ -71,8 +111,8 @@ class analysis(processor.ProcessorABC):
         self.btagVar = btagVariations(systematics=addbtagVariations)  #### AGE: these two need to be review later
         self.run_SvB = run_SvB
         self.run_topreco = run_topreco  #### AGE: this is temporary topreco is memory consuming (needs fix)
-        self.classifier_SvB = HCREnsemble(SvB) if SvB else None
-        self.classifier_SvB_MA = HCREnsemble(SvB_MA) if SvB_MA else None
+        self.classifier_SvB = HCRInference(SvB) if SvB else None
+        self.classifier_SvB_MA = HCRInference(SvB_MA) if SvB_MA else None
         self.corrections_metadata = yaml.safe_load(open(corrections_metadata, 'r'))
         self.cutFlowCuts = ["all", "passHLT", "passNoiseFilter", "passJetMult", "passJetMult_btagSF", "passPreSel", "passDiJetMass", 'SR', 'SB']
         self.histCuts = ['passPreSel']
@@ -80,6 +120,7 @@ class analysis(processor.ProcessorABC):
             self.cutFlowCuts += ['passSvB', 'failSvB']
             self.histCuts += ['passSvB', 'failSvB']
         self.make_classifier_input = make_classifier_input
+        self.profile = profile
 
     def process(self, event):
         tstart = time.time()
@@ -111,21 +152,49 @@ class analysis(processor.ProcessorABC):
         processOutput['nEvent'][event.metadata['dataset']] = nEvent
 
         self._cutFlow = cutFlow(self.cutFlowCuts)
+        prof = stage_profile(self.profile, dataset)
 
         logging.debug(fname)
         logging.debug(f'{chunk}Process {nEvent} Events')
 
+        prof.start('friends')
         #
         # Reading SvB friend trees
         #
         path = fname.replace(fname.split('/')[-1], '')
+        target = Chunk.from_coffea_events(event)
+        friends = FriendJoin(keys={'event': '{name}_event'})
+        read_branches = {}
+        if self.apply_FvT:
+            if isMixedData:
+                friends.add_file(event.metadata["FvT_name"], target, event.metadata["FvT_file"])
+                read_branches[event.metadata["FvT_name"]] = friend_branches(event.metadata["FvT_name"], FvT_fields(FvT_MIXED_SKIP, quadJet=False), weight=True)
+            elif (isDataForMixed or isTTForMixed):
+                for i, (_FvT_name, _FvT_file) in enumerate(zip(event.metadata["FvT_names"], event.metadata["FvT_files"])):
+                    friends.add_file(_FvT_name, target, _FvT_file)
+                    # only the first one fills the FvT histograms
+                    read_branches[_FvT_name] = friend_branches(_FvT_name, FvT_fields(FvT_MIXED_SKIP, quadJet=False) if i == 0 else [], weight=True)
+            else:
+                friends.add_file('FvT', target, f'{path}{"FvT.root"}')
+                read_branches['FvT'] = friend_branches('FvT', FvT_fields(), weight=True)
+        read_SvB = self.run_SvB and (self.classifier_SvB is None) and (self.classifier_SvB_MA is None)
+        if read_SvB:
+            friends.add_file('SvB',    target, f'{path}{"SvB_newSBDef.root" if "mix" in dataset else "SvB.root"}')
+            friends.add_file('SvB_MA', target, f'{path}{"SvB_MA_newSBDef.root" if "mix" in dataset else "SvB_MA.root"}')
+            read_branches['SvB'] = friend_branches('SvB', SvB_fields())
+            read_branches['SvB_MA'] = friend_branches('SvB_MA', SvB_fields())
+
+        misaligned = friends.check(target)
+        if misaligned:
+            logging.error(f'ERROR: {", ".join(misaligned)} events do not match events ttree')
+            return
+        friend_data = read_friends(friends, target, read_branches)
+
         if self.apply_FvT:
             if isMixedData:
 
                 FvT_name = event.metadata["FvT_name"]
-                event['FvT']    = getattr(NanoEventsFactory.from_root(f'{event.metadata["FvT_file"]}',
-                                                                      entry_start=estart, entry_stop=estop,
-                                                                      schemaclass=FriendTreeSchema).events(), FvT_name)
+                event['FvT']    = friend_data[FvT_name]
 
                 event['FvT', 'FvT']    = getattr(event['FvT'], FvT_name)
 
@@ -142,9 +211,7 @@ class analysis(processor.ProcessorABC):
                 #
                 # Use the first to define the FvT weights
                 #
-                event['FvT']    = getattr(NanoEventsFactory.from_root(f'{event.metadata["FvT_files"][0]}',
-                                                                      entry_start=estart, entry_stop=estop,
-                                                                      schemaclass=FriendTreeSchema).events(), event.metadata["FvT_names"][0])
+                event['FvT']    = friend_data[event.metadata["FvT_names"][0]]
 
                 event['FvT', 'FvT']    = getattr(event['FvT'], event.metadata["FvT_names"][0])
 
@@ -156,48 +223,31 @@ class analysis(processor.ProcessorABC):
                 event['FvT', 'q_1423'] = np.full(len(event), -1, dtype=int)
 
 
-                for _FvT_name, _FvT_file in zip(event.metadata["FvT_names"], event.metadata["FvT_files"]):
-
+                for _FvT_name in event.metadata["FvT_names"]:
 
-                    event[_FvT_name]    = getattr(NanoEventsFactory.from_root(f'{_FvT_file}',
-                                                                              entry_start=estart, entry_stop=estop,
-                                                                              schemaclass=FriendTreeSchema).events(), _FvT_name)
+                    event[_FvT_name]    = friend_data[_FvT_name]
 
                     event[_FvT_name, _FvT_name]    = getattr(event[_FvT_name], _FvT_name)
 
-
-
-
             else:
-                event['FvT']    = NanoEventsFactory.from_root(f'{path}{"FvT.root"}',
-                                                              entry_start=estart, entry_stop=estop, schemaclass=FriendTreeSchema).events().FvT
+                event['FvT']    = friend_data['FvT']
 
             event['FvT', 'frac_err'] = event['FvT'].std / event['FvT'].FvT
-            if not ak.all(event.FvT.event == event.event):
-                logging.error('ERROR: FvT events do not match events ttree')
-                return
 
+        prof.start('SvB')
         if self.run_SvB:
             if (self.classifier_SvB is not None) | (self.classifier_SvB_MA is not None):
                 self.compute_SvB(selev)  ### this computes both
             else:
-                event['SvB']    = NanoEventsFactory.from_root(f'{path}{"SvB_newSBDef.root" if "mix" in dataset else "SvB.root"}',
-                                                          entry_start=estart, entry_stop=estop, schemaclass=FriendTreeSchema).events().SvB
-                if not ak.all(event.SvB.event == event.event):
-                    logging.error('ERROR: SvB events do not match events ttree')
-                    return
-
-                event['SvB_MA'] = NanoEventsFactory.from_root(f'{path}{"SvB_MA_newSBDef.root" if "mix" in dataset else "SvB_MA.root"}',
-                                                          entry_start=estart, entry_stop=estop, schemaclass=FriendTreeSchema).events().SvB_MA
-                if not ak.all(event.SvB_MA.event == event.event):
-                    logging.error('ERROR: SvB_MA events do not match events ttree')
-                    return
+                event['SvB']    = friend_data['SvB']
+                event['SvB_MA'] = friend_data['SvB_MA']
 
                 # defining SvB for different SR
                 setSvBVars("SvB",    event)
                 setSvBVars("SvB_MA", event)
 
 
+        prof.start('JCM_load')
         if isDataForMixed:
             #
             # Load the different JCMs
@@ -207,6 +257,7 @@ class analysis(processor.ProcessorABC):
                 event[_JCM_load] = JCM_array[_JCM_load]
 
 
+        prof.start('weights')
         #
         # general event weights
         #
@@ -221,7 +272,7 @@ class analysis(processor.ProcessorABC):
 
             # puWeight
             if not isTTForMixed:
-                puWeight = list(correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['PU']).values())[0]
+                puWeight = list(correction_set(self.corrections_metadata[year]['PU']).values())[0]
                 for var in ['nominal', 'up', 'down']:
                     event[f'PU_weight_{var}'] = puWeight.evaluate(event.Pileup.nTrueInt.to_numpy(), var)
                 event['weight'] = event.weight * event.PU_weight_nominal
@@ -234,6 +285,7 @@ class analysis(processor.ProcessorABC):
 
         logging.debug(f"event['weight'] = {event.weight}")
 
+        prof.start('event_selection')
         #
         # Event selection (function only adds flags, not remove events)
         #
@@ -243,6 +295,7 @@ class analysis(processor.ProcessorABC):
         self._cutFlow.fill("passNoiseFilter",  event[ event.lumimask & event.passNoiseFilter], allTag=True)
         self._cutFlow.fill("passHLT",  event[ event.lumimask & event.passNoiseFilter & event.passHLT], allTag=True)
 
+        prof.start('object_selection')
         # Apply object selection (function does not remove events, adds content to objects)
         event = apply_object_selection_4b( event, year, isMC, dataset, self.corrections_metadata[year], isMixedData=isMixedData, isTTForMixed=isTTForMixed, isDataForMixed=isDataForMixed)
         selections = []
@@ -254,11 +307,11 @@ class analysis(processor.ProcessorABC):
         #
         selev = event[selections[-1]]
 
+        prof.start('btagSF')
         #
         # Calculate and apply btag scale factors
         #
         if isMC and self.apply_btagSF:
-            btagSF = correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['btagSF'])['deepJet_shape']
             selev['weight'] = apply_btag_sf(selev, selev.selJet,
                                             correction_file=self.corrections_metadata[year]['btagSF'],
                                             btag_var=self.btagVar,
@@ -267,6 +320,7 @@ class analysis(processor.ProcessorABC):
 
             self._cutFlow.fill("passJetMult_btagSF",  selev, allTag=True)
 
+        prof.start('candidates')
         #
         # Preselection: keep only three or four tag events
         #
@@ -324,6 +378,7 @@ class analysis(processor.ProcessorABC):
         selev['notCanJet_coffea'] = notCanJet
         selev['nNotCanJet'] = ak.num(selev.notCanJet_coffea)
 
+        prof.start('JCM')
         #
         # calculate pseudoTagWeight for threeTag events
         #
@@ -374,6 +429,7 @@ class analysis(processor.ProcessorABC):
             else:
                 selev['weight'] = weight_noFvT
 
+        prof.start('pairing')
         #
         # Build diJets, indexed by diJet[event,pairing,0/1]
         #
@@ -487,6 +543,7 @@ class analysis(processor.ProcessorABC):
             selev['passSvB'] = (selev['SvB_MA'].ps > 0.80)
             selev['failSvB'] = (selev['SvB_MA'].ps < 0.05)
 
+        prof.start('topreco')
         #
         #  Build the top Candiates
         #
@@ -496,8 +553,7 @@ class analysis(processor.ProcessorABC):
 
             # sort the jets by btagging
             selev.selJet  = selev.selJet[ak.argsort(selev.selJet.btagDeepFlavB, axis=1, ascending=False)]
-            top_cands     = find_tops_slow(selev.selJet)
-            rec_top_cands = buildTop(selev.selJet, top_cands)
+            rec_top_cands = find_best_tops(selev.selJet)
 
             selev["top_cand"] = rec_top_cands[:, 0]
             bReg_p = selev.top_cand.b * selev.top_cand.b.bRegCorr
@@ -527,6 +583,7 @@ class analysis(processor.ProcessorABC):
                 selev["delta_xbW"] = selev.xbW - selev.xbW_reco
                 selev["delta_xW"] = selev.xW - selev.xW_reco
 
+        prof.start('hists')
         #
         # Blind data in fourTag SR
         #
@@ -580,7 +637,7 @@ class analysis(processor.ProcessorABC):
         if self.apply_FvT:
             FvT_skip = []
             if isMixedData or isDataForMixed or isTTForMixed:
-                FvT_skip = ["pt", "pm3", "pm4"]
+                FvT_skip = FvT_MIXED_SKIP
 
             fill += FvTHists(('FvT', 'FvT Classifier'), 'FvT', skip=FvT_skip)
             fill += hist.add('quadJet_selected_FvT_score', (100, 0, 1, ("quadJet_selected.FvT_q_score", 'Selected Quad Jet Diboson FvT q score')))
@@ -641,6 +698,7 @@ class analysis(processor.ProcessorABC):
         # fill.cache(selev)
         fill(selev)
 
+        prof.start('cutflow')
         #
         # CutFlow
         #
@@ -652,6 +710,7 @@ class analysis(processor.ProcessorABC):
             self._cutFlow.fill("passSvB",       selev[selev.passSvB])
             self._cutFlow.fill("failSvB",       selev[selev.failSvB])
 
+        prof.stop()
         garbage = gc.collect()
         # print('Garbage:',garbage)
 
@@ -665,6 +724,7 @@ class analysis(processor.ProcessorABC):
 
         friends = {}
         if self.make_classifier_input is not None:
+            prof.start('classifier_input')
             ### AGE: this should be temporary
             for k in ["ZZSR", "ZHSR", "HHSR", "SR", "SB"]:
                 selev[k] = selev["quadJet_selected"][k]
@@ -687,6 +747,9 @@ class analysis(processor.ProcessorABC):
                 "JCM_weight",
                 *selections,
             )
+            prof.stop()
+        if prof:
+            processOutput['profile'] = prof
 
         return hist.output | processOutput | friends
 
@@ -2,7 +2,6 @@ import time
 import gc
 import numpy as np
 import uproot
-import correctionlib
 import yaml
 import warnings
 
@@ -14,6 +13,7 @@ from base_class.physics.object import Jet
 
 from analysis.helpers.correctionFunctions import btagVariations
 from analysis.helpers.correctionFunctions import btagSF_norm as btagSF_norm_file
+from analysis.helpers.correctionFunctions import correction_set
 from analysis.helpers.cutflow import cutFlow
 
 
@@ -83,7 +83,7 @@ class analysis(processor.ProcessorABC):
             #event['weight'] = event.weight * event.trigWeight.Data
 
             #puWeight
-            puWeight = list(correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['PU']).values())[0]
+            puWeight = list(correction_set(self.corrections_metadata[year]['PU']).values())[0]
             for var in ['nominal', 'up', 'down']:
                 event[f'PU_weight_{var}'] = puWeight.evaluate(event.Pileup.nTrueInt.to_numpy(), var)
             event['weight'] = event.weight * event.PU_weight_nominal
@@ -118,7 +118,6 @@ class analysis(processor.ProcessorABC):
         # Calculate and apply btag scale factors
         #
         if isMC:
-            btagSF = correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['btagSF'])['deepJet_shape']
             selev['weight'] = apply_btag_sf(selev, selev.selJet,
                                             correction_file=self.corrections_metadata[year]['btagSF'],
                                             btag_var=self.btagVar,
@@ -7,7 +7,6 @@ from copy import deepcopy
 import awkward as ak
 import numpy as np
 import uproot
-import correctionlib
 import yaml
 import warnings
 
@@ -22,6 +21,7 @@ from base_class.physics.object import LorentzVector, Jet, Muon, Elec
 from analysis.helpers.FriendTreeSchema import FriendTreeSchema
 from analysis.helpers.correctionFunctions import btagVariations
 from analysis.helpers.correctionFunctions import btagSF_norm as btagSF_norm_file
+from analysis.helpers.correctionFunctions import correction_set
 from analysis.helpers.cutflow import cutFlow
 from analysis.helpers.topCandReconstruction import find_tops, dumpTopCandidateTestVectors, buildTop
 from analysis.helpers.hist_templates import SvBHists, FvTHists, QuadJetHistsUnsup, WCandHists, TopCandHists
@@ -149,7 +149,7 @@ class analysis(processor.ProcessorABC):
 
             ###puWeight
             if ('Pileup' in event.fields):
-                puWeight = list(correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['PU']).values())[0]
+                puWeight = list(correction_set(self.corrections_metadata[year]['PU']).values())[0]
                 for var in ['nominal', 'up', 'down']:
                     event[f'PU_weight_{var}'] = puWeight.evaluate(event.Pileup.nTrueInt.to_numpy(), var)
                 event['weight'] = event.weight * event.PU_weight_nominal
@@ -182,7 +182,6 @@ class analysis(processor.ProcessorABC):
         
         ##### Calculate and apply btag scale factors
         if isMC:
-            btagSF = correctionlib.CorrectionSet.from_file(self.corrections_metadata[year]['btagSF'])['deepJet_shape']
             selev['weight'] = apply_btag_sf(selev, selev.selJet,
                                             correction_file=self.corrections_metadata[year]['btagSF'],
                                             btag_var=self.btagVar,
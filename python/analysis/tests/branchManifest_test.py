@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import time
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+import uproot
+from coffea.nanoevents import NanoAODSchema
+
+from analysis.helpers.branchManifest import MissingBranchError, branch_filter, check_complete, check_manifest, pruned_schema, trace
+
+
+#
+# python analysis/tests/branchManifest_test.py
+#
+
+class JetProcessor:
+    def __init__(self, fields=('pt',)):
+        self.fields = fields
+
+    def process(self, events):
+        jets = events.Jet[events.Jet.pt > 30]
+        return {field: ak.sum(jets[field]) for field in self.fields}
+
+
+class OptionalMuonProcessor(JetProcessor):
+    def process(self, events):
+        output = super().process(events)
+        if 'Muon' in events.fields:
+            output['muon_pt'] = ak.sum(events.Muon.pt)
+        return output
+
+
+def make_file(path, n, seed=0, unused=0):
+    """Events with Jet and Muon, plus unused flat branches and one unused collection per 10 of them."""
+    rng = np.random.default_rng(seed)
+    nJet = rng.integers(0, 10, n)
+    nMuon = rng.integers(0, 3, n)
+    jets = {f: ak.unflatten(rng.normal(50, 20, nJet.sum()).astype(np.float32), nJet)
+            for f in ['pt', 'eta', 'phi', 'mass', 'btagDeepFlavB', 'puId', 'jetId', 'bRegCorr', 'bRegRes', 'rawFactor']}
+    muons = {f: ak.unflatten(rng.normal(30, 10, nMuon.sum()).astype(np.float32), nMuon) for f in ['pt', 'eta', 'phi', 'mass']}
+    branches = {'run': np.ones(n, dtype=np.uint32), 'event': np.arange(n, dtype=np.uint64),
+                'Jet': ak.zip(jets), 'Muon': ak.zip(muons)}
+    for i in range(unused):
+        branches[f'HLT_Unused{i}'] = rng.random(n) < 0.5
+    for i in range(unused // 10):
+        branches[f'Unused{i}'] = ak.zip({f: ak.unflatten(rng.normal(0, 1, nMuon.sum()).astype(np.float32), nMuon)
+                                         for f in ['pt', 'eta', 'phi', 'mass']})
+    with uproot.recreate(path) as f:
+        f['Events'] = branches
+
+
+class BranchManifestTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tiny = os.path.join(self.tmpdir.name, 'tiny.root')
+        self.large = os.path.join(self.tmpdir.name, 'large.root')
+        make_file(self.tiny, 100)
+        make_file(self.large, 200_000, seed=1, unused=300)
+        self.metadata = {'dataset': 'test'}
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def test_trace(self):
+        manifest = trace(JetProcessor(), self.tiny, self.metadata)
+        self.assertIn('Jet_pt', manifest)
+        self.assertNotIn('Muon_pt', manifest)
+        self.assertEqual(JetProcessor().process(_events(self.tiny, pruned_schema(manifest)))['pt'],
+                         JetProcessor().process(_events(self.tiny, NanoAODSchema))['pt'])
+        self.assertEqual(branch_filter(manifest)({'nJet', 'Jet_pt', 'Jet_eta', 'Muon_pt'}), {'nJet', 'Jet_pt'})
+
+    def test_missing(self):
+        manifest = trace(JetProcessor(), self.tiny, self.metadata)
+        with self.assertRaises(MissingBranchError):
+            check_manifest(trace(JetProcessor(('pt', 'eta')), self.tiny, self.metadata), manifest)
+        with self.assertRaises(MissingBranchError):
+            check_complete(JetProcessor(('pt', 'eta')), self.tiny, self.metadata, manifest)
+
+    def test_complete(self):
+        manifest = trace(JetProcessor(), self.tiny, self.metadata)
+        check_complete(JetProcessor(), self.tiny, self.metadata, manifest)
+        # a branch that is only read if it exists never fails the pruned run, only the comparison with the unpruned output catches it
+        self.assertNotIn('muon_pt', OptionalMuonProcessor().process(_events(self.tiny, pruned_schema(manifest))))
+        with self.assertRaises(MissingBranchError):
+            check_complete(OptionalMuonProcessor(), self.tiny, self.metadata, manifest)
+        check_complete(OptionalMuonProcessor(), self.tiny, self.metadata, trace(OptionalMuonProcessor(), self.tiny, self.metadata))
+
+    def test_pickle(self):
+        schema = pruned_schema({'Jet_pt'})
+        self.assertIs(pickle.loads(pickle.dumps(schema)), schema)
+        self.assertTrue(issubclass(schema, NanoAODSchema))
+
+    def test_pruning_time(self):
+        manifest = trace(JetProcessor(), self.tiny, self.metadata)
+        chunksize = 50_000
+        with uproot.open(self.large) as f:
+            nEvents, nBranches = f['Events'].num_entries, len(f['Events'].keys())
+        nChunks = -(-nEvents // chunksize)
+        print(f'\n{self.large}: {nEvents} events, {nBranches} branches, {nChunks} chunks of {chunksize}')
+        requested = {}
+        for name, schema in [('full', NanoAODSchema), ('pruned', pruned_schema(manifest))]:
+            build, process, requested[name] = 0, 0, 0
+            for start in range(0, nEvents, chunksize):
+                # a new file for each chunk, as in the coffea runner
+                with uproot.open(self.large) as f:
+                    opened = f.file.source.num_requested_bytes
+                    t0 = time.perf_counter()
+                    events = _events(f, schema, entry_start=start, entry_stop=start + chunksize)
+                    t1 = time.perf_counter()
+                    JetProcessor().process(events)
+                    t2 = time.perf_counter()
+                    requested[name] += f.file.source.num_requested_bytes - opened
+                build += t1 - t0
+                process += t2 - t1
+            print(f'  {name:6} = {(build + process) / nChunks:.3f}s per chunk '
+                  f'(form {build / nChunks:.3f}s, process {process / nChunks:.3f}s), '
+                  f'{requested[name] / nChunks:,.0f} bytes read per chunk')
+        self.assertLessEqual(requested['pruned'], requested['full'])
+
+
+def _events(file, schema, **kwargs):
+    from coffea.nanoevents import NanoEventsFactory
+    return NanoEventsFactory.from_root(file, schemaclass=schema, metadata={'dataset': 'test'}, **kwargs).events()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import sys
+import os
+import json
+import signal
+import subprocess
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+import uproot
+from coffea import processor
+from coffea.nanoevents import NanoAODSchema
+
+from analysis.helpers.checkpoint import Checkpoint, config_hash, friend_files, shards
+from base_class.hist import Collection, Fill
+
+
+#
+# python analysis/tests/checkpoint_test.py
+#
+
+CHUNKSIZE = 1_000
+# fixed, the module of the processor is __main__ in the test and not in the killed job
+CONFIG = 'weighted_jets'
+
+
+class WeightedJets(processor.ProcessorABC):
+    """Float weighted sums, so the output depends on the order of the accumulation."""
+
+    def __init__(self, log=None, kill_after=None):
+        self.log = log
+        self.kill_after = kill_after
+
+    def process(self, events):
+        if self.log is not None:
+            with open(self.log, 'a') as f:
+                f.write(f"{events.metadata['filename']} {events.metadata['entrystart']}\n")
+            with open(self.log) as f:
+                if self.kill_after is not None and len(f.readlines()) > self.kill_after:
+                    os.kill(os.getpid(), signal.SIGKILL)
+
+        dataset = events.metadata['dataset']
+        events['weight'] = np.exp(-ak.sum(events.Jet.pt, axis=1) / 500)
+        hist = Collection(process=[dataset])
+        fill = Fill(process=dataset, weight='weight')
+        fill += hist.add('jet_pt', (100, 0, 300, ('Jet.pt', 'pt')))
+        fill += hist.add('jet_eta', (50, -3, 3, ('Jet.eta', 'eta')))
+        fill.fill(events, hist)
+        return hist.output | {'sumw': {dataset: float(ak.sum(events.weight))}, 'nEvent': {dataset: len(events)}}
+
+    def postprocess(self, accumulator):
+        pass
+
+
+def run(fileset, checkpoint=None, **kwargs):
+    processor_instance = WeightedJets(**kwargs)
+    if checkpoint is not None:
+        processor_instance = Checkpoint(processor_instance, checkpoint, CONFIG)
+    return processor.run_uproot_job(
+        fileset,
+        treename='Events',
+        processor_instance=processor_instance,
+        executor=processor.iterative_executor,
+        executor_args={'schema': NanoAODSchema},
+        chunksize=CHUNKSIZE,
+    )
+
+
+def make_file(path, n, seed):
+    rng = np.random.default_rng(seed)
+    nJet = rng.poisson(6, n)
+    jets = {f: ak.unflatten(v.astype(np.float32), nJet) for f, v in
+            [('pt', rng.exponential(50, nJet.sum()) + 20), ('eta', rng.normal(0, 1.5, nJet.sum())),
+             ('phi', rng.uniform(-3, 3, nJet.sum())), ('mass', rng.uniform(5, 20, nJet.sum()))]}
+    with uproot.recreate(path) as f:
+        f['Events'] = {'run': np.ones(n, dtype=np.uint32), 'event': np.arange(n, dtype=np.uint64), 'Jet': ak.zip(jets)}
+
+
+class CheckpointTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fileset = {}
+        for i, dataset in enumerate(['first', 'second']):
+            path = os.path.join(self.tmpdir.name, f'{dataset}.root')
+            make_file(path, 5_500, seed=i)
+            self.fileset[dataset] = {'files': [path]}
+        self.nChunks = 2 * 6
+        self.clean = run(self.fileset)
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _assert_identical(self, output):
+        self.assertEqual(output['sumw'], self.clean['sumw'])
+        self.assertEqual(output['nEvent'], self.clean['nEvent'])
+        self.assertEqual(set(output['hists']), set(self.clean['hists']))
+        for name, h in self.clean['hists'].items():
+            self.assertEqual(np.ascontiguousarray(output['hists'][name].view(flow=True)).tobytes(),
+                             np.ascontiguousarray(h.view(flow=True)).tobytes())
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.tmpdir.name, 'resume')
+        log = os.path.join(self.tmpdir.name, 'resume.log')
+        killed = subprocess.run([sys.executable, '-c',
+                                 'import sys, json; from analysis.tests.checkpoint_test import run; '
+                                 'run(json.loads(sys.argv[1]), sys.argv[2], log=sys.argv[3], kill_after=5)',
+                                 json.dumps(self.fileset), checkpoint, log])
+        self.assertEqual(killed.returncode, -signal.SIGKILL)
+        self.assertEqual(len(shards(checkpoint, CONFIG)), 5)
+
+        os.remove(log)
+        output = run(self.fileset, checkpoint, log=log)
+        with open(log) as f:
+            self.assertEqual(len(f.readlines()), self.nChunks - 5)
+        self.assertEqual(len(shards(checkpoint, CONFIG)), self.nChunks)
+        self._assert_identical(output)
+
+        # everything is done
+        os.remove(log)
+        output = run(self.fileset, checkpoint, log=log)
+        self.assertFalse(os.path.exists(log))
+        self._assert_identical(output)
+
+    def test_shard_inputs(self):
+        directory = os.path.join(self.tmpdir.name, 'friends')
+        os.makedirs(directory)
+        checkpoint = Checkpoint(WeightedJets(), self.tmpdir.name, CONFIG, friends=friend_files)
+        metadata = {'dataset': 'first', 'filename': os.path.join(directory, 'picoAOD.root'), 'treename': 'Events',
+                    'fileuuid': 'uuid', 'entrystart': 0, 'entrystop': CHUNKSIZE, 'xs': 1.0, 'trigger': ['HLT_PFHT1050']}
+        shard = checkpoint.shard(metadata)
+        self.assertNotEqual(shard, checkpoint.shard(metadata | {'xs': 2.0}))
+        self.assertNotEqual(shard, checkpoint.shard(metadata | {'trigger': ['HLT_PFHT1050', 'HLT_QuadPFJet']}))
+
+        # new and regenerated friend files
+        make_file(os.path.join(directory, 'FvT.root'), 10, seed=0)
+        with_friend = checkpoint.shard(metadata)
+        self.assertNotEqual(shard, with_friend)
+        make_file(os.path.join(directory, 'FvT.root'), 10, seed=0)
+        self.assertNotEqual(with_friend, checkpoint.shard(metadata))
+
+    def test_config_hash(self):
+        self.assertEqual(config_hash(WeightedJets, {'a': 1, 'b': [1, 2]}), config_hash(WeightedJets, {'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(config_hash(WeightedJets, {'a': 1}), config_hash(WeightedJets, {'a': 2}))
+        self.assertNotEqual(config_hash(WeightedJets, {}), config_hash(Checkpoint, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
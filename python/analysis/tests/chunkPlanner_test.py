@@ -0,0 +1,142 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+import uproot
+
+from analysis.helpers.chunkPlanner import load_plan, measure, parse_memory, plan_chunksizes, round_chunksize, run_planned, save_plan
+
+
+#
+# python analysis/tests/chunkPlanner_test.py
+#
+
+class PairingProcessor:
+    """All 4-jet combinations, memory grows quickly with the jet multiplicity."""
+
+    def process(self, events):
+        quadjets = ak.combinations(events.Jet, 4)
+        j0, j1, j2, j3 = ak.unzip(quadjets)
+        return {'sum': ak.sum(j0.pt + j1.pt + j2.pt + j3.pt)}
+
+
+class WarmUpProcessor(PairingProcessor):
+    """Loads a 50 MB model and waits 0.5 s on the first call, like the JIT and the correction registry."""
+
+    def process(self, events):
+        if not hasattr(self, 'model'):
+            self.model = np.ones(50_000_000 // 8)
+            time.sleep(0.5)
+        return super().process(events)
+
+
+class OutputProcessor(PairingProcessor):
+    """Writes a friend tree for each call if make_classifier_input is set, like processor_HH4b."""
+
+    def __init__(self, make_classifier_input=None):
+        self.make_classifier_input = make_classifier_input
+
+    def process(self, events):
+        if self.make_classifier_input is not None:
+            path = os.path.join(self.make_classifier_input, f'friend_{len(os.listdir(self.make_classifier_input))}.root')
+            with uproot.recreate(path) as f:
+                f['Events'] = {'event': ak.to_numpy(events.event)}
+        return super().process(events)
+
+
+def make_dataset(path, n, mean_jets, seed=0):
+    rng = np.random.default_rng(seed)
+    nJet = np.clip(rng.poisson(mean_jets, n), 4, None)
+    jets = {f: ak.unflatten(rng.normal(50, 20, nJet.sum()).astype(np.float32), nJet) for f in ['pt', 'eta', 'phi', 'mass']}
+    with uproot.recreate(path) as f:
+        f['Events'] = {'run': np.ones(n, dtype=np.uint32), 'event': np.arange(n, dtype=np.uint64), 'Jet': ak.zip(jets)}
+
+
+class ChunkPlannerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fileset = {}
+        for name, mean_jets in [('low', 4), ('medium', 8), ('high', 16)]:
+            path = os.path.join(self.tmpdir.name, f'{name}.root')
+            make_dataset(path, 1_000, mean_jets)
+            self.fileset[name] = {'files': [path], 'metadata': {'year': 'UL18'}}
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_memory(self):
+        self.assertEqual(parse_memory('4GB'), 4_000_000_000)
+        self.assertEqual(parse_memory('512MiB'), 512 * 2**20)
+        self.assertEqual(parse_memory(1000), 1000)
+        with self.assertRaises(ValueError):
+            parse_memory('4 parsecs')
+
+    def test_round(self):
+        self.assertEqual(round_chunksize(34_567, 1_000, 100_000), 20_000)
+        self.assertEqual(round_chunksize(34_999, 1_000, 100_000), 20_000)
+        self.assertEqual(round_chunksize(10, 1_000, 100_000), 1_000)
+        self.assertEqual(round_chunksize(1e9, 1_000, 100_000), 100_000)
+
+    def test_plan(self):
+        plan = plan_chunksizes(self.fileset, PairingProcessor(), memory='200MB', max_chunksize=1_000_000, min_chunksize=100)
+        self.assertGreater(plan['low']['chunksize'], plan['high']['chunksize'])
+        self.assertGreaterEqual(plan['medium']['chunksize'], plan['high']['chunksize'])
+        for p in plan.values():
+            self.assertGreater(p['bytes_per_event'], 0)
+            self.assertGreater(p['seconds_per_event'], 0)
+            self.assertLessEqual(p['chunksize'], max((200e6 - p['fixed_bytes']) / p['bytes_per_event'], 100))
+
+        path = os.path.join(self.tmpdir.name, 'plan.yml')
+        save_plan(path, plan)
+        self.assertEqual(load_plan(path), plan)
+
+    def test_fixed_memory(self):
+        files = self.fileset['high']
+        bytes_per_event, _, fixed_bytes = measure(WarmUpProcessor(), files['files'][0], files['metadata'] | {'dataset': 'high'})
+        # the 50 MB model is kept by the worker
+        self.assertGreater(fixed_bytes, 40e6)
+        # a budget below the fixed memory gives the smallest chunk size
+        plan = plan_chunksizes({'high': files}, WarmUpProcessor(), memory=fixed_bytes / 2, max_chunksize=1_000_000, min_chunksize=100)
+        self.assertEqual(plan['high']['chunksize'], 100)
+        plan = plan_chunksizes({'high': files}, WarmUpProcessor(), memory=fixed_bytes + 1_000 * bytes_per_event, max_chunksize=1_000_000, min_chunksize=100)
+        self.assertLessEqual(plan['high']['chunksize'], 2_000)
+
+    def test_one_time_cost(self):
+        files = self.fileset['low']
+        bytes_per_event, seconds_per_event, _ = measure(WarmUpProcessor(), files['files'][0], files['metadata'] | {'dataset': 'low'})
+        # the one-time cost alone would be 167 kB/event and 1.7 ms/event over 300 events
+        self.assertLess(bytes_per_event, 50e6 / 300 / 10)
+        self.assertLess(seconds_per_event, 0.5 / 300 / 10)
+
+    def test_no_output(self):
+        output = os.path.join(self.tmpdir.name, 'friends')
+        os.makedirs(output)
+        processor_instance = OutputProcessor(make_classifier_input=output)
+        plan_chunksizes({'low': self.fileset['low']}, processor_instance, memory='200MB', max_chunksize=1_000_000, min_chunksize=100)
+        self.assertEqual(os.listdir(output), [])
+        self.assertEqual(processor_instance.make_classifier_input, output)
+
+    def test_run_planned(self):
+        plan = {'low': {'chunksize': 500}, 'high': {'chunksize': 100}}
+        calls = []
+
+        def run(fileset, chunksize):
+            calls.append((sorted(fileset), chunksize))
+            return {'nEvent': {k: 1 for k in fileset}}, {'chunks': len(fileset)}
+
+        output, metrics = run_planned(self.fileset, plan, run, default_chunksize=1_000)
+        self.assertEqual(calls, [(['high'], 100), (['low'], 500), (['medium'], 1_000)])
+        self.assertEqual(output['nEvent'], {'low': 1, 'medium': 1, 'high': 1})
+        self.assertEqual(metrics['chunks'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import yaml
+sys.path.insert(0, os.getcwd())
+
+from coffea.lumi_tools import LumiMask
+from analysis.helpers.correctionFunctions import btagSF_norm, cached_correction, lumi_mask, _registry
+from analysis.helpers.common import _build_jet_factory
+
+
+#
+# python analysis/tests/correction_registry_test.py
+#
+
+class CorrectionRegistryTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.nChunks = 100
+        corrections = yaml.safe_load(open('analysis/metadata/corrections.yml', 'r'))['UL18']
+        self.goldenJSON = corrections['goldenJSON']
+        self.juncWS = [corrections["JERC"][0].replace('STEP', istep)
+                       for istep in ['L1FastJet', 'L2Relative', 'L2L3Residual', 'L3Absolute']] + corrections["JERC"][1:]
+
+    def setUp(self):
+        _registry.clear()
+
+    def test_chunk_setup_once(self):
+        paths = [w.split()[-1] for w in self.juncWS]
+        masks = {id(lumi_mask(self.goldenJSON)) for _ in range(self.nChunks)}
+        factories = {id(cached_correction('jet_factory_isMC=True', paths, lambda: _build_jet_factory(self.juncWS, True)))
+                     for _ in range(self.nChunks)}
+        self.assertEqual(len(masks), 1)
+        self.assertEqual(len(factories), 1)
+        self.assertIsInstance(lumi_mask(self.goldenJSON), LumiMask)
+
+    def test_built_once(self):
+        builds = []
+        for _ in range(self.nChunks):
+            cached_correction('test', [self.goldenJSON], lambda: builds.append(1) or len(builds))
+        self.assertEqual(len(builds), 1)
+
+    def test_content_change(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            norm_file = os.path.join(tmpdir, 'btagSF_norm.pkl')
+            for i, norm in enumerate((0.9, 1.1)):
+                with open(norm_file, 'wb') as f:
+                    pickle.dump({'TTToHadronic': norm}, f)
+                os.utime(norm_file, ns=(i, i))
+                self.assertEqual(btagSF_norm('TTToHadronic', btagSF_norm_file=norm_file), norm)
+            self.assertEqual(btagSF_norm('TTToHadronic', btagSF_norm_file=os.path.join(tmpdir, 'missing.pkl')), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
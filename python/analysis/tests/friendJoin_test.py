@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+import uproot
+from coffea.nanoevents import NanoEventsFactory
+
+from analysis.helpers.FriendTreeSchema import FriendTreeSchema
+from analysis.processors.processor_HH4b import FvT_fields, SvB_fields, friend_branches, friend_collection, read_friends
+from base_class.root import Chunk, FriendJoin
+
+
+#
+# python analysis/tests/friendJoin_test.py
+#
+
+class FriendJoinTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.nEntries = 100_000
+        self.chunksize = 20_000
+        rng = np.random.default_rng(0)
+        self.event = rng.permutation(self.nEntries * 4)[:self.nEntries].astype(np.uint64)
+        self.picoAOD = os.path.join(self.tmpdir.name, 'picoAOD.root')
+        with uproot.recreate(self.picoAOD) as f:
+            f['Events'] = {'run': np.ones(self.nEntries, dtype=np.uint32), 'event': self.event}
+        self.friends = {}
+        for name in ['FvT', 'SvB', 'SvB_MA', 'FvT_3bDvTMix4bDvT_v0']:
+            self.friends[name] = os.path.join(self.tmpdir.name, f'{name}.root')
+            with uproot.recreate(self.friends[name]) as f:
+                f['Events'] = {f'{name}_event': self.event.astype(np.int64),
+                               name: rng.uniform(0, 1, self.nEntries),
+                               f'{name}_std': rng.uniform(0, 1, self.nEntries),
+                               f'{name}_q_1234': rng.uniform(0, 1, self.nEntries)}
+        self.target = Chunk(self.picoAOD, fetch=True)
+        self.chunks = [self.target.slice(start, min(start + self.chunksize, self.nEntries)) for start in range(0, self.nEntries, self.chunksize)]
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def setUp(self):
+        FriendJoin._hashes.clear()
+
+    def _join(self, chunk):
+        friends = FriendJoin(keys={'event': '{name}_event'})
+        for name, path in self.friends.items():
+            friends.add_file(name, chunk, path)
+        self.assertEqual(friends.check(chunk), [])
+        return {name: friend_collection(data, name) for name, data in friends.arrays(chunk).items()}
+
+    def _nanoevents(self, chunk):
+        event = NanoEventsFactory.from_root(self.picoAOD, entry_start=chunk.entry_start, entry_stop=chunk.entry_stop).events()
+        data = {}
+        for name, path in self.friends.items():
+            data[name] = getattr(NanoEventsFactory.from_root(path, entry_start=chunk.entry_start, entry_stop=chunk.entry_stop,
+                                                             schemaclass=FriendTreeSchema).events(), name)
+            self.assertTrue(ak.all(data[name].event == event.event))
+            for field in data[name].fields:  # materialize the lazy columns
+                ak.to_numpy(data[name][field])
+        return data
+
+    def test_equivalence(self):
+        for chunk in self.chunks[:2]:
+            expected = self._nanoevents(chunk)
+            joined = self._join(chunk)
+            for name in self.friends:
+                for field in ['event', name, 'std', 'q_1234']:
+                    self.assertTrue(np.array_equal(ak.to_numpy(joined[name][field]), ak.to_numpy(expected[name][field])))
+
+    def test_filter(self):
+        friends = FriendJoin()
+        for name in ['FvT', 'FvT_3bDvTMix4bDvT_v0']:
+            friends.add_file(name, self.chunks[0], self.friends[name])
+        read_branches = {'FvT': friend_branches('FvT', ['std', 'q_1234'], weight=True), 'FvT_3bDvTMix4bDvT_v0': friend_branches('FvT_3bDvTMix4bDvT_v0', [], weight=True)}
+        data = read_friends(friends, self.chunks[0], read_branches)
+        self.assertEqual(set(data['FvT'].fields), {'FvT', 'std', 'q_1234'})
+        self.assertEqual(set(data['FvT_3bDvTMix4bDvT_v0'].fields), {'FvT_3bDvTMix4bDvT_v0'})
+        # the test friend trees only have "std" and "q_1234"
+        with self.assertRaisesRegex(KeyError, 'FvT_pd4'):
+            read_friends(friends, self.chunks[0], {'FvT': friend_branches('FvT', FvT_fields(), weight=True)})
+
+    def test_fields(self):
+        self.assertEqual(FvT_fields(), {'std', 'pd4', 'pd3', 'pt4', 'pt3', 'pm4', 'pm3', 'pt', 'q_1234', 'q_1324', 'q_1423'})
+        self.assertEqual(FvT_fields(['pt', 'pm3', 'pm4'], quadJet=False), {'std', 'pd4', 'pd3', 'pt4', 'pt3'})
+        self.assertEqual(SvB_fields(), {'ps', 'ptt', 'pzz', 'pzh', 'phh', 'q_1234', 'q_1324', 'q_1423'})
+
+    def test_misaligned(self):
+        path = os.path.join(self.tmpdir.name, 'shuffled.root')
+        with uproot.recreate(path) as f:
+            f['Events'] = {'FvT_event': self.event[::-1].astype(np.int64), 'FvT': np.zeros(self.nEntries)}
+        friends = FriendJoin(keys={'event': '{name}_event'}).add_file('FvT', self.chunks[0], path)
+        self.assertEqual(friends.check(self.chunks[0]), ['FvT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
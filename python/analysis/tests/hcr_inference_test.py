@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import tempfile
+import glob
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import torch
+
+from analysis.helpers.networks import HCR, HCREnsemble
+from analysis.helpers.inference import HCRInference
+from analysis.helpers.correctionFunctions import _registry
+
+
+#
+# python analysis/tests/hcr_inference_test.py
+#
+
+def make_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    j = np.stack([rng.exponential(60, (n, 4)) + 40,
+                  rng.uniform(-2.5, 2.5, (n, 4)),
+                  rng.uniform(-np.pi, np.pi, (n, 4)),
+                  rng.uniform(5, 30, (n, 4))], axis=1)
+    nOther = rng.integers(0, 9, n)
+    present = np.arange(8)[np.newaxis, :] < nOther[:, np.newaxis]
+    o = np.stack([rng.exponential(40, (n, 8)) + 20,
+                  rng.uniform(-2.5, 2.5, (n, 8)),
+                  rng.uniform(-np.pi, np.pi, (n, 8)),
+                  rng.uniform(2, 20, (n, 8)),
+                  rng.integers(0, 2, (n, 8))], axis=1) * present[:, np.newaxis, :]
+    o[:, 4, :][~present] = -1
+    a = np.stack([np.full(n, 8), nOther + 4, rng.exponential(2, n), rng.exponential(2, n)], axis=1)
+    e = rng.integers(0, 1 << 30, n) % 3
+    return (torch.tensor(x, dtype=torch.float) for x in (j, o, a)), torch.tensor(e)
+
+
+class HCRInferenceTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.export_dir = os.path.join(self.tmpdir.name, 'export')
+        torch.manual_seed(0)
+        for architecture, useOthJets, name in [('HCR', '', 'SvB_HCR_8'), ('HCR_MA', 'attention', 'SvB_MA_HCR+attention_8')]:
+            for offset in range(3):
+                hcr = HCR(8, 8, ['year', 'nSelJets', 'xW', 'xbW'], useOthJets=useOthJets, device='cpu', nClasses=5, architecture=architecture)
+                torch.save({'model': hcr.state_dict()}, os.path.join(self.tmpdir.name, f'{name}_np753_seed0_lr0.01_epochs20_offset{offset}_epoch20.pkl'))
+        self.paths = {'SvB': os.path.join(self.tmpdir.name, 'SvB_HCR_8_*offset*_epoch20.pkl'),
+                      'SvB_MA': os.path.join(self.tmpdir.name, 'SvB_MA_HCR+attention_8_*offset*_epoch20.pkl')}
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def setUp(self):
+        _registry.clear()
+
+    def test_equivalence(self):
+        (j, o, a), e = make_inputs(5_000)
+        for classifier, path in self.paths.items():
+            c_expected, q_expected = HCREnsemble(path)(j, o, a, e)
+            for backend in ['eager', 'torchscript']:
+                for batch_size in [1024, 4999]:
+                    with self.subTest(classifier=classifier, backend=backend, batch_size=batch_size):
+                        c_logits, q_logits = HCRInference(path, backend=backend, batch_size=batch_size, export_dir=self.export_dir)(j, o, a, e)
+                        self.assertTrue(torch.allclose(c_logits, c_expected, atol=1e-4), 'c_logits mismatch')
+                        self.assertTrue(torch.allclose(q_logits, q_expected, atol=1e-4), 'q_logits mismatch')
+
+    def test_export_cache(self):
+        (j, o, a), e = make_inputs(100)
+        path = self.paths['SvB']
+        with tempfile.TemporaryDirectory() as export_dir:
+            HCRInference(path, export_dir=export_dir)(j, o, a, e)
+            exports = sorted(os.listdir(export_dir))
+            self.assertEqual(len(exports), 3)
+            self.assertFalse(any(export.endswith('.tmp') for export in exports))
+
+            # a rewritten checkpoint is exported again under a new key
+            checkpoint = sorted(glob.glob(path))[0]
+            os.utime(checkpoint, ns=(0, 0))
+            _registry.clear()
+            HCRInference(path, export_dir=export_dir)(j, o, a, e)
+            self.assertEqual(len(os.listdir(export_dir)), 4)
+
+    def test_offset_without_fold(self):
+        (j, o, a), e = make_inputs(1_000)
+        e[::7] = 3
+        path = self.paths['SvB']
+        c_expected, q_expected = HCREnsemble(path)(j, o, a, e)
+        c_logits, q_logits = HCRInference(path, backend='eager')(j, o, a, e)
+        self.assertTrue(torch.allclose(c_logits, c_expected, atol=1e-4))
+        self.assertTrue(torch.allclose(q_logits, q_expected, atol=1e-4))
+        self.assertTrue(torch.all(c_logits[::7] == 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+
+from analysis.helpers.jetCombinatoricModel import jetCombinatoricModel as JCMWeight
+from base_class.JCMTools import jetCombinatoricModel, getPseudoTagProbs, getCombinatoricWeight
+
+
+#
+# python analysis/tests/jetCombinatoricModel_test.py
+#
+
+def jcm_weight_loop(JCM, untagged_jets, event):
+    """Reference: the per-npt loop with ak.combinations."""
+    nEvent = len(untagged_jets)
+    maxPseudoTags = 12
+    nbt = 3
+    nlt = ak.to_numpy(ak.num(untagged_jets, axis=1))
+    nPseudoTagProb = np.zeros((maxPseudoTags+1, nEvent))
+    nPseudoTagProb[0] = JCM.t * (1-JCM.p)**nlt
+    for npt in range(1, maxPseudoTags+1):
+        nt = nbt + npt
+        nnt = nlt - npt
+        nnt[nnt < 0] = 0
+        ncr = ak.to_numpy(ak.num(ak.combinations(untagged_jets, npt)))
+        w_npt = JCM.t * ncr * JCM.p**npt * (1-JCM.p)**nnt
+        if (nt % 2) == 0:
+            w_npt *= 1 + JCM.e/nlt**JCM.d
+        nPseudoTagProb[npt] = w_npt
+    w = np.sum(nPseudoTagProb[1:], axis=0)
+    prob = JCM._rng.float(event)
+    r = prob*w + nPseudoTagProb[0]
+    r = r.reshape(1, nEvent).repeat(maxPseudoTags+1, 0)
+    c = np.array([nPseudoTagProb[:npt+1].sum(axis=0) for npt in range(maxPseudoTags+1)])
+    npt = (r > c).sum(axis=0)
+    return w, npt
+
+
+def bkgd_func_njet_loop(model, x, f, e, d, norm):
+    """Reference: the per-bin loops over getPseudoTagProbs."""
+    nj = x.astype(int)
+    nTags_pred = np.array(model.tt4b_nTagJets, float)
+    for ibin, this_nTag in enumerate(nj + 4):
+        for this_nj in range(this_nTag, 14):
+            nTags_pred[ibin + 4] += getPseudoTagProbs(this_nj, f, e, d, norm)[this_nTag - 3] * model.qcd3b[this_nj]
+    output = np.zeros(len(x))
+    output[0:4] = nTags_pred[4:8]
+    for this_nj in nj:
+        if this_nj < 4:
+            continue
+        output[this_nj] += getCombinatoricWeight(this_nj, f, e, d, norm) * model.qcd3b[this_nj]
+        output[this_nj] += model.tt4b[this_nj]
+    return output
+
+
+class JetCombinatoricModelTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.rng = np.random.default_rng(0)
+        self.nParameterSets = 20
+        self.parameters = [(self.rng.uniform(0.01, 0.2), self.rng.uniform(0, 3), self.rng.uniform(0.1, 5), self.rng.uniform(1, 1000))
+                           for _ in range(self.nParameterSets)]
+
+        nEvent = 10_000
+        nlt = self.rng.integers(1, 12, nEvent)
+        self.untagged_jets = ak.unflatten(ak.zip({'pt': self.rng.exponential(40, nlt.sum()) + 40}), nlt)
+        self.event = np.arange(nEvent, dtype=np.uint64)
+
+        x = np.arange(15, dtype=float)
+        self.x = x
+        self.model = jetCombinatoricModel(tt4b_nTagJets=self.rng.uniform(0, 100, 15), tt4b_nTagJets_errors=self.rng.uniform(1, 10, 15),
+                                          qcd3b=self.rng.uniform(100, 10000, 15), qcd3b_errors=self.rng.uniform(10, 100, 15),
+                                          tt4b=self.rng.uniform(0, 100, 15))
+
+    def test_weight(self):
+        JCM = JCMWeight('analysis/tests/jetCombinatoricModel_SB_Coffea_new.yml')
+        for JCM.p, JCM.e, JCM.d, JCM.t in self.parameters:
+            w, npt = JCM(self.untagged_jets, self.event)
+            w_ref, npt_ref = jcm_weight_loop(JCM, self.untagged_jets, self.event)
+            self.assertTrue(np.allclose(w, w_ref, rtol=1e-12), 'pseudoTagWeight mismatch')
+            self.assertTrue(np.all(npt == npt_ref), 'nJet_pseudotagged mismatch')
+
+    def test_bkgd_func_njet(self):
+        n = self.x.astype(int) + 4
+        for f, e, d, norm in self.parameters:
+            self.assertTrue(np.allclose(self.model.bkgd_func_njet(self.x, f, e, d, norm),
+                                        bkgd_func_njet_loop(self.model, self.x, f, e, d, norm), rtol=1e-10))
+            expected_errors = np.array(self.model.tt4b_nTagJets_errors, float)**2
+            for ibin, this_nTag in enumerate(n):
+                for this_nj in range(this_nTag, 14):
+                    expected_errors[ibin + 4] += (getPseudoTagProbs(this_nj, f, e, d, norm)[this_nTag - 3] * self.model.qcd3b_errors[this_nj])**2
+            self.assertTrue(np.allclose(self.model._nTagPred_errors([f, e, d, norm], n), expected_errors**0.5, rtol=1e-10))
+
+    def test_jacobian(self):
+        for par in self.parameters:
+            jacobian = self.model.bkgd_func_njet_jacobian(self.x, *par)
+            for i in range(4):
+                step = 1e-6 * max(abs(par[i]), 1)
+                up, down = list(par), list(par)
+                up[i] += step
+                down[i] -= step
+                numerical = (self.model.bkgd_func_njet(self.x, *up) - self.model.bkgd_func_njet(self.x, *down)) / (2 * step)
+                self.assertTrue(np.allclose(jacobian[:, i], numerical, rtol=1e-4, atol=1e-6), f'derivative {i} mismatch')
+
+
+if __name__ == '__main__':
+    unittest.main()
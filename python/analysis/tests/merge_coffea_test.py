@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+from coffea.util import load, save
+from hist.axis import StrCategory
+
+from analysis.helpers.hist_templates import FvTHists, QuadJetHists, SvBHists
+from analysis.merge_coffea_files import add_hist, tree_merge
+from base_class.hist import Collection, Template
+
+
+#
+# python analysis/tests/merge_coffea_test.py
+#
+
+PROCESSES = ['data', 'TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu', 'HH4b', 'ZZ4b', 'ZH4b']
+YEARS = ['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18']
+
+
+def make_output(seed):
+    """Histograms booked like processor_HH4b with the binning of the HH4b templates, a few random cells filled."""
+    rng = np.random.default_rng(seed)
+    hist = Collection(process=[PROCESSES[seed % len(PROCESSES)]],
+                      year=[YEARS[seed % len(YEARS)]],
+                      tag=[3, 4, 0],
+                      region=[2, 1, 0],
+                      passPreSel=...)
+    for prefix, template in [('SvB', SvBHists), ('SvB_MA', SvBHists), ('FvT', FvTHists), ('quadJet_selected', QuadJetHists)]:
+        for name, h in vars(template).items():
+            if isinstance(h, Template._Hist):
+                hist.add(f'{prefix}.{name}', *[axis for _, axis in h._axes])
+    output = hist.output
+    for h in output['hists'].values():
+        view = h.view(flow=True)
+        cells = rng.integers(0, view.size, 50)
+        view['value'].flat[cells] += rng.exponential(1, 50)
+        view['variance'].flat[cells] += rng.exponential(1, 50)
+    output['nEvent'] = {f'dataset{seed}': int(rng.integers(1000))}
+    return output
+
+
+def accumulate(files):
+    """Plain += of the histograms, union of the other entries."""
+    output = load(files[0])
+    for file in files[1:]:
+        other = load(file)
+        for name, h in other['hists'].items():
+            if name in output['hists']:
+                output['hists'][name] += h
+            else:
+                output['hists'][name] = h
+        for key in other.keys() - {'hists'}:
+            output[key] = output[key] | other[key]
+    return output
+
+
+class MergeCoffeaTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.nFiles = 64
+        self.files = []
+        for i in range(self.nFiles):
+            self.files.append(os.path.join(self.tmpdir.name, f'hists_{i}.coffea'))
+            save(make_output(i), self.files[-1])
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _assert_equal(self, a, b):
+        self.assertEqual(a['nEvent'], b['nEvent'])
+        self.assertEqual(a['categories'], b['categories'])
+        self.assertEqual(set(a['hists']), set(b['hists']))
+        for name in a['hists']:
+            x, y = a['hists'][name], b['hists'][name]
+            for axis in ('process', 'year'):
+                self.assertEqual(set(x.axes[axis]), set(y.axes[axis]))
+            # the categories of y in the order of x
+            index = np.ix_(*[np.array([ya.index(c) for c in xa]) if isinstance(xa, StrCategory) else np.arange(ya.extent)
+                             for xa, ya in zip(x.axes, y.axes)])
+            for field in ('value', 'variance'):
+                self.assertTrue(np.allclose(x.view(flow=True)[field], y.view(flow=True)[field][index]))
+
+    def test_add_hist(self):
+        a, b = make_output(0)['hists'], make_output(1)['hists']
+        for name in a:
+            expected = a[name].copy()
+            expected += b[name]
+            self.assertEqual(add_hist(a[name].copy(), b[name]), expected)
+            expected = a[name].copy()
+            expected += a[name]
+            self.assertEqual(add_hist(a[name].copy(), a[name]), expected)
+
+    def test_tree_merge(self):
+        expected = accumulate(self.files)
+        for workers, fan_in in [(1, 2), (4, 2), (4, 4)]:
+            with self.subTest(workers=workers, fan_in=fan_in):
+                merged = os.path.join(self.tmpdir.name, f'tree_{workers}_{fan_in}.coffea')
+                tree_merge(self.files, merged, workers=workers, fan_in=fan_in)
+                self._assert_equal(expected, load(merged))
+        self.assertTrue(all(os.path.exists(f) for f in self.files))
+
+if __name__ == '__main__':
+    unittest.main()
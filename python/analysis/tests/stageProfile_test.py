@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+from coffea import processor
+
+from analysis.helpers.stageProfile import NO_PROFILE, StageProfile, stage_profile
+
+
+#
+# python analysis/tests/stageProfile_test.py
+#
+
+def work(prof, n=200_000):
+    prof.start('allocate')
+    data = np.ones(n)
+    prof.start('compute')
+    with prof('sort'):
+        np.sort(np.random.default_rng(0).random(n))
+    total = float(np.sum(data * 2))
+    prof.stop()
+    return total
+
+
+class StageProfileTestCase(unittest.TestCase):
+
+    def test_stages(self):
+        prof = stage_profile(True, 'HH4b')
+        work(prof)
+        breakdown = prof.breakdown()
+        self.assertEqual(set(breakdown), {'allocate', 'compute', 'sort'})
+        for stage in breakdown.values():
+            self.assertEqual(stage['calls'], 1)
+            self.assertGreaterEqual(stage['wall'], 0)
+            self.assertGreaterEqual(stage['cpu'], 0)
+        # the nested stage is included in the outer one
+        self.assertGreaterEqual(breakdown['compute']['wall'], breakdown['sort']['wall'])
+
+    def test_accumulate(self):
+        outputs = []
+        for dataset in ['HH4b', 'HH4b', 'data']:
+            prof = StageProfile(dataset)
+            work(prof)
+            outputs.append({'profile': prof})
+        merged = processor.accumulate(outputs)['profile']
+        self.assertEqual(merged.breakdown()['sort']['calls'], 3)
+        by_dataset = merged.breakdown(by_dataset=True)
+        self.assertEqual(by_dataset['HH4b', 'sort']['calls'], 2)
+        self.assertEqual(by_dataset['data', 'sort']['calls'], 1)
+        table = merged.table()
+        self.assertEqual(len(table.splitlines()), 4)
+        self.assertEqual(len(merged.table(by_dataset=True).splitlines()), 7)
+
+    def test_disabled(self):
+        prof = stage_profile(False)
+        self.assertIs(prof, NO_PROFILE)
+        self.assertFalse(prof)
+        self.assertIs(prof('stage'), prof('other'))
+        self.assertEqual(work(prof), 400_000)
+        self.assertFalse(hasattr(prof, 'stages'))
+
+
+if __name__ == '__main__':
+    unittest.main()
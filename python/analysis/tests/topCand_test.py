@@ -12,7 +12,7 @@ import time
 
 import os
 sys.path.insert(0, os.getcwd())
-from analysis.helpers.topCandReconstruction import find_tops, find_tops_slow, buildTop
+from analysis.helpers.topCandReconstruction import find_tops, find_tops_slow, find_tops_no_numba, buildTop, find_best_tops
 
 
 class topCandRecoTestCase(unittest.TestCase):
@@ -141,6 +141,46 @@ class topCandRecoTestCase(unittest.TestCase):
         self.assertTrue(xW_allClose, "xW Arrays are not close enough")
         self.assertTrue(xbW_allClose, "xbW Arrays are not close enough")
 
+    def _assert_same_tops(self, best_top_cands, expected, msg):
+        self.assertTrue(ak.all(ak.num(best_top_cands) == ak.num(expected)), f"number of candidates differ ({msg})")
+        for jet in ["b", "j", "l"]:
+            for field in ["pt", "eta", "phi"]:
+                self.assertTrue(ak.all(ak.flatten(best_top_cands[jet][field]) == ak.flatten(expected[jet][field])), f"{jet} jets differ ({msg})")
+        for field in ["xW", "xbW"]:
+            self.assertTrue(np.array_equal(ak.to_numpy(ak.flatten(best_top_cands[field])), ak.to_numpy(ak.flatten(expected[field])), equal_nan=True), f"{field} differs ({msg})")
+
+    def test_bestTopCand(self):
+
+        for find in [find_tops, find_tops_slow]:
+            rec_top_cands = buildTop(self.input_jets, find(self.input_jets))
+            for k in [1, 3]:
+                self._assert_same_tops(find_best_tops(self.input_jets, k=k), rec_top_cands[:, :k], f"k={k}, {find.__name__}")
+
+    def test_bestTopCand_float32(self):
+
+        # NanoAOD jets are float32, the xW and xbW must be the same bit by bit to select the same candidates
+        rng = np.random.default_rng(0)
+        for nJet in [4, 6, 9]:
+            n = 5_000 * nJet
+            jets = ak.unflatten(ak.zip(
+                {
+                    "pt": rng.exponential(60, n) + 40,
+                    "eta": rng.uniform(-2.4, 2.4, n),
+                    "phi": rng.uniform(-np.pi, np.pi, n),
+                    "mass": rng.uniform(5, 30, n),
+                    "btagDeepFlavB": rng.random(n),
+                    "bRegCorr": rng.normal(1.05, 0.05, n),
+                },
+                with_name="PtEtaPhiMLorentzVector",
+                behavior=vector.behavior,
+            ), nJet)
+            jets = ak.zip({field: ak.values_astype(jets[field], np.float32) for field in jets.fields},
+                          with_name="PtEtaPhiMLorentzVector", behavior=vector.behavior)
+            jets = jets[ak.argsort(jets.btagDeepFlavB, axis=1, ascending=False)]
+            rec_top_cands = buildTop(jets, find_tops(jets))
+            for k in [1, 3]:
+                self._assert_same_tops(find_best_tops(jets, k=k), rec_top_cands[:, :k], f"nJet={nJet}, k={k}")
+
 
 if __name__ == '__main__':
     wrapper.parse_args()
@@ -0,0 +1,59 @@
+import argparse
+import importlib
+import logging
+import os
+import sys
+
+import uproot
+import yaml
+
+sys.path.insert(0, os.getcwd())
+from analysis.helpers.branchManifest import check_complete, save_manifest, trace
+
+#
+# Record the branches read by a processor into a manifest that runner.py uses to prune the input columns.
+#
+#   python analysis/trace_branches.py -p analysis/processors/processor_HH4b.py -c analysis/metadata/HH4b.yml \
+#       -i picoAOD.root -e event_metadata.yml -o analysis/metadata/branches_HH4b.yml
+#
+
+
+def make_tiny_file(source, path, entries, treename='Events'):
+    """Copy the first entries of source into a small local file to trace on."""
+    with uproot.open(source) as f:
+        data = f[treename].arrays(entry_stop=entries, library='np')
+    with uproot.recreate(path) as f:
+        f[treename] = data
+    return path
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Trace the branches read by a processor', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-p', '--processor', dest='processor', default='analysis/processors/processor_HH4b.py', help='Processor file.')
+    parser.add_argument('-c', '--configs', dest='configs', default='analysis/metadata/HH4b.yml', help='Config file.')
+    parser.add_argument('-i', '--input', dest='input', required=True, help='Input file to trace on.')
+    parser.add_argument('-e', '--event-metadata', dest='event_metadata', required=True, help='Yml file with the event metadata (dataset, year, processName, ...).')
+    parser.add_argument('-n', '--entries', dest='entries', type=int, default=1_000, help='Number of entries to run on.')
+    parser.add_argument('-o', '--output', dest='output', default='branches.yml', help='Output manifest.')
+    parser.add_argument('--tiny', dest='tiny', default=None, help='If given, copy the first entries of the input to this file first.')
+    parser.add_argument('--debug', dest='debug', action='store_true', default=False)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    configs = yaml.safe_load(open(args.configs, 'r'))
+    config_runner = configs.get('runner', {})
+    metadata = yaml.safe_load(open(args.event_metadata, 'r'))
+    processorName = args.processor.split('.')[0].replace('/', '.')
+    analysis = getattr(importlib.import_module(processorName), config_runner.get('class_name', 'analysis'))
+
+    file = args.input
+    if args.tiny:
+        file = make_tiny_file(args.input, args.tiny, args.entries)
+    metadata |= {'filename': file, 'entrystart': 0, 'entrystop': args.entries}
+
+    branches = trace(analysis(**configs['config']), file, metadata, entry_stop=args.entries)
+    # rerun with and without the pruned schema to make sure the manifest is complete
+    check_complete(analysis(**configs['config']), file, metadata, branches, entry_stop=args.entries)
+    save_manifest(args.output, branches, processor=args.processor, configs=args.configs)
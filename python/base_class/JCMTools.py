@@ -78,17 +78,25 @@ class jetCombinatoricModel:
         #  Fix the normalizaiton to the threeTightTagFraction
         #
         self.bkgd_func_njet_constrained = lambda x, f, e, d, debug=False: self.bkgd_func_njet(x, f, e, d, value, debug)
+        self.bkgd_func_njet_constrained_jacobian = lambda x, f, e, d: self.bkgd_func_njet_jacobian(x, f, e, d, value)[:, 0:3]
+
+    def _nTagPred_indices(self, n):
+        #
+        #  bin ibin + 4 holds the events with n[ibin] tags, which get pseudo-tags from qcd3b events with n[ibin] to 13 jets
+        #
+        n = np.asarray(n, int)
+        ibin = np.arange(len(n))
+        valid = (n >= 4) & (n < 14) & (ibin + 4 < len(self.tt4b_nTagJets))
+        return ibin[valid] + 4, n[valid] - 3
 
     def _nTagPred_values(self, par, n):
-        output = np.zeros(len(n))
-        output = copy(self.tt4b_nTagJets)
+        output = np.array(self.tt4b_nTagJets, float)
 
-        for ibin, this_nTag in enumerate(n):
-            for nj in range(this_nTag, 14):
-                nPseudoTagProb = getPseudoTagProbs(nj, par[0], par[1], par[2], par[3])
-                output[ibin + 4] += nPseudoTagProb[this_nTag - 3] * self.qcd3b[nj]
+        nPseudoTagProb = getPseudoTagProbTable(np.arange(4, 14), *par)
+        obins, npt = self._nTagPred_indices(n)
+        output[obins] += (np.asarray(self.qcd3b[4:14]) @ nPseudoTagProb)[npt]
 
-        return np.array(output, float)
+        return output
 
     def nTagPred_values(self, n):
         return self._nTagPred_values(self.fit_parameters + [self.threeTightTagFraction.fix], n)
@@ -97,53 +105,66 @@ class jetCombinatoricModel:
         return self.bkgd_func_njet_constrained(n, *self.fit_parameters)
 
     def getCombinatoricWeightList(self):
-        output_weights = []
-        for nj in range(4, 16):
-            output_weights.append(getCombinatoricWeight(nj, *(self.fit_parameters + [self.threeTightTagFraction.fix])))
-        return output_weights
+        nPseudoTagProb = getPseudoTagProbTable(np.arange(4, 16), *(self.fit_parameters + [self.threeTightTagFraction.fix]))
+        return nPseudoTagProb[:, 1:].sum(axis=1).tolist()
     
     def _nTagPred_errors(self, par, n):
-        output = np.zeros(len(n))
-        output = self.tt4b_nTagJets_errors**2
+        output = np.array(self.tt4b_nTagJets_errors, float)**2
 
-        for ibin, this_nTag in enumerate(n):
-            for nj in range(this_nTag, 14):
-                nPseudoTagProb = getPseudoTagProbs(nj, par[0], par[1], par[2], par[3])
-                output[ibin + 4] += (nPseudoTagProb[this_nTag - 3] * self.qcd3b_errors[nj])**2
+        nPseudoTagProb = getPseudoTagProbTable(np.arange(4, 14), *par)
+        obins, npt = self._nTagPred_indices(n)
+        output[obins] += (np.asarray(self.qcd3b_errors[4:14])**2 @ nPseudoTagProb**2)[npt]
 
         output = output**0.5
-        return np.array(output, float)
+        return output
 
     def nTagPred_errors(self, n):
         return self._nTagPred_errors(self.fit_parameters + [self.threeTightTagFraction.fix], n)
 
+    def _bkgd_func_njet(self, nj, nPseudoTagProb, constant=True):
+        #
+        #  The prediction is linear in the pseudo-tag probabilities, nPseudoTagProb[nj, npt] for nj in 0..max(nj).
+        #  With constant=False only the linear term is returned, which gives the jacobian when passing the derivatives.
+        #
+        output = np.zeros(len(nj))
+
+        nTag_pred = np.array(self.tt4b_nTagJets, float) if constant else np.zeros(len(self.tt4b_nTagJets))
+        obins, npt = self._nTagPred_indices(nj + 4)
+        nTag_pred[obins] += (np.asarray(self.qcd3b[4:14]) @ nPseudoTagProb[4:14])[npt]
+        output[0:4] = nTag_pred[4:8]
+
+        njets = nj[nj >= 4]
+        output[njets] += nPseudoTagProb[njets, 1:].sum(axis=1) * np.asarray(self.qcd3b)[njets]
+        if constant:
+            output[njets] += np.asarray(self.tt4b)[njets]
+
+        return output
+
     def bkgd_func_njet(self, x, f, e, d, norm, debug=False):
         nj = x.astype(int)
-        output = np.zeros(len(x))
-
-        nTags = nj + 4
-        nTags_pred_result = self._nTagPred_values([f, e, d, norm], nTags)
-        output[0:4] = nTags_pred_result[4:8]
+        nPseudoTagProb = getPseudoTagProbTable(np.arange(max(14, nj.max() + 1)), f, e, d, norm)
+        output = self._bkgd_func_njet(nj, nPseudoTagProb)
         if debug:
             print(f"output is {output}")
 
-        for ibin, this_nj in enumerate(nj):
-            if this_nj < 4:
-                continue
-
-            w = getCombinatoricWeight(this_nj, f, e, d, norm)
-            output[this_nj] += w * self.qcd3b[this_nj]
-            output[this_nj] += self.tt4b[this_nj]
-
         return output
 
+    def bkgd_func_njet_jacobian(self, x, f, e, d, norm):
+        """
+        Derivatives of :meth:`bkgd_func_njet` with respect to ``(f, e, d, norm)``, shape ``(len(x), 4)``.
+        """
+        nj = x.astype(int)
+        _, derivatives = getPseudoTagProbTable(np.arange(max(14, nj.max() + 1)), f, e, d, norm, jacobian=True)
+        return np.stack([self._bkgd_func_njet(nj, derivative, constant=False) for derivative in derivatives], axis=1)
+
     def fit(self, bin_centers, bin_values, bin_errors):
 
         #
         # Do the fit
         #
         popt, errs = curve_fit(self.bkgd_func_njet_constrained, bin_centers, bin_values, self.default_parameters, sigma=bin_errors,
-                               bounds=(self.parameters_lower_bounds, self.parameters_upper_bounds)
+                               bounds=(self.parameters_lower_bounds, self.parameters_upper_bounds),
+                               jac=self.bkgd_func_njet_constrained_jacobian,
                                )
 
         self.fit_errs = errs
@@ -189,6 +210,41 @@ def getPseudoTagProbs(nj, f, e=0.0, d=1.0, norm=1.0):
     return nPseudoTagProb
 
 
+def getPseudoTagProbTable(nj, f, e=0.0, d=1.0, norm=1.0, jacobian=False):
+    """
+    Vectorized :func:`getPseudoTagProbs` for an array of jet multiplicities.
+
+    Returns the table ``nPseudoTagProb[i, npt]`` for ``nj[i]`` jets, zero where ``npt`` exceeds the number of light jets
+    or ``nj[i] < 4``. With ``jacobian=True`` the derivatives with respect to ``(f, e, d, norm)`` are also returned,
+    stacked along the first axis.
+    """
+    nbt = 3    # number of required bTags
+    nlt = np.asarray(nj, float)[:, np.newaxis] - nbt    # number of selected untagged jets ("light" jets)
+    nlt[nlt < 1] = -1    # no pseudoTags without light jets
+    npt = np.arange(int(max(nlt.max(), 0)) + 1)[np.newaxis, :]    # number of pseudoTags
+    nnt = np.maximum(nlt - npt, 0)    # number of not tagged
+
+    ncr = comb(nlt, npt)    # zero if npt > nlt
+    pair = (ncr > 0) & ((nbt + npt) % 2 == 0)
+    safe_nlt = np.where(pair, nlt, 1)
+    enhancement_scale = np.where(pair, safe_nlt**-d, 0)
+    enhancement = 1 + e * enhancement_scale
+
+    base = ncr * f**npt * (1 - f)**nnt
+    nPseudoTagProb = norm * base * enhancement
+    if not jacobian:
+        return nPseudoTagProb
+
+    dbase_df = ncr * (npt * f**np.maximum(npt - 1, 0) * (1 - f)**nnt - nnt * f**npt * (1 - f)**np.maximum(nnt - 1, 0))
+    derivatives = np.stack([
+        norm * dbase_df * enhancement,
+        norm * base * enhancement_scale,
+        -norm * base * e * enhancement_scale * np.log(safe_nlt),
+        base * enhancement,
+    ])
+    return nPseudoTagProb, derivatives
+
+
 def getCombinatoricWeight(nj, f, e=0.0, d=1.0, norm=1.0):
     nPseudoTagProb = getPseudoTagProbs(nj, f, e, d, norm)
     return np.sum(nPseudoTagProb[1:])
@@ -151,78 +151,86 @@ class Fill:
                     mask_categories.append(category)
                 else:
                     fill_args[category] = _default_field(category)
-        for category_args in hists._generate_category_combinations(mask_categories):
-            mask = and_fields(
-                events, *(_default_field(f'{k}.{v}') for k, v in category_args.items()))
-            masked = events if mask is None else events[mask]
-            if len(masked) == 0:
-                continue
-            for k, v in fill_args.items():
-                if (isinstance(v, str) and k in hists._categories) or isinstance(v, (bool, RealNumber)):
-                    category_args[k] = v
-                elif check_type(v, FieldLike):
-                    category_args[k] = get_field(masked, v)
-                elif check_type(v, AnyArray):
-                    category_args[k] = v if mask is None else v[mask]
-                elif check_type(v, Callable):
-                    category_args[k] = v(masked)
-                else:
-                    raise FillError(f'cannot fill "{k}" with "{v}"')
-            jagged_args = {}
-            counts_args = []
-            for k, v in category_args.items():
-                if isinstance(v, ak.Array):
-                    try:
-                        category_args[k] = ak.flatten(v)
-                        count = ak.num(v)
-                        for i, c in enumerate(counts_args):
-                            if ak.all(c == count):
-                                jagged_args[k] = i
-                        if k not in jagged_args:
-                            jagged_args[k] = len(counts_args)
-                            counts_args.append(count)
-                    except:
-                        continue
-            for name in self._fills:
-                fills = {
-                    k: f'{name}:{k}' if f'{name}:{k}' in category_args else k for k in self._fills[name]}
-                shape = {jagged_args[k]
-                         for k in fills.values() if k in jagged_args}
-                if len(shape) == 0:
-                    shape = None
-                elif len(shape) == 1:
-                    shape = counts_args[next(iter(shape))]
-                else:
-                    raise FillError(
-                        f'cannot fill hist "{name}" with unmatched jagged arrays {jagged_args}')
-                hist_args = {}
-                for k, v in fills.items():
-                    fill = category_args[v]
-                    if shape is not None:
-                        if v not in jagged_args and check_type(fill, AnyArray):
-                            fill = np.repeat(fill, shape)
-                    hist_args[k] = fill
-                # https://github.com/scikit-hep/boost-histogram/issues/452 #
-                if all([check_type(axis, StrCategory) for axis in hists._hists[name].axes]):
-                    try:
-                        weight = hist_args['weight']
-                        if len(weight) > 0:
-                            broadcasted = False
-                            tobroadcast = None
-                            for k, v in hist_args.items():
-                                if k != 'weight':
-                                    if check_type(v, AnyArray) and len(v) == len(weight):
-                                        broadcasted = True
-                                        break
-                                    else:
-                                        tobroadcast = k
-                            if not broadcasted and tobroadcast is not None:
-                                hist_args[tobroadcast] = np.full(
-                                    len(weight), hist_args[tobroadcast])
-                    except:
-                        continue
-                ############################################################
-                hists._hists[name].fill(**hist_args, threads=self.threads)
+        # encode the category combination of each event in one pass
+        index, category_args = hists._category_index(events, mask_categories)
+        if index is not None:
+            if len(index) == 0:
+                return
+        elif len(events) == 0:
+            return
+        for k, v in fill_args.items():
+            if (isinstance(v, str) and k in hists._categories) or isinstance(v, (bool, RealNumber)):
+                category_args[k] = v
+            elif check_type(v, FieldLike):
+                category_args[k] = get_field(events, v)
+            elif check_type(v, AnyArray):
+                category_args[k] = v
+            elif check_type(v, Callable):
+                category_args[k] = v(events)
+            else:
+                raise FillError(f'cannot fill "{k}" with "{v}"')
+            if index is not None and k not in mask_categories and check_type(category_args[k], AnyArray):
+                category_args[k] = category_args[k][index]
+        jagged_args = {}
+        counts_args = []
+        for k, v in category_args.items():
+            if isinstance(v, ak.Array):
+                try:
+                    category_args[k] = ak.flatten(v)
+                    count = ak.num(v)
+                    for i, c in enumerate(counts_args):
+                        if ak.all(c == count):
+                            jagged_args[k] = i
+                    if k not in jagged_args:
+                        jagged_args[k] = len(counts_args)
+                        counts_args.append(count)
+                except:
+                    continue
+        # broadcast each flat array at most once per jagged shape
+        broadcasted_args = {}
+        for name in self._fills:
+            fills = {
+                k: f'{name}:{k}' if f'{name}:{k}' in category_args else k for k in self._fills[name]}
+            shape = {jagged_args[k]
+                     for k in fills.values() if k in jagged_args}
+            if len(shape) == 0:
+                shape = None
+            elif len(shape) == 1:
+                shape = next(iter(shape))
+            else:
+                raise FillError(
+                    f'cannot fill hist "{name}" with unmatched jagged arrays {jagged_args}')
+            hist_args = {}
+            for k, v in fills.items():
+                fill = category_args[v]
+                if shape is not None:
+                    if v not in jagged_args and check_type(fill, AnyArray):
+                        if (v, shape) not in broadcasted_args:
+                            broadcasted_args[(v, shape)] = np.repeat(
+                                fill, counts_args[shape])
+                        fill = broadcasted_args[(v, shape)]
+                hist_args[k] = fill
+            # https://github.com/scikit-hep/boost-histogram/issues/452 #
+            if all([check_type(axis, StrCategory) for axis in hists._hists[name].axes]):
+                try:
+                    weight = hist_args['weight']
+                    if len(weight) > 0:
+                        broadcasted = False
+                        tobroadcast = None
+                        for k, v in hist_args.items():
+                            if k != 'weight':
+                                if check_type(v, AnyArray) and len(v) == len(weight):
+                                    broadcasted = True
+                                    break
+                                else:
+                                    tobroadcast = k
+                        if not broadcasted and tobroadcast is not None:
+                            hist_args[tobroadcast] = np.full(
+                                len(weight), hist_args[tobroadcast])
+                except:
+                    continue
+            ############################################################
+            hists._hists[name].fill(**hist_args, threads=self.threads)
 
 
 class Collection:
@@ -245,13 +253,30 @@ class Collection:
                                                *axes, storage='weight', label='Events')
         return self.auto_fill(name, **fill_args)
 
-    def _generate_category_combinations(self, categories: list[str]) -> list[dict[str, str]]:
+    def _category_index(self, events: ak.Array, categories: list[str]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
         if len(categories) == 0:
-            return [{}]
-        else:
-            combs = np.stack(np.meshgrid(
-                *(self._categories[category] for category in categories)), axis=-1).reshape((-1, len(categories)))
-            return [dict(zip(categories, comb)) for comb in combs]
+            return None, {}
+        n = len(events)
+        index, values = None, []
+        for category in categories:
+            mask = np.stack([
+                ak.to_numpy(get_field(events, _default_field(f'{category}.{value}')))
+                for value in self._categories[category]], axis=-1).astype(bool)
+            event, value = np.nonzero(mask)
+            if index is None:
+                index, values = event, [value]
+                continue
+            # join the (event, cell) pairs on event, the memory scales with the filled cells instead of n x all cells
+            counts = np.bincount(event, minlength=n)
+            starts = np.cumsum(counts) - counts
+            repeat = counts[index]
+            offsets = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+            value = value[np.repeat(starts[index], repeat) + offsets]
+            index = np.repeat(index, repeat)
+            values = [np.repeat(v, repeat) for v in values] + [value]
+        return index, {
+            category: np.asarray(self._categories[category])[value]
+            for category, value in zip(categories, values)}
 
     def auto_fill(self, name: str, **fill_args: FillLike):
         default_args = {k: _default_field(
@@ -0,0 +1,270 @@
+"""
+A columnar store for the output of the processors.
+
+Each histogram is saved as one chunked HDF5 dataset holding the storage view with flow bins. The chunks are one bin wide along the category axes, so a category subset only reads its own chunks. The axes and categories of all histograms are kept in a JSON index stored in the root attributes. The metadata of the histograms and axes and the remaining entries of the output are pickled.
+
+.. note::
+    :mod:`h5py` is only required when a store is written or read.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import pickle
+from collections.abc import MutableMapping
+from typing import Any, Iterable
+
+import boost_histogram as bh
+import numpy as np
+from hist import Hist
+from hist.axis import (AxesMixin, Boolean, IntCategory, Integer, Regular,
+                       StrCategory, Variable)
+
+from .hist import HistError
+
+_VERSION = 2
+_HISTS = 'hists'
+_EXTRAS = 'extras'
+_METADATA = 'metadata'
+_CATEGORY = (StrCategory, IntCategory, Boolean)
+
+
+def _traits(axis: AxesMixin) -> dict[str, bool]:
+    traits = axis.traits
+    return {'underflow': traits.underflow, 'overflow': traits.overflow, 'growth': traits.growth, 'circular': traits.circular}
+
+
+def _metadata(obj: Hist | AxesMixin) -> dict[str, Any]:
+    return {k: v for k, v in obj.__dict__.items() if not k.startswith('_')}
+
+
+def _axis_to_json(axis: AxesMixin) -> dict[str, Any]:
+    data = {'name': axis.name, 'label': axis.label}
+    if isinstance(axis, Boolean):
+        data['type'] = 'Boolean'
+    elif isinstance(axis, StrCategory):
+        data |= {'type': 'StrCategory', 'categories': [*axis], 'growth': axis.traits.growth, 'overflow': axis.traits.overflow}
+    elif isinstance(axis, IntCategory):
+        data |= {'type': 'IntCategory', 'categories': [int(c) for c in axis], 'growth': axis.traits.growth, 'overflow': axis.traits.overflow}
+    elif isinstance(axis, Integer):
+        data |= {'type': 'Integer', 'start': int(axis.edges[0]), 'stop': int(axis.edges[-1])} | _traits(axis)
+    elif isinstance(axis, Regular) and axis.transform is None:
+        data |= {'type': 'Regular', 'bins': axis.size, 'start': float(axis.edges[0]), 'stop': float(axis.edges[-1])} | _traits(axis)
+    elif isinstance(axis, Variable):
+        data |= {'type': 'Variable', 'edges': axis.edges.tolist()} | _traits(axis)
+    else:
+        raise HistError(f'cannot store axis "{axis.name}" of type {type(axis).__name__}')
+    return data
+
+
+def _axis_from_json(data: dict[str, Any], metadata: dict[str, Any], categories: list = None) -> AxesMixin:
+    metadata = {'name': data['name'], 'label': data['label'], '__dict__': copy.deepcopy(metadata)}
+    kind = data['type']
+    if kind == 'Boolean':
+        return Boolean(**metadata)
+    if kind in ('StrCategory', 'IntCategory'):
+        cls = StrCategory if kind == 'StrCategory' else IntCategory
+        return cls(data['categories'] if categories is None else categories, **metadata, growth=data['growth'], overflow=data['overflow'])
+    traits = {k: data[k] for k in ('underflow', 'overflow', 'growth', 'circular')}
+    if kind == 'Integer':
+        return Integer(data['start'], data['stop'], **metadata, **traits)
+    if kind == 'Regular':
+        return Regular(data['bins'], data['start'], data['stop'], **metadata, **traits)
+    if kind == 'Variable':
+        return Variable(data['edges'], **metadata, **traits)
+    raise HistError(f'unknown axis type "{kind}"')
+
+
+def _categories(data: dict[str, Any]) -> list:
+    if data['type'] == 'Boolean':
+        return [False, True]
+    return data.get('categories')
+
+
+def _chunks(hist: Hist, shape: tuple[int, ...]):
+    if 0 in shape or len(shape) == 0:
+        return None
+    return tuple(1 if isinstance(axis, _CATEGORY) else n for axis, n in zip(hist.axes, shape))
+
+
+def save(output: dict[str, Any], path: str, compression: str = 'gzip'):
+    """
+    Save the output of a processor to a store.
+
+    Parameters
+    ----------
+    output : dict
+        Output with histograms under ``output['hists']``.
+    path : str
+        Path to the HDF5 file.
+    compression : str, optional, default='gzip'
+        Compression filter of :mod:`h5py`. All filters are lossless.
+    """
+    import h5py
+
+    index = {'version': _VERSION, 'hists': {}}
+    metadata = {}
+    with h5py.File(path, 'w') as file:
+        group = file.create_group(_HISTS)
+        for i, (name, hist) in enumerate(output.get(_HISTS, {}).items()):
+            view = np.asarray(hist.view(flow=True))
+            dataset = str(i)
+            group.create_dataset(
+                dataset, data=view, chunks=_chunks(hist, view.shape),
+                compression=compression if view.size else None, shuffle=bool(view.size))
+            index['hists'][name] = {
+                'dataset': dataset,
+                'storage': hist.storage_type.__name__,
+                'name': hist.name,
+                'label': hist.label,
+                'shape': view.shape,
+                'axes': [_axis_to_json(axis) for axis in hist.axes],
+            }
+            metadata[name] = {'hist': _metadata(hist), 'axes': [_metadata(axis) for axis in hist.axes]}
+        extras = {k: v for k, v in output.items() if k != _HISTS}
+        file.create_dataset(_EXTRAS, data=np.frombuffer(pickle.dumps(extras), dtype=np.uint8))
+        file.create_dataset(_METADATA, data=np.frombuffer(pickle.dumps(metadata), dtype=np.uint8))
+        file.attrs['index'] = json.dumps(index)
+
+
+class HistStore:
+    """
+    Read histograms from a store created by :func:`save`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the HDF5 file.
+    """
+
+    def __init__(self, path: str):
+        import h5py
+
+        self.path = path
+        with h5py.File(path, 'r') as file:
+            self.index: dict[str, Any] = json.loads(file.attrs['index'])
+            if self.index['version'] != _VERSION:
+                raise HistError(f'unsupported store version {self.index["version"]}')
+            self.metadata: dict[str, dict[str, Any]] = pickle.loads(file[_METADATA][()].tobytes())
+
+    def keys(self):
+        return self.index['hists'].keys()
+
+    def axes(self, name: str) -> list[dict[str, Any]]:
+        """Axes of histogram ``name`` from the index."""
+        return self.index['hists'][name]['axes']
+
+    def get(self, name: str, **selection: Any | Iterable[Any]) -> Hist:
+        """
+        Read histogram ``name``.
+
+        Parameters
+        ----------
+        name : str
+            Name of the histogram.
+        **selection : Any or Iterable[Any]
+            Categories to read for each category or boolean axis. The other categories are not read. The selected axes keep the given categories in the given order and the overflow bin, as when the histogram is indexed by a list of categories.
+
+        Returns
+        -------
+        Hist
+            Histogram with the selected categories.
+        """
+        import h5py
+
+        meta = self.index['hists'][name]
+        metadata = self.metadata[name]
+        unknown = set(selection) - {axis['name'] for axis in meta['axes']}
+        if unknown:
+            raise HistError(f'hist "{name}" does not have axes {unknown}')
+        bounds, picks, axes = [], [], []
+        for axis, axis_metadata in zip(meta['axes'], metadata['axes']):
+            if axis['name'] not in selection:
+                bounds.append(slice(None))
+                picks.append(slice(None))
+                axes.append(_axis_from_json(axis, axis_metadata))
+                continue
+            categories = _categories(axis)
+            if categories is None:
+                raise HistError(f'cannot select on axis "{axis["name"]}" of type {axis["type"]}')
+            values = selection[axis['name']]
+            if isinstance(values, (str, bool, int, np.integer)):
+                values = [values]
+            try:
+                indices = [categories.index(value) for value in values]
+            except ValueError:
+                raise HistError(f'axis "{axis["name"]}" of hist "{name}" does not have all of {values}')
+            if axis.get('overflow'):
+                # the overflow bin follows the categories and is kept
+                indices.append(len(categories))
+            start = min(indices)
+            bounds.append(slice(start, max(indices) + 1))
+            picks.append(np.asarray(indices) - start)
+            if axis['type'] == 'Boolean':
+                # boolean axes always have both bins, the unselected one is left empty
+                axes.append(_axis_from_json(axis, axis_metadata))
+            else:
+                axes.append(_axis_from_json(axis, axis_metadata, [*values]))
+        with h5py.File(self.path, 'r') as file:
+            view = file[_HISTS][meta['dataset']][tuple(bounds)]
+        for dim, (pick, axis) in enumerate(zip(picks, meta['axes'])):
+            if isinstance(pick, slice):
+                continue
+            view = np.take(view, pick, axis=dim)
+            if axis['type'] == 'Boolean':
+                full = np.zeros(view.shape[:dim] + (2,) + view.shape[dim + 1:], dtype=view.dtype)
+                index = [slice(None)] * view.ndim
+                index[dim] = pick + bounds[dim].start
+                full[tuple(index)] = view
+                view = full
+        hist = Hist(*axes, storage=getattr(bh.storage, meta['storage'])())
+        hist.__dict__.update(copy.deepcopy(metadata['hist']))
+        target = np.asarray(hist.view(flow=True))
+        if target.shape != view.shape:
+            raise HistError(f'cannot restore hist "{name}", expected shape {target.shape} but got {view.shape}')
+        target[...] = view
+        return hist
+
+    def __getitem__(self, name: str) -> Hist:
+        return self.get(name)
+
+    def extras(self) -> dict[str, Any]:
+        """All entries of the output except the histograms."""
+        import h5py
+
+        with h5py.File(self.path, 'r') as file:
+            return pickle.loads(file[_EXTRAS][()].tobytes())
+
+    def output(self) -> dict[str, Any]:
+        """The output in the same layout as the ``.coffea`` file. The histograms are read on first access."""
+        return {_HISTS: LazyHists(self)} | self.extras()
+
+
+class LazyHists(MutableMapping):
+    """A mapping of histograms in a :class:`HistStore`, each read on first access and kept afterwards. Assigned and deleted histograms only change the mapping, the store is never written."""
+
+    def __init__(self, store: HistStore):
+        self._store = store
+        self._names = dict.fromkeys(store.keys())
+        self._cache: dict[str, Hist] = {}
+
+    def __getitem__(self, name: str) -> Hist:
+        if name not in self._names:
+            raise KeyError(name)
+        if name not in self._cache:
+            self._cache[name] = self._store.get(name)
+        return self._cache[name]
+
+    def __setitem__(self, name: str, hist: Hist):
+        self._names[name] = None
+        self._cache[name] = hist
+
+    def __delitem__(self, name: str):
+        del self._names[name]
+        self._cache.pop(name, None)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
@@ -163,6 +163,22 @@ class Template:
                 templates[name] = attr
         return hists, templates
 
+    @classmethod
+    def fields(cls, skip: Iterable[str] = None) -> set[str]:
+        """
+        Top level fields filled by the histograms, not including nested templates, callable fill arguments and the histograms matched by ``skip``.
+        """
+        skip = compile_any_wholeword(skip)
+        fields = set()
+        for name, hist in cls.hists()[0].items():
+            if match_single(skip, name):
+                continue
+            for label, _ in hist._axes:
+                field = hist.fill_args.get(label.code, label.code)
+                if check_type(field, FieldLike):
+                    fields.add(astuple(field)[0].split('.')[0])
+        return fields
+
     def __add__(self, other: _h.Fill | Template) -> _h.Fill:
         if isinstance(other, Template):
             other = other.new()
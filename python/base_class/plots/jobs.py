@@ -0,0 +1,218 @@
+"""
+Plan, project and render the plots of ``makePlots.py`` in parallel.
+
+- :func:`plan_jobs` lists every :func:`~base_class.plots.plots.makePlot` and :func:`~base_class.plots.plots.make2DPlot` call as a plain dict.
+- :func:`project` reduces each histogram once to the year and cut of the jobs, so the jobs only slice small histograms.
+- :func:`run_jobs` renders the jobs over a process pool with the ``Agg`` backend and skips the jobs whose content hash is unchanged since the last run.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from . import plots
+
+_CACHE = '.plot_cache.json'
+_LIBRARIES = ('matplotlib', 'mplhep', 'hist', 'numpy')
+
+
+def plan_jobs(varList: list[str], plotModifiers: dict, plotConfig: dict, outputFolder: str = None, doTest: bool = False) -> list[dict[str, Any]]:
+    """
+    All the plots made by ``makePlots.py``.
+
+    Returns
+    -------
+    list[dict]
+        Jobs with the plot ``kind`` (``"1d"`` or ``"2d"``), the ``var``, the ``process`` of the 2D plots and the ``kwargs`` of the plot function.
+    """
+    if doTest:
+        varList = ["SvB_MA.ps_zz", "SvB_MA.ps_zh", "SvB_MA.ps_hh", "quadJet_selected.lead_vs_subl_m", "quadJet_min_dr.close_vs_other_m"]
+
+    def _modifiers(v):
+        return plotModifiers.get(v, {}) | {"ylabel": "Entries", "doRatio": plotConfig.get("doRatio", True), "legend": True}
+
+    jobs = []
+    for v in varList:
+        vDict = _modifiers(v)
+        for region in ["SR", "SB"]:
+            kwargs = {"var": v, "cut": "passPreSel", "region": region, "outputFolder": outputFolder} | vDict
+            if vDict.get("2d", False):
+                for process in ["data", "Multijet", "HH4b", "TTToHadronic"]:
+                    jobs.append({"kind": "2d", "var": v, "process": process, "kwargs": kwargs})
+            else:
+                jobs.append({"kind": "1d", "var": v, "kwargs": kwargs})
+
+    if doTest:
+        for v in ["v4j.mass", "SvB_MA.ps", "quadJet_selected.xHH"]:
+            vDict = _modifiers(v)
+            for process in ["data", "Multijet", "HH4b", "TTToHadronic"]:
+                for region in ["SR", "SB"]:
+                    kwargs = {"var": v, "cut": ["passPreSel", "failSvB", "passSvB"], "region": region,
+                              "outputFolder": outputFolder, "process": process, "norm": True} | vDict
+                    jobs.append({"kind": "1d", "var": v, "kwargs": kwargs})
+                kwargs = {"var": v, "cut": "passPreSel", "region": ["SR", "SB"], "process": process,
+                          "outputFolder": outputFolder} | vDict
+                jobs.append({"kind": "1d", "var": v, "kwargs": kwargs})
+    return jobs
+
+
+def _years(config) -> set:
+    years = set()
+    if isinstance(config, dict):
+        for k, v in config.items():
+            if k == "year":
+                years.add(v)
+            else:
+                years |= _years(v)
+    return years
+
+
+def _cut(job):
+    cut = job["kwargs"].get("cut", "passPreSel")
+    return cut if isinstance(cut, str) else None
+
+
+def project(hists: dict, jobs: list[dict], cutList: list[str], plotConfig: dict) -> dict[tuple[str, str], Any]:
+    """
+    Project the histograms needed by the jobs.
+
+    When all processes use the same year, the year axis is reduced once per histogram. Each cut used by a job is then projected out of the remaining boolean axes. The jobs comparing several cuts keep the boolean axes.
+
+    Returns
+    -------
+    dict
+        Projected histogram for each ``(var, cut)``, ``cut`` is ``None`` for the jobs comparing several cuts.
+    """
+    years = _years(plotConfig)
+    year = None
+    if len(years) == 1:
+        year = years.pop()
+        year = sum if year == "RunII" else year
+
+    cuts = defaultdict(set)
+    for job in jobs:
+        cuts[job["var"]].add(_cut(job))
+
+    projected = {}
+    for var, var_cuts in cuts.items():
+        h = hists["hists"][var]
+        if year is not None and "year" in h.axes.name:
+            h = h[{"year": year}]
+        for cut in var_cuts:
+            projected[var, cut] = h if cut is None else plots._select(h, plots.get_cut_dict(cut, cutList))
+    return projected
+
+
+def _hash(job, h, cutList, plotConfig, version):
+    content = hashlib.sha256()
+    content.update(json.dumps([job, cutList, plotConfig], default=str).encode())
+    content.update(version)
+    content.update(str(h.axes).encode())
+    content.update(np.ascontiguousarray(h.view(flow=True)).tobytes())
+    return content.hexdigest()
+
+
+def _version() -> bytes:
+    """The code making the plots: this module, :mod:`~base_class.plots.plots` and the versions of the plotting libraries. The plot modifiers are part of each job."""
+    from importlib.metadata import version
+
+    content = hashlib.sha256()
+    for module in (plots.__file__, __file__):
+        with open(module, "rb") as f:
+            content.update(f.read())
+    content.update(json.dumps({library: version(library) for library in _LIBRARIES}).encode())
+    return content.digest()
+
+
+def _key(job):
+    return json.dumps(job, sort_keys=True, default=str)
+
+
+def _init_worker():
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+
+
+def render(job: dict, hists: dict, cutList: list[str], plotConfig: dict) -> list[str]:
+    """Make the plot of ``job`` and return the saved files."""
+    import matplotlib.pyplot as plt
+
+    plots.saved_files.clear()
+    try:
+        if job["kind"] == "2d":
+            fig, _ = plots.make2DPlot(hists, job["process"], cutList, plotConfig, **job["kwargs"])
+        else:
+            fig, _ = plots.makePlot(hists, cutList, plotConfig, **job["kwargs"])
+        plt.close(fig)
+        return [*plots.saved_files]
+    finally:
+        plots.saved_files.clear()
+
+
+def run_jobs(jobs: list[dict], hists: dict, cutList: list[str], plotConfig: dict, workers: int = 1, cache: str = None) -> dict[str, Any]:
+    """
+    Render the jobs.
+
+    Parameters
+    ----------
+    jobs : list[dict]
+        Jobs from :func:`plan_jobs`.
+    hists : dict
+        Output with histograms under ``hists['hists']``.
+    workers : int, optional, default=1
+        Number of processes. With one worker, the jobs are rendered in this process.
+    cache : str, optional
+        Folder of the cache. The jobs with unchanged histograms, options, plotting code and plotting libraries are skipped if their files exist.
+
+    Returns
+    -------
+    dict
+        Number of ``rendered`` and ``skipped`` jobs and the ``project`` and ``render`` time in seconds.
+    """
+    start = time.perf_counter()
+    projected = project(hists, jobs, cutList, plotConfig)
+    report = {"project": time.perf_counter() - start}
+
+    start = time.perf_counter()
+    cached = {}
+    cache_file = None
+    if cache is not None:
+        cache_file = os.path.join(cache, _CACHE)
+        if os.path.exists(cache_file):
+            with open(cache_file) as f:
+                cached = json.load(f)
+    version = _version()
+
+    todo = []
+    for job in jobs:
+        h = projected[job["var"], _cut(job)]
+        key, content = _key(job), _hash(job, h, cutList, plotConfig, version)
+        entry = cached.get(key)
+        if entry is not None and entry["hash"] == content and entry["files"] and all(os.path.exists(f) for f in entry["files"]):
+            continue
+        todo.append((key, content, job, {"hists": {job["var"]: h}}))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(render, job, h, cutList, plotConfig) for _, _, job, h in todo]
+            files = [future.result() for future in futures]
+    else:
+        _init_worker()
+        files = [render(job, h, cutList, plotConfig) for _, _, job, h in todo]
+
+    for (key, content, _, _), saved in zip(todo, files):
+        cached[key] = {"hash": content, "files": saved}
+    if cache_file is not None:
+        os.makedirs(cache, exist_ok=True)
+        with open(cache_file, "w") as f:
+            json.dump(cached, f)
+
+    report |= {"render": time.perf_counter() - start, "rendered": len(todo), "skipped": len(jobs) - len(todo)}
+    return report
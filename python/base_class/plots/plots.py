@@ -64,6 +64,12 @@ def get_values_centers_from_dict(input_dict, hist_index, hists, stack_dict):
     print("ERROR: ratio needs to be of type 'hists' or 'stack'")
 
 
+#
+#  Paths of all the figures saved by this process
+#
+saved_files = []
+
+
 def _savefig(fig, var, *args):
     outputPath = "/".join(args)
 
@@ -71,10 +77,18 @@ def _savefig(fig, var, *args):
         os.makedirs(outputPath)
 
     varStr = var if type(var) == str else "_vs_".join(var)
-    fig.savefig(outputPath + "/" + varStr.replace(".", '_') + ".pdf")
+    fileName = outputPath + "/" + varStr.replace(".", '_') + ".pdf"
+    fig.savefig(fileName)
+    saved_files.append(fileName)
     return
 
 
+def _select(h, selection):
+    """ h[selection], skipping the axes already projected out of h
+    """
+    return h[{k: v for k, v in selection.items() if k in h.axes.name}]
+
+
 def get_cut_dict(cut, cutList):
     cutDict = {}
     for c in cutList:
@@ -432,7 +446,7 @@ def _makeHistsFromList(input_hist_File, cutList, plotConfig, var, cut, region, p
             this_cut_dict = get_cut_dict(_cut, cutList)
             this_hist_dict = process_dict | tag_dict | region_dict | year_dict | var_dict | this_cut_dict
 
-            this_hist = input_hist_File['hists'][var][this_hist_dict]
+            this_hist = _select(input_hist_File['hists'][var], this_hist_dict)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
             hists.append(this_hist)
@@ -457,7 +471,7 @@ def _makeHistsFromList(input_hist_File, cutList, plotConfig, var, cut, region, p
 
             this_hist_dict = process_dict | tag_dict | this_region_dict | year_dict | var_dict | cut_dict
 
-            this_hist = input_hist_File['hists'][var][this_hist_dict]
+            this_hist = _select(input_hist_File['hists'][var], this_hist_dict)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
             hists.append(this_hist)
@@ -483,7 +497,7 @@ def _makeHistsFromList(input_hist_File, cutList, plotConfig, var, cut, region, p
                 hist_labels.append(label + " file" + str(iF + 1))
             hist_types. append("errorbar")
 
-            this_hist = input_hist_File[iF]['hists'][var][this_hist_dict]
+            this_hist = _select(input_hist_File[iF]['hists'][var], this_hist_dict)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
             hists.append(this_hist)
@@ -512,7 +526,7 @@ def _makeHistsFromList(input_hist_File, cutList, plotConfig, var, cut, region, p
 
             this_hist_dict = this_process_dict | this_tag_dict | region_dict | year_dict | var_dict | cut_dict
 
-            this_hist = input_hist_File['hists'][var][this_hist_dict]
+            this_hist = _select(input_hist_File['hists'][var], this_hist_dict)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
             hists.append(this_hist)
@@ -540,7 +554,7 @@ def _makeHistsFromList(input_hist_File, cutList, plotConfig, var, cut, region, p
 
             this_hist_dict = process_dict | tag_dict | region_dict | year_dict | this_var_dict | cut_dict
 
-            this_hist = input_hist_File['hists'][_var][this_hist_dict]
+            this_hist = _select(input_hist_File['hists'][_var], this_hist_dict)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
             hists.append(this_hist)
@@ -679,7 +693,7 @@ def makePlot(hists, cutList, plotConfig, var='selJets.pt',
         # Catch list vs hist
         #  Shape give (nregion, nBins)
         #
-        this_hist = h[this_hist_dict]
+        this_hist = _select(h, this_hist_dict)
         if len(this_hist.shape) == 2:
             this_hist = this_hist[sum,:]
 
@@ -736,7 +750,7 @@ def makePlot(hists, cutList, plotConfig, var='selJets.pt',
             # Catch list vs hist
             #  Shape give (nregion, nBins)
             #
-            this_hist = h[this_hist_opts]
+            this_hist = _select(h, this_hist_opts)
             if len(this_hist.shape) == 2:
                 this_hist = this_hist[sum,:]
 
@@ -761,7 +775,7 @@ def makePlot(hists, cutList, plotConfig, var='selJets.pt',
                 # Catch list vs hist
                 #  Shape give (nregion, nBins)
                 #
-                this_hist = h[this_hist_opts]
+                this_hist = _select(h, this_hist_opts)
                 if len(this_hist.shape) == 2:
                     this_hist = this_hist[sum,:]
 
@@ -889,7 +903,7 @@ def make2DPlot(hists, process, cutList, plotConfig, var='selJets.pt',
 
 
     hist_dict = hist_dict | cut_dict
-    _hist = h[hist_dict]
+    _hist = _select(h, hist_dict)
 
 
     if len(_hist.shape) == 3:  ## for 2D plots
@@ -939,6 +953,10 @@ def parse_args():
 
     parser.add_argument('--doTest', action="store_true", help='Metadata file.')
     parser.add_argument('--debug', action="store_true", help='')
+    parser.add_argument('-j', '--workers', dest="workers", type=int, default=1,
+                        help='Number of processes used to make the plots.')
+    parser.add_argument('--noCache', action="store_true",
+                        help='Remake the plots even if their inputs did not change.')
 
     args = parser.parse_args()
     return args
@@ -947,6 +965,11 @@ def parse_args():
 def load_hists(input_hists):
     hists = []
     for _inFile in input_hists:
+        if _inFile.endswith('.h5'):
+            # histograms are only read when accessed
+            from base_class.hist.store import HistStore
+            hists.append(HistStore(_inFile).output())
+            continue
         with open(_inFile, 'rb') as hfile:
             hists.append(load(hfile))
 
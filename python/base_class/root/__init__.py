@@ -7,10 +7,12 @@ High-level tools for ROOT file I/O built on top of :mod:`uproot`.
 from .chain import Chain, Friend
 from .chunk import Chunk
 from .io import TreeReader, TreeWriter
+from .join import FriendJoin
 
 __all__ = [
     'Chunk',
     'Friend',
+    'FriendJoin',
     'Chain',
     'TreeReader',
     'TreeWriter',
@@ -0,0 +1,199 @@
+"""
+A process-wide LRU cache of open ROOT files and :class:`TTree` metadata.
+
+Entries are keyed by path plus ``(mtime, size)`` for local files, so a file rewritten in place will never be served from a stale handle. Remote files can not be cheaply stat-ed and are keyed by path only, so :meth:`~.chunk.Chunk.integrity` always evicts the path before reloading and :class:`~.io.TreeWriter` evicts the output path after writing.
+
+The cache is guarded by a lock and can be shared by threads. After :func:`os.fork`, the child process drops all inherited entries without closing them, so :class:`~concurrent.futures.ProcessPoolExecutor` workers always start with an empty cache.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Generator, NamedTuple
+from uuid import UUID
+
+from ..system.eos import EOS, PathLike
+
+if TYPE_CHECKING:
+    import uproot
+
+
+class TreeMetadata(NamedTuple):
+    branches: frozenset[str]
+    num_entries: int
+    uuid: UUID
+
+
+class _Handle:
+    def __init__(self, file: uproot.ReadOnlyDirectory):
+        self.file = file
+        self.refs = 0
+        self.evicted = False
+
+    def close(self):
+        self.file.file.close()
+
+
+class _FileCache:
+    maxsize: int = 128
+    '''int : Maximum number of open files. Set to ``0`` to disable caching.'''
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        self._files: OrderedDict[tuple, _Handle] = OrderedDict()
+        self._metadata: OrderedDict[tuple, TreeMetadata] = OrderedDict()
+        self.opens = 0
+        self.hits = 0
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    @classmethod
+    def _key(cls, path: EOS):
+        if path.is_local:
+            try:
+                stat = os.stat(path.path)
+                return str(path), stat.st_mtime_ns, stat.st_size
+            except OSError:
+                pass
+        return str(path), None, None
+
+    def _evict(self, key: tuple):
+        handle = self._files.pop(key, None)
+        if handle is not None:
+            handle.evicted = True
+            if handle.refs == 0:
+                handle.close()
+
+    @contextmanager
+    def open(self, path: PathLike, **options) -> Generator[uproot.ReadOnlyDirectory, None, None]:
+        """
+        Open ``path`` with :func:`uproot.open` or reuse a cached handle.
+
+        Parameters
+        ----------
+        path : PathLike
+            Path to ROOT file.
+        **options : dict, optional
+            Additional options passed to :func:`uproot.open`.
+
+        Yields
+        ------
+        ~uproot.reading.ReadOnlyDirectory
+            The root directory of the file. It will not be closed on exit unless evicted.
+        """
+        import uproot
+
+        path = EOS(path)
+        if self.maxsize <= 0:
+            with uproot.open(path, **options) as file:
+                with self._lock:
+                    self.opens += 1
+                yield file
+            return
+        key = (*self._key(path), tuple(sorted(options.items())))
+        with self._lock:
+            self._check_pid()
+            handle = self._files.get(key)
+            if handle is not None:
+                self._files.move_to_end(key)
+                self.hits += 1
+            else:
+                handle = _Handle(uproot.open(path, **options))
+                self.opens += 1
+                self._files[key] = handle
+                while len(self._files) > self.maxsize:
+                    self._evict(next(iter(self._files)))
+            handle.refs += 1
+        try:
+            yield handle.file
+        finally:
+            with self._lock:
+                handle.refs -= 1
+                if handle.evicted and handle.refs == 0:
+                    handle.close()
+
+    def metadata(self, path: PathLike, name: str, **options) -> TreeMetadata:
+        """
+        Fetch the branches, number of entries and UUID of a :class:`TTree`.
+
+        Parameters
+        ----------
+        path : PathLike
+            Path to ROOT file.
+        name : str
+            Name of :class:`TTree`.
+        **options : dict, optional
+            Additional options passed to :func:`uproot.open`.
+
+        Returns
+        -------
+        TreeMetadata
+            Metadata of the :class:`TTree`.
+        """
+        path = EOS(path)
+        key = (*self._key(path), name)
+        with self._lock:
+            self._check_pid()
+            metadata = self._metadata.get(key)
+            if metadata is not None:
+                self._metadata.move_to_end(key)
+                self.hits += 1
+                return metadata
+            # the metadata does not depend on the options, reuse any open handle
+            for cached in reversed(self._files):
+                if cached[:3] == key[:3]:
+                    options = dict(cached[3])
+                    break
+        with self.open(path, **options) as file:
+            tree = file[name]
+            metadata = TreeMetadata(
+                frozenset(tree.keys()), tree.num_entries, file.file.uuid)
+        with self._lock:
+            self._metadata[key] = metadata
+            while len(self._metadata) > max(self.maxsize, 1) * 8:
+                self._metadata.popitem(last=False)
+        return metadata
+
+    def evict(self, path: PathLike):
+        """
+        Close and remove all cached entries of ``path``.
+
+        Parameters
+        ----------
+        path : PathLike
+            Path to ROOT file.
+        """
+        path = str(EOS(path))
+        with self._lock:
+            self._check_pid()
+            for key in [k for k in self._files if k[0] == path]:
+                self._evict(key)
+            for key in [k for k in self._metadata if k[0] == path]:
+                del self._metadata[key]
+
+    def clear(self):
+        """
+        Close all cached files and reset the counters.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                for key in [*self._files]:
+                    self._evict(key)
+            self._reset()
+
+
+FileCache = _FileCache()
+"""
+_FileCache : The process-wide cache used by :class:`~.chunk.Chunk` and :class:`~.io.TreeReader`.
+"""
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=FileCache._reset)
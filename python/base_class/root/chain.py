@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import bisect
 from collections import defaultdict, deque
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor, ThreadPoolExecutor
 from functools import partial
 from logging import Logger
 from typing import TYPE_CHECKING, Callable, Generator, Literal, Protocol, overload
@@ -11,7 +11,7 @@ from ..dask.delayed import delayed
 from ..system.eos import EOS, PathLike
 from ._backend import concat_record, merge_record, rename_record
 from .chunk import Chunk
-from .io import TreeReader, TreeWriter
+from .io import TreeReader, TreeWriter, _read_ahead
 from .merge import move, resize
 
 if TYPE_CHECKING:
@@ -61,6 +61,57 @@ def _friend_from_merge(
     return friend
 
 
+class _read_partition:
+    def __init__(self, reader: TreeReader, library: Literal["ak", "np"]):
+        self.reader = reader
+        self.library = library
+
+    def __call__(self, chunks: list[Chunk]):
+        return self.reader.concat(*chunks, library=self.library)
+
+
+def _dask_concat(
+    reader: TreeReader,
+    partitions: list[list[Chunk]],
+    library: Literal["ak", "np"],
+) -> DelayedRecordLike:
+    """
+    Build one delayed partition from each list of chunks. The metadata is taken from the first chunk without reading any data.
+    """
+    sizes = [sum(map(len, chunks)) for chunks in partitions]
+    meta = reader.dask(next(c for chunks in partitions for c in chunks), library=library)
+    read = _read_partition(reader, library)
+    if library == "ak":
+        import dask_awkward as dak
+
+        divisions = [0]
+        for size in sizes:
+            divisions.append(divisions[-1] + size)
+        return dak.from_map(
+            read,
+            partitions,
+            label="friend-concat",
+            meta=meta._meta,
+            divisions=tuple(divisions),
+        )
+    elif library == "np":
+        import dask.array as da
+        from dask import delayed
+
+        parts = [delayed(read)(chunks) for chunks in partitions]
+        return {
+            k: da.concatenate(
+                [
+                    da.from_delayed(part[k], shape=(size, *v.shape[1:]), dtype=v.dtype)
+                    for part, size in zip(parts, sizes)
+                ]
+            )
+            for k, v in meta.items()
+        }
+    else:
+        raise ValueError(f'Unsupported library "{library}"')
+
+
 class _FriendItem:
     def __init__(self, start: int, stop: int, chunk: Chunk = None):
         self.start = start
@@ -304,10 +355,19 @@ class Friend:
         RecordLike
             Data from friend :class:`TTree`.
         """
+        branches = self._branches if filter is None else filter(self._branches)
+        reader_options = (reader_options or {}) | {"filter": branches.__and__}
+        return TreeReader(**reader_options).concat(
+            *self._slices(target), library=library
+        )
+
+    def _slices(self, target: Chunk) -> list[Chunk]:
         series = self._data[target]
         start = target.entry_start
         stop = target.entry_stop
+        missing = stop
         chunks = []
+        # the items are sorted and do not overlap, start from the first one that ends after the target starts
         for i in range(
             bisect.bisect_left(
                 series, _FriendItem(target.entry_start, target.entry_stop)
@@ -318,18 +378,17 @@ class Friend:
                 break
             item = series[i]
             if item.start > start:
-                raise ValueError(
-                    f"Friend {self.name} does not have the entries [{start},{item.start}) for {target}"
-                )
-            else:
-                chunk_start = start - item.start
-                start = min(stop, item.stop)
-                chunk_stop = start - item.start
-                chunks.append(item.chunk.slice(chunk_start, chunk_stop))
-        branches = self._branches if filter is None else filter(self._branches)
-        reader_options = reader_options or {}
-        reader_options["filter"] = branches.__and__
-        return TreeReader(**reader_options).concat(*chunks, library=library)
+                missing = min(stop, item.start)
+                break
+            chunk_start = start - item.start
+            start = min(stop, item.stop)
+            chunk_stop = start - item.start
+            chunks.append(item.chunk.slice(chunk_start, chunk_stop))
+        if start < stop:
+            raise ValueError(
+                f"Friend {self.name} does not have the entries [{start},{missing}) for {target}"
+            )
+        return chunks
 
     @overload
     def concat(
@@ -425,6 +484,8 @@ class Friend:
         """
         Fetch the friend :class:`TTree` for ``targets`` as delayed arrays. The partitions will be preserved.
 
+        A partition covered by multiple friend chunks is read from all of them and concatenated on demand, so :meth:`merge` is not required.
+
         Parameters
         ----------
         targets : tuple[Chunk]
@@ -441,30 +502,13 @@ class Friend:
         DelayedRecordLike
             Delayed arrays of entries from the friend :class:`TTree`.
         """
-        friends = []
-        for target in targets:
-            series = self._data[target]
-            start = target.entry_start
-            stop = target.entry_stop
-            item = series[
-                bisect.bisect_left(
-                    series, _FriendItem(target.entry_start, target.entry_stop)
-                )
-            ]
-            if item.start > start:
-                raise ValueError(
-                    f"Friend {self.name} does not have the entries [{start},{item.start}) for {target}"
-                )
-            elif item.stop < stop:
-                raise ValueError(
-                    f'Cannot read one partition from multiple files. Call "merge()" first.'
-                )
-            else:
-                friends.append(item.chunk.slice(start - item.start, stop - item.start))
+        partitions = [self._slices(target) for target in targets]
         branches = self._branches if filter is None else filter(self._branches)
-        reader_options = reader_options or {}
-        reader_options["filter"] = branches.__and__
-        return TreeReader(**reader_options).dask(*friends, library=library)
+        reader_options = (reader_options or {}) | {"filter": branches.__and__}
+        reader = TreeReader(**reader_options)
+        if all(len(chunks) == 1 for chunks in partitions):
+            return reader.dask(*(chunks[0] for chunks in partitions), library=library)
+        return _dask_concat(reader, partitions, library)
 
     def dump(
         self,
@@ -720,8 +764,7 @@ class Friend:
                 chunk.path = path
                 friend._data[target].append(_FriendItem(item.start, item.stop, chunk))
         if execute:
-            with ThreadPoolExecutor(max_workers=len(src)) as executor:
-                executor.map(partial(EOS.cp, parents=True, overwrite=True), src, dst)
+            EOS.cp_many(zip(src, dst), parents=True, overwrite=True)
         return friend
 
     def integrity(
@@ -983,6 +1026,8 @@ class Chain:
         library: Literal["ak"] = "ak",
         mode: Literal["balance", "partition"] = "partition",
         reader_options: dict = None,
+        prefetch: int = 0,
+        pool: Executor = None,
     ) -> Generator[ak.Array, None, None]: ...
     @overload
     def iterate(
@@ -991,6 +1036,8 @@ class Chain:
         library: Literal["pd"] = "pd",
         mode: Literal["balance", "partition"] = "partition",
         reader_options: dict = None,
+        prefetch: int = 0,
+        pool: Executor = None,
     ) -> Generator[pd.DataFrame, None, None]: ...
     @overload
     def iterate(
@@ -999,6 +1046,8 @@ class Chain:
         library: Literal["np"] = "np",
         mode: Literal["balance", "partition"] = "partition",
         reader_options: dict = None,
+        prefetch: int = 0,
+        pool: Executor = None,
     ) -> Generator[dict[str, np.ndarray], None, None]: ...
     def iterate(
         self,
@@ -1006,6 +1055,8 @@ class Chain:
         library: Literal["ak", "pd", "np"] = "ak",
         mode: Literal["balance", "partition"] = "partition",
         reader_options: dict = None,
+        prefetch: int = 0,
+        pool: Executor = None,
     ) -> Generator[RecordLike, None, None]:
         """
         Iterate over chunks and friend trees.
@@ -1020,6 +1071,10 @@ class Chain:
             The mode to generate iteration steps. See :meth:`~.io.TreeReader.iterate` for details.
         reader_options : dict, optional
             Additional options passed to :class:`~.io.TreeReader`.
+        prefetch : int, optional, default=0
+            Number of iteration steps to read ahead. See :meth:`~.io.TreeReader.iterate` for details.
+        pool : ~concurrent.futures.Executor, optional
+            The pool used to read ahead. See :meth:`~.io.TreeReader.iterate` for details.
 
         Yields
         ------
@@ -1035,33 +1090,46 @@ class Chain:
         else:
             raise ValueError(f'Unknown mode "{mode}"')
         reader_options = reader_options or {}
-        reader = TreeReader(**reader_options)
-        for chunk in chunks:
-            if not isinstance(chunk, list):
-                chunk = (chunk,)
-            main = reader.concat(*chunk, library=library)
-            friends = {}
-            for name, friend in self._friends.items():
-                friend = friend.concat(
-                    *chunk,
-                    filter=reader_options.get("filter"),
+        yield from _read_ahead(
+            partial(
+                self._iterate_step, library=library, reader_options=reader_options
+            ),
+            chunks,
+            prefetch,
+            pool,
+        )
+
+    def _iterate_step(
+        self,
+        chunk: Chunk | list[Chunk],
+        library: Literal["ak", "pd", "np"],
+        reader_options: dict,
+    ) -> RecordLike:
+        if not isinstance(chunk, list):
+            chunk = (chunk,)
+        main = TreeReader(**reader_options).concat(*chunk, library=library)
+        friends = {}
+        for name, friend in self._friends.items():
+            friend = friend.concat(
+                *chunk,
+                filter=reader_options.get("filter"),
+                library=library,
+                reader_options=reader_options,
+            )
+            if name in self._rename:
+                friend = rename_record(
+                    friend,
+                    partial(self._rename_wrapper, friend=name),
                     library=library,
-                    reader_options=reader_options,
                 )
-                if name in self._rename:
-                    friend = rename_record(
-                        friend,
-                        partial(self._rename_wrapper, friend=name),
-                        library=library,
-                    )
-                friends[name] = friend
-            if library == "ak":
-                for name, friend in friends.items():
-                    if len(friend.fields) > 0:
-                        main[name] = friend
-                yield main
-            else:
-                yield merge_record([main, *friends.values()], library=library)
+            friends[name] = friend
+        if library == "ak":
+            for name, friend in friends.items():
+                if len(friend.fields) > 0:
+                    main[name] = friend
+            return main
+        else:
+            return merge_record([main, *friends.values()], library=library)
 
     @overload
     def dask(
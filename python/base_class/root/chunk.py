@@ -8,6 +8,7 @@ from uuid import UUID
 
 from ..system.eos import EOS, PathLike
 from ..typetools import check_type
+from ._cache import FileCache
 
 
 class _ChunkMeta(type):
@@ -147,6 +148,7 @@ class Chunk(metaclass=_ChunkMeta):
             logger.error(f'{chunk_name}file not exists')
             return None
         else:
+            FileCache.evict(self.path)
             reloaded = Chunk(
                 source=self.path,
                 entry_start=self._entry_start,
@@ -179,15 +181,17 @@ class Chunk(metaclass=_ChunkMeta):
 
     def _fetch(self):
         if any(v is ... for v in (self._branches, self._num_entries, self._uuid)):
-            import uproot
-            with uproot.open(self.path) as file:
-                tree = file[self.name]
-                if self._branches is ...:
-                    self._branches = frozenset(tree.keys())
-                if self._num_entries is ...:
-                    self._num_entries = tree.num_entries
-                if self._uuid is ...:
-                    self._uuid = file.file.uuid
+            from .io import _Reader
+
+            # open with the same options as the readers to share the handle
+            metadata = FileCache.metadata(
+                self.path, self.name, **_Reader()._open_options)
+            if self._branches is ...:
+                self._branches = metadata.branches
+            if self._num_entries is ...:
+                self._num_entries = metadata.num_entries
+            if self._uuid is ...:
+                self._uuid = metadata.uuid
         return self
 
     def __hash__(self):
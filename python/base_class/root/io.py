@@ -21,6 +21,8 @@ ROOT file I/O based on :func:`uproot.reading.open`, :func:`uproot._dask.dask` an
 
         timeout = 180
 
+Opened files are kept in a process-wide LRU cache, see :data:`~._cache.FileCache`.
+
 .. warning::
     Writers will always overwrite the output file if it exists.
 
@@ -34,12 +36,16 @@ ROOT file I/O based on :func:`uproot.reading.open`, :func:`uproot._dask.dask` an
 """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Callable, Generator, Literal, overload
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, Literal, overload
 
 import uproot
 
 from ..system.eos import EOS, PathLike
 from ._backend import concat_record, len_record, record_backend, slice_record
+from ._cache import FileCache
 from .chunk import Chunk
 
 if TYPE_CHECKING:
@@ -62,6 +68,38 @@ if TYPE_CHECKING:
     """
 
 
+def _read_ahead(
+    func: Callable,
+    args: Iterable,
+    prefetch: int,
+    pool: Executor = None,
+) -> Generator:
+    """
+    Yield ``func(arg)`` for each ``arg`` in order while at most ``prefetch`` following calls are running in ``pool``.
+    """
+    if prefetch <= 0 and pool is None:
+        for arg in args:
+            yield func(arg)
+        return
+    prefetch = max(prefetch, 1)
+    own = pool is None
+    if own:
+        pool = ThreadPoolExecutor(max_workers=prefetch)
+    queue: deque[Future] = deque()
+    try:
+        for arg in args:
+            queue.append(pool.submit(func, arg))
+            if len(queue) > prefetch:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+    finally:
+        for future in queue:
+            future.cancel()
+        if own:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
 class _Reader:
     _open_options = {
         'object_cache': None,
@@ -155,9 +193,11 @@ class TreeWriter:
                     source=self._temp,
                     name=self._name,
                     fetch=True)
+                FileCache.evict(self._temp)
                 self.tree.path = self._path
                 self._temp.move_to(
                     self._path, parents=self._parents, overwrite=True)
+                FileCache.evict(self._path)
             else:
                 self._temp.rm()
         else:
@@ -311,7 +351,7 @@ class TreeReader(_Reader):
         branches = source.branches
         if self._filter is not None:
             branches = self._filter(branches)
-        with uproot.open(source.path, **self._open_options) as file:
+        with FileCache.open(source.path, **self._open_options) as file:
             data = file[source.name].arrays(
                 expressions=branches,
                 entry_start=source.entry_start,
@@ -339,20 +379,20 @@ class TreeReader(_Reader):
         self,
         *sources: Chunk,
         library: Literal['ak', 'pd', 'np'] = 'ak',
+        pool: Executor = None,
         **options,
     ) -> RecordLike:
         """
         Read ``sources`` into one array. The branches of ``sources`` must be the same after filtering.
 
-        .. todo::
-            Add :mod:`multiprocessing` support.
-
         Parameters
         ----------
         sources : tuple[~heptools.root.chunk.Chunk]
             One or more chunks of :class:`TTree`.
         library : ~typing.Literal['ak', 'np', 'pd'], optional, default='ak'
             The library used to represent arrays.
+        pool : ~concurrent.futures.Executor, optional
+            If given, read ``sources`` in parallel using ``pool``. A :class:`~concurrent.futures.ProcessPoolExecutor` requires ``self`` to be picklable.
         **options : dict, optional
             Additional options passed to :meth:`arrays`.
 
@@ -366,22 +406,25 @@ class TreeReader(_Reader):
             return self.arrays(sources[0], **options)
         if library in ('ak', 'pd', 'np'):
             sources = Chunk.common(*sources)
-            return concat_record(
-                [self.arrays(s, **options) for s in sources],
-                library=library)
+            read = partial(self.arrays, **options)
+            if pool is None:
+                data = [*map(read, sources)]
+            else:
+                data = [*pool.map(read, sources)]
+            return concat_record(data, library=library)
         else:
             raise ValueError(f'Unknown library {library}.')
 
     @overload
-    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['ak'] = 'ak', mode: Literal['balance', 'partition'] = 'partition', **options) -> Generator[ak.Array, None, None]:
+    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['ak'] = 'ak', mode: Literal['balance', 'partition'] = 'partition', prefetch: int = 0, pool: Executor = None, **options) -> Generator[ak.Array, None, None]:
         ...
 
     @overload
-    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['pd'] = 'pd', mode: Literal['balance', 'partition'] = 'partition', **options) -> Generator[pd.DataFrame, None, None]:
+    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['pd'] = 'pd', mode: Literal['balance', 'partition'] = 'partition', prefetch: int = 0, pool: Executor = None, **options) -> Generator[pd.DataFrame, None, None]:
         ...
 
     @overload
-    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['np'] = 'np', mode: Literal['balance', 'partition'] = 'partition', **options) -> Generator[dict[str, np.ndarray], None, None]:
+    def iterate(self, *sources: Chunk, step: int = ..., library: Literal['np'] = 'np', mode: Literal['balance', 'partition'] = 'partition', prefetch: int = 0, pool: Executor = None, **options) -> Generator[dict[str, np.ndarray], None, None]:
         ...
 
     def iterate(
@@ -390,6 +433,8 @@ class TreeReader(_Reader):
         step: int = ...,
         library: Literal['ak', 'pd', 'np'] = 'ak',
         mode: Literal['balance', 'partition'] = 'partition',
+        prefetch: int = 0,
+        pool: Executor = None,
         **options,
     ) -> Generator[RecordLike, None, None]:
         """
@@ -408,6 +453,10 @@ class TreeReader(_Reader):
 
             - ``mode='balance'``: use :meth:`~.chunk.Chunk.balance`. The length of output arrays is not guaranteed to be ``step`` but no need to concatenate.
             - ``mode='partition'``: use :meth:`~.chunk.Chunk.partition`. The length of output arrays is guaranteed to be ``step`` except for the last one but need to concatenate.
+        prefetch : int, optional, default=0
+            Number of iteration steps to read ahead while the current one is being consumed. At most ``prefetch + 1`` steps are kept in memory. The output order is always preserved.
+        pool : ~concurrent.futures.Executor, optional
+            The pool used to read ahead. If not given, a :class:`~concurrent.futures.ThreadPoolExecutor` with ``prefetch`` workers will be created.
         **options : dict, optional
             Additional options passed to :meth:`arrays`.
 
@@ -425,10 +474,14 @@ class TreeReader(_Reader):
             chunks = Chunk.balance(step, *sources, common_branches=True)
         else:
             raise ValueError(f'Unknown mode "{mode}".')
-        for chunk in chunks:
-            if not isinstance(chunk, list):
-                chunk = (chunk,)
-            yield self.concat(*chunk, **options)
+        yield from _read_ahead(
+            partial(self._concat_step, options=options),
+            chunks, prefetch, pool)
+
+    def _concat_step(self, chunk: Chunk | list[Chunk], options: dict):
+        if not isinstance(chunk, list):
+            chunk = (chunk,)
+        return self.concat(*chunk, **options)
 
     @overload
     def dask(self, *sources: Chunk, partition: int = ..., library: Literal['ak'] = 'ak') -> dak.Array:
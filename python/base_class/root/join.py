@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Callable, Literal
+
+from ..system.eos import PathLike
+from .chain import Friend
+from .chunk import Chunk
+from .io import TreeReader
+
+if TYPE_CHECKING:
+    from .io import RecordLike
+
+
+class _HashCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes: dict[tuple, str] = {}
+
+    def get(self, key: tuple, compute: Callable[[], str]) -> str:
+        with self._lock:
+            if key in self._hashes:
+                return self._hashes[key]
+        digest = compute()
+        with self._lock:
+            self._hashes[key] = digest
+        return digest
+
+    def clear(self):
+        with self._lock:
+            self._hashes.clear()
+
+
+def _hash_record(data: dict, branches: list[str]) -> str:
+    import numpy as np
+
+    h = hashlib.blake2b(digest_size=16)
+    for branch in branches:
+        h.update(np.ascontiguousarray(data[branch], dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+class FriendJoin:
+    """
+    Join several :class:`~.chain.Friend` to chunks of the same main :class:`TTree`.
+
+    The entry ranges of the friends are resolved from the target :class:`~.chunk.Chunk` and the files are read through the shared file cache. Alignment is checked by comparing a hash of the ``keys`` branches in the target and each friend. The hashes are computed once per file and cached in the process.
+
+    Parameters
+    ----------
+    keys : dict[str, str], optional
+        A mapping from the branches in the target to the branches in the friends used to check alignment. The friend branches can use ``{name}`` for :data:`Friend.name`. If not given, no check will be performed.
+    """
+
+    _hashes = _HashCache()
+
+    def __init__(self, keys: dict[str, str] = None):
+        self._keys = keys or {}
+        self._friends: dict[str, Friend] = {}
+
+    def add(self, *friends: Friend):
+        """
+        Add new :class:`~.chain.Friend` or merge to the existing ones.
+
+        Returns
+        -------
+        self: FriendJoin
+        """
+        for friend in friends:
+            if friend.name in self._friends:
+                self._friends[friend.name] = self._friends[friend.name] + friend
+            else:
+                self._friends[friend.name] = friend
+        return self
+
+    def add_file(self, name: str, target: Chunk, path: PathLike, tree: str = None):
+        """
+        Add a friend stored in one file with the same entries as the whole file of ``target``.
+
+        Parameters
+        ----------
+        name : str
+            Name of the friend.
+        target : Chunk
+            A chunk of the main :class:`TTree`.
+        path : PathLike
+            Path to the friend file.
+        tree : str, optional
+            Name of the friend :class:`TTree`. If not given, use the name of ``target``.
+
+        Returns
+        -------
+        self: FriendJoin
+        """
+        friend = Friend(name)
+        whole = Chunk(source=(target.path, target.uuid), name=target.name, fetch=True)
+        friend.add(whole, Chunk(path, name=tree or target.name, fetch=True))
+        return self.add(friend)
+
+    def _friend_keys(self, name: str):
+        return [branch.format(name=name) for branch in self._keys.values()]
+
+    def _coverage(self, target: Chunk, friend: Friend) -> tuple[Chunk, tuple]:
+        series = friend._data[Friend._construct_key(target)]
+        whole = target.deepcopy(entry_start=series[0].start, entry_stop=series[-1].stop)
+        return whole, tuple((item.start, item.stop, item.chunk.path, item.chunk.uuid) for item in series)
+
+    def _target_hash(self, whole: Chunk):
+        keys = list(self._keys)
+        return self._hashes.get(
+            ('target', whole.path, whole.uuid, whole.name, whole.entry_start, whole.entry_stop, *keys),
+            lambda: _hash_record(TreeReader(lambda _: set(keys)).arrays(whole, library='np'), keys))
+
+    def _friend_hash(self, whole: Chunk, friend: Friend, items: tuple):
+        keys = self._friend_keys(friend.name)
+        return self._hashes.get(
+            ('friend', friend.name, items, *keys),
+            lambda: _hash_record(friend.arrays(whole, filter=lambda _: set(keys), library='np'), keys))
+
+    def check(self, target: Chunk) -> list[str]:
+        """
+        Check the alignment of all friends with ``target``.
+
+        Parameters
+        ----------
+        target : Chunk
+            A chunk of the main :class:`TTree`.
+
+        Returns
+        -------
+        list[str]
+            Names of the friends not aligned with ``target``.
+        """
+        if not self._keys:
+            return []
+        misaligned = []
+        for name, friend in self._friends.items():
+            whole, items = self._coverage(target, friend)
+            if self._target_hash(whole) != self._friend_hash(whole, friend, items):
+                misaligned.append(name)
+        return misaligned
+
+    def arrays(
+        self,
+        target: Chunk,
+        filter: Callable[[set[str]], set[str]] = None,
+        library: Literal['ak', 'pd', 'np'] = 'ak',
+        reader_options: dict = None,
+    ) -> dict[str, RecordLike]:
+        """
+        Read all friends for ``target``.
+
+        Parameters
+        ----------
+        target : Chunk
+            A chunk of the main :class:`TTree`.
+        filter : ~typing.Callable[[set[str]], set[str]], optional
+            A function to select branches. If not given, all branches will be read.
+        library : ~typing.Literal['ak', 'np', 'pd'], optional, default='ak'
+            The library used to represent arrays.
+        reader_options : dict, optional
+            Additional options passed to :class:`~.io.TreeReader`.
+
+        Returns
+        -------
+        dict[str, RecordLike]
+            A mapping from friend names to data.
+        """
+        return {
+            name: friend.arrays(target, filter=filter, library=library, reader_options=reader_options)
+            for name, friend in self._friends.items()}
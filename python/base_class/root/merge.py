@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from ..dask.delayed import delayed
 from ..system.eos import EOS, PathLike
 from .chunk import Chunk
@@ -8,6 +10,7 @@ from .io import TreeReader, TreeWriter
 def move(
     path: PathLike,
     source: Chunk,
+    parents: bool = False,
     dask: bool = False,
 ):
     """
@@ -19,6 +22,8 @@ def move(
         Path to output ROOT file.
     source : ~heptools.root.chunk.Chunk
         Source chunk to move.
+    parents : bool, optional, default=False
+        Create parent directories of ``path`` if not exist.
     dask : bool, optional, default=False
         If ``True``, return a :class:`~dask.delayed.Delayed` object.
 
@@ -28,7 +33,7 @@ def move(
         Moved chunk.
     """
     source = source.deepcopy()
-    source.path = source.path.move_to(path)
+    source.path = source.path.move_to(path, parents=parents)
     return source
 
 
@@ -167,3 +172,102 @@ def resize(
             )
     results = clean(sources, results, dask=dask)
     return results
+
+
+def _is_whole(chunk: Chunk, source: Chunk):
+    return (
+        chunk.entry_start == 0
+        and chunk.entry_stop == source.num_entries
+        and chunk.branches == source.branches)
+
+
+@delayed
+def _stream(
+    path: PathLike,
+    *sources: Chunk,
+    step: int,
+    prefetch: int,
+    writer_options: dict,
+    reader_options: dict,
+    dask: bool = False,
+):
+    writer_options = {'basket_size': step} | writer_options
+    with TreeWriter(**writer_options)(path) as writer:
+        for data in TreeReader(**reader_options).iterate(
+                *sources, step=step, mode='balance', prefetch=prefetch):
+            writer.extend(data)
+    return writer.tree
+
+
+def stream(
+    path: PathLike,
+    *sources: Chunk,
+    step: int,
+    chunk_size: int = ...,
+    prefetch: int = 1,
+    max_workers: int = None,
+    writer_options: dict = None,
+    reader_options: dict = None,
+    dask: bool = False,
+):
+    """
+    Streaming replacement of :func:`resize`.
+
+    The output files are planned from the metadata of ``sources`` alone. Each output file is then written in a single pass: every source is read at most once in pieces of about ``step`` entries without concatenating across sources, and the :class:`~.io.TreeWriter` buffers the pieces into :class:`TBasket` of ``step`` entries. At most ``prefetch + 1`` pieces and one basket are kept in memory for each output file. An output made of exactly one whole source is moved instead of rewritten.
+
+    Parameters
+    ----------
+    path : PathLike
+        Path to output ROOT file.
+    sources : tuple[~heptools.root.chunk.Chunk]
+        Chunks to merge.
+    step : int
+        Number of entries to read in each iteration step and to write in each :class:`TBasket`.
+    chunk_size : int, optional
+        Number of entries in each chunk. If not given, all entries will be merged into one chunk.
+    prefetch : int, optional, default=1
+        Number of iteration steps to read ahead while the current one is being written.
+    max_workers : int, optional
+        Number of output files written in parallel when ``dask=False``. If not given, use the default of :class:`~concurrent.futures.ThreadPoolExecutor`.
+    writer_options : dict, optional
+        Additional options passed to :class:`~.io.TreeWriter`.
+    reader_options : dict, optional
+        Additional options passed to :class:`~.io.TreeReader`.
+    dask : bool, optional, default=False
+        If ``True``, return a :class:`~dask.delayed.Delayed` object and write each output file in a separate task.
+
+    Returns
+    -------
+    list[Chunk] or Delayed
+        Merged chunks.
+    """
+    path = EOS(path)
+    writer_options = writer_options or {}
+    reader_options = reader_options or {}
+    if chunk_size is ...:
+        plan = [Chunk.common(*sources)]
+    else:
+        plan = [*Chunk.partition(chunk_size, *sources, common_branches=True)]
+    filename = f'{path.stem}.chunk{{index}}{"".join(path.suffixes)}'
+    originals: dict[EOS, list[Chunk]] = {}
+    for chunk in sources:
+        originals.setdefault(chunk.path, []).append(chunk)
+    moved: set[EOS] = set()
+    tasks = []
+    for index, chunks in enumerate(plan):
+        new_path = path if len(plan) == 1 else path.parent / filename.format(index=index)
+        if len(chunks) == 1 and len(originals[chunks[0].path]) == 1 and _is_whole(chunks[0], originals[chunks[0].path][0]):
+            moved.add(chunks[0].path)
+            tasks.append((move, (new_path, chunks[0]), dict(parents=True)))
+        else:
+            tasks.append((_stream, (new_path, *chunks), dict(
+                step=step,
+                prefetch=prefetch,
+                writer_options=writer_options,
+                reader_options=reader_options)))
+    if dask:
+        results = [func(*args, **kwargs, dask=True) for func, args, kwargs in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = [*pool.map(lambda task: task[0](*task[1], **task[2]), tasks)]
+    return clean([chunk for chunk in sources if chunk.path not in moved], results, dask=dask)
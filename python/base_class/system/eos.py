@@ -2,6 +2,14 @@
 """
 An interface to operate on both local filesystem and EOS (or other XRootD supported system).
 
+The operations are delegated to :data:`EOS.backend`:
+
+- :class:`ShellBackend` (default) runs ``xrdfs``/``xrdcp``/``eos`` or coreutils in a subprocess.
+- :class:`FsspecBackend` runs in-process with :mod:`fsspec` (and ``fsspec-xrootd`` for remote files), reusing one connection per host and running batched operations concurrently.
+- :class:`LocalBackend` maps remote paths to a local directory, as a stand-in for tests.
+
+The backend and :data:`EOS.stat_ttl` can be selected with :meth:`EOS.configure` or, for new processes, with the environment variables ``EOS_BACKEND`` (``shell`` or ``fsspec``), ``EOS_STAT_TTL`` and ``EOS_MAX_WORKERS``.
+
 .. todo::
     - Use :func:`os.path.normpath`, :func:`glob.glob`
 """
@@ -11,17 +19,34 @@ import importlib
 import os
 import pickle
 import re
+import shutil
+import stat as _stat
 import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from subprocess import PIPE, CalledProcessError, check_output
-from typing import Any, Generator, Literal
+from typing import Any, Callable, Generator, Iterable, Literal
 
 from ..utils import arg_set
 from ..utils.string import ensure
 from ..utils.wrapper import retry
 
-__all__ = ["EOS", "PathLike", "EOSError", "save", "load"]
+__all__ = [
+    "EOS",
+    "PathLike",
+    "EOSError",
+    "EOSBackend",
+    "ShellBackend",
+    "FsspecBackend",
+    "LocalBackend",
+    "save",
+    "load",
+]
 
 
 class EOSError(Exception):
@@ -32,6 +57,46 @@ class EOSError(Exception):
         super().__init__(msg, *args)
 
 
+class _StatCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], tuple[float, Any]] = {}
+
+    def get(self, kind: str, path: EOS, ttl: float, func: Callable[[], Any]):
+        if ttl <= 0 or path.is_local:
+            return func()
+        key = (kind, str(path))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+        value = func()
+        with self._lock:
+            self._entries[key] = (now, value)
+        return value
+
+    def invalidate(self, *paths: EOS, children: bool = True):
+        with self._lock:
+            if not self._entries:
+                return
+            exact, prefixes = set(), set()
+            for path in paths:
+                exact.add(str(path))
+                exact.update(str(EOS(parent, path.host)) for parent in path.path.parents)
+                if children:
+                    prefixes.add(ensure(str(path), __suffix="/"))
+            self._entries = {
+                k: v
+                for k, v in self._entries.items()
+                if k[1] not in exact and not k[1].startswith(tuple(prefixes))
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class EOS:
     _host_pattern = re.compile(r"^[\w]+://[^/]+")
     _slash_pattern = re.compile(r"(?<!:)/{2,}")
@@ -40,7 +105,16 @@ class EOS:
     allow_fail: bool = False
     client: Literal["eos", "xrdfs"] = "xrdfs"
 
-    history: list[tuple[datetime, str, tuple[bool, bytes]]] = []
+    backend: EOSBackend
+    '''EOSBackend: The backend used by all operations. Default to :class:`ShellBackend`.'''
+    stat_ttl: float = 0
+    '''float: Seconds to cache the results of :meth:`exists`, :meth:`ls` and :meth:`stat` on remote paths. ``0`` disables the cache. Operations through :class:`EOS` invalidate the affected entries.'''
+    history: deque[tuple[datetime, str, tuple[bool, bytes]]] | None = deque(
+        maxlen=1000
+    )
+    '''~collections.deque, optional: The most recent operations. Set to ``None`` to disable.'''
+
+    _stat_cache = _StatCache()
 
     def __init__(self, path: PathLike, host: str = ...):
         default = ""
@@ -58,6 +132,48 @@ class EOS:
             self.host = ensure(self.host, __suffix="/")
         self.path = Path(self._slash_pattern.sub("/", str(path)))
 
+    @classmethod
+    def configure(
+        cls,
+        backend: Literal["shell", "fsspec"] = None,
+        stat_ttl: float = None,
+        max_workers: int = None,
+    ) -> dict[str, str]:
+        """
+        Select the backend and the TTL of the stat cache. The arguments not given are left unchanged.
+
+        Parameters
+        ----------
+        backend : {"shell", "fsspec"}, optional
+            Use :class:`ShellBackend` or :class:`FsspecBackend`.
+        stat_ttl : float, optional
+            See :data:`stat_ttl`.
+        max_workers : int, optional
+            Number of threads used by batched operations.
+
+        Returns
+        -------
+        dict[str, str]
+            The environment variables that give the same settings to a new process.
+        """
+        env = {}
+        if backend is not None:
+            if backend == "shell":
+                cls.backend = ShellBackend()
+            elif backend == "fsspec":
+                cls.backend = FsspecBackend()
+            else:
+                raise ValueError(f'Unknown EOS backend "{backend}"')
+            env[_ENV_BACKEND] = backend
+        if max_workers is not None:
+            cls.backend.max_workers = int(max_workers)
+            env[_ENV_MAX_WORKERS] = str(max_workers)
+        if stat_ttl is not None:
+            cls.stat_ttl = float(stat_ttl)
+            cls._stat_cache.clear()
+            env[_ENV_STAT_TTL] = str(stat_ttl)
+        return env
+
     @property
     def as_local(self):
         return EOS(self.path, None)
@@ -85,9 +201,52 @@ class EOS:
     @property
     def exists(self):
         if not self.is_local:
-            return self.call("ls", self.path)[0]
+            return self._stat_cache.get(
+                "exists", self, self.stat_ttl, lambda: self.backend.exists(self)
+            )
         return self.path.exists()
 
+    @classmethod
+    def exists_many(cls, *paths: PathLike) -> list[bool]:
+        """
+        Check the existence of multiple paths in one batch.
+        """
+        paths = [EOS(p) for p in paths]
+        remote = [p for p in paths if not p.is_local]
+        if cls.stat_ttl > 0 or not remote:
+            return [p.exists for p in paths]
+        results = dict(zip(remote, cls.backend.exists_many(remote)))
+        return [p.path.exists() if p.is_local else results[p] for p in paths]
+
+    @classmethod
+    def _record(cls, args: list[str], output: tuple[bool, bytes]):
+        if cls.history is not None:
+            cls.history.append((datetime.now(), " ".join(args), output))
+        if not cls.allow_fail and not output[0]:
+            raise EOSError(args, output[1])
+
+    @classmethod
+    @retry(1)
+    def op(cls, args: Iterable, func: Callable[[], Any]) -> tuple[bool, Any]:
+        """
+        Run an in-process operation with the same retry, dry-run, failure and history handling as :meth:`cmd`.
+
+        Returns
+        -------
+        tuple[bool, Any]
+            Whether the operation succeeded, and the return value of ``func`` or the error message.
+        """
+        args = [str(arg) for arg in args if arg]
+        if cls.run:
+            try:
+                output = (True, func())
+            except Exception as e:
+                output = (False, str(e).encode())
+        else:
+            output = (True, None)
+        cls._record(args, (output[0], b"" if output[0] else output[1]))
+        return output
+
     @classmethod
     @retry(1)
     def cmd(cls, *args) -> tuple[bool, bytes]:
@@ -104,35 +263,30 @@ class EOS:
                     output = (False, str(e).encode())
         else:
             output = (True, b"")
-        cls.history.append((datetime.now(), " ".join(args), output))
-        if not cls.allow_fail and not output[0]:
-            raise EOSError(args, output[1])
+        cls._record(args, output)
         return output
 
     @classmethod
     def set_retry(cls, max: int = ..., delay: float = ...):
         cls.cmd.set(max=max, delay=delay)
+        cls.op.set(max=max, delay=delay)
 
     def call(self, executable: str, *args):
         eos = () if self.is_local else (self.client, self.host)
         return self.cmd(*eos, executable, *args)
 
-    def ls(self):  # TODO test and improve
-        files = self.call("ls", self.path)[1].decode().split("\n")
-        if self.is_local or self.client == "eos":
-            return [self / f for f in files if f]
-        else:
-            return [EOS(f, self.host) for f in files if f]
+    def ls(self) -> list[EOS]:  # TODO test and improve
+        return self._stat_cache.get(
+            "ls", self, self.stat_ttl, lambda: self.backend.ls(self)
+        )
 
     def rm(self, recursive: bool = False):
-        if not self.is_local and recursive and self.client == "xrdfs":
-            raise NotImplementedError(
-                f'`{self.rm.__qualname__}()` does not support recursive removal of remote files using "xrdfs" client'
-            )  # TODO
-        return self.call("rm", "-r" if recursive else "", self.path)[0]
+        self._stat_cache.invalidate(self)
+        return self.backend.rm(self, recursive)
 
     def mkdir(self, recursive: bool = False) -> EOS:
-        if self.call("mkdir", "-p" if recursive else "", self.path)[0]:
+        self._stat_cache.invalidate(self, children=False)
+        if self.backend.mkdir(self, recursive):
             return self
 
     def join(self, *other: str):
@@ -165,13 +319,25 @@ class EOS:
                 else:
                     yield EOS(entry.path, self.host), entry.stat()
 
-    def stat(self):
+    def stat(self) -> os.stat_result:
         if not self.is_local:
-            raise NotImplementedError(
-                f"`{self.stat.__qualname__}()` only works for local files"
-            )  # TODO
+            return self._stat_cache.get(
+                "stat", self, self.stat_ttl, lambda: self.backend.stat(self)
+            )
         return self.path.stat()
 
+    @classmethod
+    def stat_many(cls, *paths: PathLike) -> list[os.stat_result]:
+        """
+        Stat multiple paths in one batch.
+        """
+        paths = [EOS(p) for p in paths]
+        remote = [p for p in paths if not p.is_local]
+        if cls.stat_ttl > 0 or not remote:
+            return [p.stat() for p in paths]
+        results = dict(zip(remote, cls.backend.stat_many(remote)))
+        return [p.path.stat() if p.is_local else results[p] for p in paths]
+
     def isin(self, other: PathLike):
         return str(self).startswith(ensure(str(other), __suffix="/"))
 
@@ -213,19 +379,34 @@ class EOS:
         src, dst = EOS(src), EOS(dst)
         if parents:
             dst.parent.mkdir(recursive=True)
-        if src.is_local and dst.is_local:
-            result = cls.cmd(
-                "cp", "-r" if recursive else "", "-n" if not overwrite else "", src, dst
-            )
-        else:
-            if recursive:
-                raise NotImplementedError(
-                    f"`{cls.cp.__qualname__}()` does not support recursive copying of remote files"
-                )  # TODO
-            result = cls.cmd("xrdcp", "-f" if overwrite else "", src, dst)
-        if result[0]:
+        cls._stat_cache.invalidate(dst)
+        if cls.backend.cp(src, dst, overwrite, recursive):
             return dst
 
+    @classmethod
+    def cp_many(
+        cls,
+        pairs: Iterable[tuple[PathLike, PathLike]],
+        parents: bool = False,
+        overwrite: bool = False,
+        recursive: bool = False,
+    ) -> list[EOS | None]:
+        """
+        Copy multiple files. The copies may run concurrently depending on the backend.
+
+        Returns
+        -------
+        list[EOS | None]
+            The destinations, or ``None`` for failed copies.
+        """
+        pairs = [(EOS(src), EOS(dst)) for src, dst in pairs]
+        if parents:
+            for parent in {dst.parent for _, dst in pairs}:
+                parent.mkdir(recursive=True)
+        cls._stat_cache.invalidate(*(dst for _, dst in pairs))
+        results = cls.backend.cp_many(pairs, overwrite, recursive)
+        return [dst if ok else None for (_, dst), ok in zip(pairs, results)]
+
     @classmethod
     def mv(
         cls,
@@ -240,13 +421,9 @@ class EOS:
             return dst
         if parents:
             dst.parent.mkdir(recursive=True)
+        cls._stat_cache.invalidate(src, dst)
         if src.host == dst.host:
-            result = src.call(
-                "mv",
-                "-n" if not overwrite and src.client != "xrdfs" else "",
-                src.path,
-                dst.path,
-            )[0]
+            result = cls.backend.mv(src, dst, overwrite)
         else:
             if recursive:
                 raise NotImplementedError(
@@ -371,3 +548,316 @@ def load(
         raise NotImplementedError(
             f"`{load.__qualname__}()` does not support remote files"
         )  # TODO
+
+
+class EOSBackend(ABC):
+    """
+    The operations used by :class:`EOS`. All methods accept both local and remote paths. Failures should go through :meth:`EOS.cmd` or :meth:`EOS.op` to respect :data:`EOS.run`, :data:`EOS.allow_fail` and :data:`EOS.history`.
+    """
+
+    @abstractmethod
+    def exists(self, path: EOS) -> bool: ...
+
+    @abstractmethod
+    def ls(self, path: EOS) -> list[EOS]: ...
+
+    @abstractmethod
+    def rm(self, path: EOS, recursive: bool) -> bool: ...
+
+    @abstractmethod
+    def mkdir(self, path: EOS, recursive: bool) -> bool: ...
+
+    @abstractmethod
+    def cp(self, src: EOS, dst: EOS, overwrite: bool, recursive: bool) -> bool: ...
+
+    @abstractmethod
+    def mv(self, src: EOS, dst: EOS, overwrite: bool) -> bool:
+        """
+        Move ``src`` to ``dst`` on the same host.
+        """
+        ...
+
+    @abstractmethod
+    def stat(self, path: EOS) -> os.stat_result: ...
+
+    def exists_many(self, paths: list[EOS]) -> list[bool]:
+        return [self.exists(path) for path in paths]
+
+    def stat_many(self, paths: list[EOS]) -> list[os.stat_result]:
+        return [self.stat(path) for path in paths]
+
+    def cp_many(
+        self, pairs: list[tuple[EOS, EOS]], overwrite: bool, recursive: bool
+    ) -> list[bool]:
+        return [self.cp(src, dst, overwrite, recursive) for src, dst in pairs]
+
+
+class ShellBackend(EOSBackend):
+    """
+    Run every operation in a subprocess through :meth:`EOS.cmd`. Batched operations run the subprocesses from a thread pool.
+    """
+
+    max_workers: int = 8
+    '''int: Number of threads used by batched operations.'''
+
+    def _map(self, func, *iterables):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return [*pool.map(func, *iterables)]
+
+    def exists_many(self, paths: list[EOS]) -> list[bool]:
+        return self._map(self.exists, paths)
+
+    def cp_many(
+        self, pairs: list[tuple[EOS, EOS]], overwrite: bool, recursive: bool
+    ) -> list[bool]:
+        return self._map(
+            lambda pair: self.cp(*pair, overwrite, recursive), pairs
+        )
+
+    def exists(self, path: EOS) -> bool:
+        return path.call("ls", path.path)[0]
+
+    def ls(self, path: EOS) -> list[EOS]:
+        files = path.call("ls", path.path)[1].decode().split("\n")
+        if path.is_local or EOS.client == "eos":
+            return [path / f for f in files if f]
+        else:
+            return [EOS(f, path.host) for f in files if f]
+
+    def rm(self, path: EOS, recursive: bool) -> bool:
+        if not path.is_local and recursive and EOS.client == "xrdfs":
+            raise NotImplementedError(
+                f'`{EOS.rm.__qualname__}()` does not support recursive removal of remote files using "xrdfs" client'
+            )  # TODO
+        return path.call("rm", "-r" if recursive else "", path.path)[0]
+
+    def mkdir(self, path: EOS, recursive: bool) -> bool:
+        return path.call("mkdir", "-p" if recursive else "", path.path)[0]
+
+    def cp(self, src: EOS, dst: EOS, overwrite: bool, recursive: bool) -> bool:
+        if src.is_local and dst.is_local:
+            return EOS.cmd(
+                "cp", "-r" if recursive else "", "-n" if not overwrite else "", src, dst
+            )[0]
+        if recursive:
+            raise NotImplementedError(
+                f"`{EOS.cp.__qualname__}()` does not support recursive copying of remote files"
+            )  # TODO
+        return EOS.cmd("xrdcp", "-f" if overwrite else "", src, dst)[0]
+
+    def mv(self, src: EOS, dst: EOS, overwrite: bool) -> bool:
+        return src.call(
+            "mv",
+            "-n" if not overwrite and EOS.client != "xrdfs" else "",
+            src.path,
+            dst.path,
+        )[0]
+
+    def stat(self, path: EOS) -> os.stat_result:
+        if not path.is_local:
+            raise NotImplementedError(
+                f"`{EOS.stat.__qualname__}()` only works for local files with {type(self).__name__}"
+            )  # TODO
+        return path.path.stat()
+
+
+def _stat_result(info: dict) -> os.stat_result:
+    mode = _stat.S_IFDIR if info.get("type") == "directory" else _stat.S_IFREG
+    mtime = info.get("mtime", info.get("modify_time", 0)) or 0
+    if isinstance(mtime, datetime):
+        mtime = mtime.timestamp()
+    return os.stat_result((mode, 0, 0, 0, 0, 0, info.get("size", 0) or 0, 0, mtime, 0))
+
+
+class FsspecBackend(EOSBackend):
+    """
+    Run every operation in-process with :mod:`fsspec`.
+
+    One filesystem (and connection) is kept per host and rebuilt after :func:`os.fork`. Remote paths require the ``fsspec-xrootd`` package. Batched operations run in a thread pool.
+
+    Parameters
+    ----------
+    max_workers : int, optional, default=8
+        Number of threads used by batched operations.
+    **storage_options : dict, optional
+        Additional options passed to :func:`fsspec.filesystem` for remote hosts.
+    """
+
+    def __init__(self, max_workers: int = 8, **storage_options):
+        self.max_workers = max_workers
+        self.storage_options = storage_options
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fs = {}
+
+    def __getstate__(self):
+        return self.__dict__ | {"_lock": None, "_pid": None, "_fs": {}}
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+        self._lock = threading.Lock()
+
+    def _filesystem(self, host: str):
+        import fsspec
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._fs = {}
+            fs = self._fs.get(host)
+            if fs is None:
+                if not host:
+                    fs = fsspec.filesystem("file")
+                else:
+                    protocol, hostid = host.rstrip("/").split("://", 1)
+                    fs = fsspec.filesystem(
+                        protocol, hostid=hostid, **self.storage_options
+                    )
+                self._fs[host] = fs
+        return fs
+
+    def _resolve(self, path: EOS):
+        return self._filesystem(path.host), str(path.path)
+
+    def _from_fs(self, path: EOS, name: str) -> EOS:
+        return EOS(name, path.host or None)
+
+    def _is_local_fs(self, fs) -> bool:
+        from fsspec.implementations.local import LocalFileSystem
+
+        return isinstance(fs, LocalFileSystem)
+
+    def exists(self, path: EOS) -> bool:
+        fs, p = self._resolve(path)
+        ok, exists = EOS.op(["exists", path], lambda: fs.exists(p))
+        if not EOS.run:  # a dry run succeeds as in ShellBackend
+            return ok
+        return ok and bool(exists)
+
+    def ls(self, path: EOS) -> list[EOS]:
+        fs, p = self._resolve(path)
+        files = EOS.op(["ls", path], lambda: fs.ls(p, detail=False))[1]
+        if not isinstance(files, list):
+            return []
+        return [self._from_fs(path, f) for f in files]
+
+    def rm(self, path: EOS, recursive: bool) -> bool:
+        fs, p = self._resolve(path)
+        return EOS.op(["rm", "-r" if recursive else "", path], lambda: fs.rm(p, recursive=recursive))[0]
+
+    def mkdir(self, path: EOS, recursive: bool) -> bool:
+        fs, p = self._resolve(path)
+        if recursive:
+            func = lambda: fs.makedirs(p, exist_ok=True)
+        else:
+            func = lambda: fs.mkdir(p, create_parents=False)
+        return EOS.op(["mkdir", "-p" if recursive else "", path], func)[0]
+
+    def _copy(self, src: EOS, dst: EOS, overwrite: bool, recursive: bool):
+        fs_src, p_src = self._resolve(src)
+        fs_dst, p_dst = self._resolve(dst)
+        if not overwrite and fs_dst.exists(p_dst):
+            raise FileExistsError(f'"{dst}" already exists')
+        local_src, local_dst = self._is_local_fs(fs_src), self._is_local_fs(fs_dst)
+        if local_src and local_dst:
+            if recursive and os.path.isdir(p_src):
+                shutil.copytree(p_src, p_dst, dirs_exist_ok=overwrite)
+            else:
+                shutil.copyfile(p_src, p_dst)
+        elif local_src:
+            fs_dst.put(p_src, p_dst, recursive=recursive)
+        elif local_dst:
+            fs_src.get(p_src, p_dst, recursive=recursive)
+        else:
+            if recursive:
+                raise NotImplementedError(
+                    f"`{EOS.cp.__qualname__}()` does not support recursive copying between remote files"
+                )
+            with fs_src.open(p_src, "rb") as fsrc, fs_dst.open(p_dst, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst, 1 << 24)
+
+    def cp(self, src: EOS, dst: EOS, overwrite: bool, recursive: bool) -> bool:
+        return EOS.op(
+            ["cp", "-r" if recursive else "", "-f" if overwrite else "", src, dst],
+            lambda: self._copy(src, dst, overwrite, recursive),
+        )[0]
+
+    def mv(self, src: EOS, dst: EOS, overwrite: bool) -> bool:
+        fs, p_src = self._resolve(src)
+        _, p_dst = self._resolve(dst)
+
+        def move():
+            if not overwrite and fs.exists(p_dst):
+                raise FileExistsError(f'"{dst}" already exists')
+            fs.mv(p_src, p_dst)
+
+        return EOS.op(["mv", src, dst], move)[0]
+
+    def stat(self, path: EOS) -> os.stat_result:
+        fs, p = self._resolve(path)
+        ok, info = EOS.op(["stat", path], lambda: fs.info(p))
+        if ok and isinstance(info, dict):
+            return _stat_result(info)
+        raise FileNotFoundError(str(path))
+
+    def _map(self, func, *iterables):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return [*pool.map(func, *iterables)]
+
+    def exists_many(self, paths: list[EOS]) -> list[bool]:
+        return self._map(self.exists, paths)
+
+    def stat_many(self, paths: list[EOS]) -> list[os.stat_result]:
+        return self._map(self.stat, paths)
+
+    def cp_many(
+        self, pairs: list[tuple[EOS, EOS]], overwrite: bool, recursive: bool
+    ) -> list[bool]:
+        return self._map(
+            lambda pair: self.cp(*pair, overwrite, recursive), pairs
+        )
+
+
+class LocalBackend(FsspecBackend):
+    """
+    A stand-in for tests. Remote paths ``root://host//path`` are mapped to ``{root}/host/path`` on the local filesystem.
+
+    Parameters
+    ----------
+    root : PathLike
+        The local directory that holds all remote hosts.
+    max_workers : int, optional, default=8
+        Number of threads used by batched operations.
+    """
+
+    def __init__(self, root: PathLike, max_workers: int = 8):
+        super().__init__(max_workers=max_workers)
+        self.root = Path(os.fspath(root))
+
+    def _host_root(self, host: str):
+        return self.root / host.rstrip("/").split("://", 1)[-1]
+
+    def _resolve(self, path: EOS):
+        fs = self._filesystem("")
+        if path.is_local:
+            return fs, str(path.path)
+        return fs, str(self._host_root(path.host) / str(path.path).lstrip("/"))
+
+    def _from_fs(self, path: EOS, name: str) -> EOS:
+        if path.is_local:
+            return EOS(name)
+        return EOS(
+            "/" + os.path.relpath(name, self._host_root(path.host)), path.host
+        )
+
+
+_ENV_BACKEND = "EOS_BACKEND"
+_ENV_STAT_TTL = "EOS_STAT_TTL"
+_ENV_MAX_WORKERS = "EOS_MAX_WORKERS"
+
+EOS.backend = ShellBackend()
+EOS.configure(
+    backend=os.environ.get(_ENV_BACKEND) or None,
+    stat_ttl=os.environ.get(_ENV_STAT_TTL) or None,
+    max_workers=os.environ.get(_ENV_MAX_WORKERS) or None,
+)
@@ -0,0 +1,16 @@
+"""
+Memory usage of the current process.
+"""
+import os
+
+
+def rss() -> int:
+    """Resident set size of the current process in bytes. Without ``/proc``, the peak RSS is returned instead."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+
+        # in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+from collections import deque
+sys.path.insert(0, os.getcwd())
+
+from base_class.system.eos import EOS, EOSError, FsspecBackend, LocalBackend, ShellBackend
+
+
+#
+# python base_class/tests/eos_backend_test.py
+#
+
+class CountingBackend(LocalBackend):
+    def __init__(self, root):
+        super().__init__(root)
+        self.calls = 0
+
+    def exists(self, path):
+        self.calls += 1
+        return super().exists(path)
+
+
+class EOSBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.backend, self.history, self.ttl, self.run = EOS.backend, EOS.history, EOS.stat_ttl, EOS.run
+        EOS.backend = LocalBackend(os.path.join(self.tmpdir.name, 'remote'))
+        self.local = EOS(os.path.join(self.tmpdir.name, 'local'))
+        self.local.mkdir(recursive=True)
+        self.remote = EOS('root://eos.test//store/user/test')
+
+    def tearDown(self):
+        EOS.backend, EOS.history, EOS.stat_ttl, EOS.run = self.backend, self.history, self.ttl, self.run
+        EOS._stat_cache.clear()
+        self.tmpdir.cleanup()
+
+    def _write(self, path, content='test'):
+        with open(path, 'w') as f:
+            f.write(content)
+        return EOS(path)
+
+    def test_operations(self):
+        src = self._write(self.local / 'file.txt')
+        self.assertFalse(self.remote.exists)
+        self.assertEqual(self.remote.mkdir(recursive=True), self.remote)
+        self.assertTrue(self.remote.exists)
+
+        remote_file = src.copy_to(self.remote / 'file.txt')
+        self.assertEqual(remote_file, self.remote / 'file.txt')
+        self.assertEqual(self.remote.ls(), [remote_file])
+        self.assertEqual(remote_file.stat().st_size, 4)
+        with self.assertRaises(EOSError):
+            src.copy_to(remote_file)
+
+        moved = remote_file.move_to(self.remote / 'moved.txt')
+        self.assertEqual(self.remote.ls(), [moved])
+        back = moved.move_to(self.local / 'back.txt')
+        self.assertTrue(back.exists)
+        self.assertFalse(moved.exists)
+        self.assertTrue(self.remote.rm(recursive=True))
+        self.assertFalse(self.remote.exists)
+
+    def test_batched(self):
+        sources = [self._write(self.local / f'file{i}.txt', str(i)) for i in range(20)]
+        pairs = [(src, self.remote / 'batch' / src.name) for src in sources]
+        results = EOS.cp_many(pairs, parents=True)
+        self.assertEqual(results, [dst for _, dst in pairs])
+        self.assertEqual(EOS.exists_many(*(dst for _, dst in pairs), self.remote / 'missing'), [True] * 20 + [False])
+        self.assertEqual([s.st_size for s in EOS.stat_many(*(dst for _, dst in pairs))], [len(str(i)) for i in range(20)])
+
+    def test_stat_cache(self):
+        EOS.backend = CountingBackend(os.path.join(self.tmpdir.name, 'remote'))
+        EOS.stat_ttl = 60
+        path = self.remote / 'cached.txt'
+        for _ in range(10):
+            self.assertFalse(path.exists)
+        self.assertEqual(EOS.backend.calls, 1)
+        self._write(self.local / 'cached.txt').copy_to(path, parents=True)
+        self.assertTrue(path.exists)
+        self.assertEqual(EOS.backend.calls, 2)
+
+    def test_stat_cache_invalidation(self):
+        EOS.backend = CountingBackend(os.path.join(self.tmpdir.name, 'remote'))
+        EOS.stat_ttl = 60
+        sibling, parent, path = self.remote / 'sibling.txt', self.remote, self.remote / 'written.txt'
+        for p in (sibling, parent, path):
+            self.assertFalse(p.exists)
+        self.assertEqual(EOS.backend.calls, 3)
+        self._write(self.local / 'written.txt').copy_to(path, parents=True)
+        # the written path and its parents are queried again, the sibling is not
+        self.assertEqual([p.exists for p in (sibling, parent, path)], [False, True, True])
+        self.assertEqual(EOS.backend.calls, 5)
+
+    def test_dry_run(self):
+        EOS.run = False
+        path = self.remote / 'dry' / 'file.txt'
+        for backend in (ShellBackend(), LocalBackend(os.path.join(self.tmpdir.name, 'remote'))):
+            EOS.backend = backend
+            with self.subTest(backend=type(backend).__name__):
+                self.assertTrue(path.exists)
+                self.assertEqual(EOS.exists_many(path, self.remote), [True, True])
+                self.assertEqual(path.ls(), [])
+                self.assertEqual(path.parent.mkdir(recursive=True), path.parent)
+                self.assertEqual(EOS.cp(self.local / 'file.txt', path), path)
+                self.assertEqual(EOS.mv(path, self.remote / 'moved.txt'), self.remote / 'moved.txt')
+                self.assertTrue(path.rm())
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, 'remote')))
+
+    def test_configure(self):
+        env = EOS.configure(backend='fsspec', stat_ttl=30, max_workers=4)
+        self.assertIsInstance(EOS.backend, FsspecBackend)
+        self.assertEqual((EOS.stat_ttl, EOS.backend.max_workers), (30, 4))
+        with self.assertRaises(ValueError):
+            EOS.configure(backend='xrootd')
+
+        # a new process starts with the same settings
+        output = subprocess.check_output(
+            [sys.executable, '-c', 'from base_class.system.eos import EOS; print(type(EOS.backend).__name__, EOS.stat_ttl, EOS.backend.max_workers)'],
+            env=os.environ | env, cwd=os.getcwd())
+        self.assertEqual(output.decode().split(), ['FsspecBackend', '30.0', '4'])
+
+    def test_history(self):
+        EOS.history = None
+        self.remote.mkdir(recursive=True)
+        EOS.history = deque(maxlen=2)
+        for i in range(5):
+            (self.remote / str(i)).mkdir()
+        self.assertEqual(len(EOS.history), 2)
+        self.assertTrue(EOS.history[-1][1].endswith('/store/user/test/4'))
+
+    def test_shell_local(self):
+        EOS.backend = ShellBackend()
+        src = self._write(self.local / 'file.txt')
+        dst = src.copy_to(self.local / 'sub' / 'file.txt', parents=True)
+        self.assertTrue(dst.exists)
+        self.assertEqual(EOS.exists_many(src, dst, self.local / 'missing'), [True, True, False])
+        self.assertEqual((self.local / 'sub').ls(), [dst])
+
+
+if __name__ == '__main__':
+    unittest.main()
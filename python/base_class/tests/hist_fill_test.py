@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import numpy as np
+
+from base_class.hist import Collection, Fill
+
+
+#
+# python base_class/tests/hist_fill_test.py
+#
+
+PROCESSES = ['data', 'TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu', 'HH4b', 'ZZ4b', 'ZH4b']
+YEARS = ['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18']
+TAGS = ['threeTag', 'fourTag']
+REGIONS = ['SR', 'SB']
+
+
+def make_events(n, seed=0):
+    rng = np.random.default_rng(seed)
+    nJet = rng.integers(4, 12, n)
+    events = {
+        'weight': rng.exponential(1.0, n),
+        'm4j': rng.uniform(0, 1200, n),
+        'passPreSel': rng.random(n) < 0.8,
+        'Jet': ak.zip({
+            'pt': ak.unflatten(rng.exponential(60, nJet.sum()) + 40, nJet),
+            'eta': ak.unflatten(rng.uniform(-2.5, 2.5, nJet.sum()), nJet),
+        }),
+    }
+    for name, values in (('process', PROCESSES), ('year', YEARS)):
+        choice = rng.integers(0, len(values), n)
+        events[name] = ak.zip({v: choice == i for i, v in enumerate(values)})
+    fourTag = rng.random(n) < 0.3
+    events['tag'] = ak.zip({'threeTag': ~fourTag, 'fourTag': fourTag})
+    region = rng.integers(0, 3, n)
+    # overlapping regions are allowed
+    events['region'] = ak.zip({'SR': region == 0, 'SB': (region == 1) | (rng.random(n) < 0.05)})
+    return ak.zip(events, depth_limit=1)
+
+
+def book():
+    hist = Collection(process=PROCESSES, year=YEARS, tag=TAGS, region=REGIONS, passPreSel=...)
+    fill = Fill(weight='weight')
+    fill += hist.add('m4j', (120, 0, 1200, ('m4j', 'm4j')))
+    fill += hist.add('jet_pt', (100, 0, 500, ('Jet.pt', 'pt')))
+    fill += hist.add('jet_eta', (50, -2.5, 2.5, ('Jet.eta', 'eta')))
+    fill += hist.add('jet_pt_eta', (50, 0, 500, ('Jet.pt', 'pt')), (25, -2.5, 2.5, ('Jet.eta', 'eta')))
+    return hist, fill
+
+
+def fill_by_cell(events):
+    """Reference: fill each category cell of the underlying hists separately with a boolean mask, without Fill."""
+    hist, _ = book()
+    for p in PROCESSES:
+        for y in YEARS:
+            for t in TAGS:
+                for r in REGIONS:
+                    masked = events[events.process[p] & events.year[y] & events.tag[t] & events.region[r]]
+                    cell = dict(process=p, year=y, tag=t, region=r)
+                    nJet = ak.to_numpy(ak.num(masked.Jet))
+                    event = dict(passPreSel=ak.to_numpy(masked.passPreSel), weight=ak.to_numpy(masked.weight))
+                    jet = {k: np.repeat(v, nJet) for k, v in event.items()}
+                    pt, eta = ak.to_numpy(ak.flatten(masked.Jet.pt)), ak.to_numpy(ak.flatten(masked.Jet.eta))
+                    hist._hists['m4j'].fill(**cell, **event, m4j=ak.to_numpy(masked.m4j))
+                    hist._hists['jet_pt'].fill(**cell, **jet, **{'Jet.pt': pt})
+                    hist._hists['jet_eta'].fill(**cell, **jet, **{'Jet.eta': eta})
+                    hist._hists['jet_pt_eta'].fill(**cell, **jet, **{'Jet.pt': pt, 'Jet.eta': eta})
+    return hist
+
+
+def fill_single_pass(events):
+    hist, fill = book()
+    fill.fill(events, hist)
+    return hist
+
+
+class HistFillTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.events = make_events(20_000)
+
+    def test_bin_by_bin(self):
+        expected = fill_by_cell(self.events)
+        result = fill_single_pass(self.events)
+        for name, h in expected._hists.items():
+            r = result._hists[name]
+            self.assertEqual(h.axes, r.axes)
+            self.assertGreater(h.sum(flow=True).value, 0)
+            for field in ('value', 'variance'):
+                self.assertTrue(np.allclose(h.view(flow=True)[field], r.view(flow=True)[field]),
+                                f'{name} {field} mismatch')
+
+    def test_category_index(self):
+        hist, _ = book()
+        index, cells = hist._category_index(self.events, ['process', 'year', 'tag', 'region'])
+        expected = 0
+        for p in PROCESSES:
+            for y in YEARS:
+                for t in TAGS:
+                    for r in REGIONS:
+                        mask = ak.to_numpy(self.events.process[p] & self.events.year[y] & self.events.tag[t] & self.events.region[r])
+                        selected = (cells['process'] == p) & (cells['year'] == y) & (cells['tag'] == t) & (cells['region'] == r)
+                        self.assertTrue(np.array_equal(index[selected], np.nonzero(mask)[0]))
+                        expected += mask.sum()
+        self.assertEqual(len(index), expected)
+        self.assertTrue(np.all(np.diff(index) >= 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
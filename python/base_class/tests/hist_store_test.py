@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+from coffea.util import save
+from hist import Hist, loc
+from hist.axis import IntCategory, Regular, StrCategory
+
+from base_class.hist import Collection, Fill
+from base_class.hist.store import HistStore, LazyHists, save as save_store
+from base_class.plots.plots import load_hists
+from base_class.tests.hist_fill_test import PROCESSES, REGIONS, TAGS, YEARS, make_events
+
+
+#
+# python base_class/tests/hist_store_test.py
+#
+
+def make_output(nHists, nEvents=20_000):
+    hist = Collection(process=PROCESSES, year=YEARS, tag=TAGS, region=REGIONS, passPreSel=...)
+    fill = Fill(weight='weight')
+    for i in range(nHists):
+        fill += hist.add(f'm4j_{i}', (120, 0, 1200, ('m4j', 'm4j')))
+        fill += hist.add(f'jet_pt_eta_{i}', (50, 0, 500, ('Jet.pt', 'pt')), (25, -2.5, 2.5, ('Jet.eta', 'eta')))
+    fill.fill(make_events(nEvents), hist)
+    output = hist.output
+    output['nEvent'] = {'test': nEvents}
+    return output
+
+
+def make_fixed():
+    # non-growth categories with overflow and metadata
+    h = Hist(
+        StrCategory(['a', 'b', 'c'], name='process', label='Process', __dict__={'color': 'red'}),
+        IntCategory([3, 4], name='tag', label='Tag', overflow=False),
+        Regular(10, 0, 1, name='x', label='$x$', underflow=False),
+        name='fixed', label='Entries', metadata={'unit': 'GeV'})
+    rng = np.random.default_rng(0)
+    h.fill(process=rng.choice(['a', 'b', 'c', 'd'], 1000), tag=rng.choice([3, 4], 1000), x=rng.uniform(0, 1.1, 1000))
+    return h
+
+
+class HistStoreTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output = make_output(100)
+        self.output['hists']['fixed'] = make_fixed()
+        self.coffea = os.path.join(self.tmpdir.name, 'hists.coffea')
+        self.h5 = os.path.join(self.tmpdir.name, 'hists.h5')
+        save(self.output, self.coffea)
+        save_store(self.output, self.h5)
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _assert_equal(self, a, b):
+        self.assertEqual(a, b)
+        self.assertEqual([ax.__dict__ for ax in a.axes], [ax.__dict__ for ax in b.axes])
+        self.assertEqual([ax.traits for ax in a.axes], [ax.traits for ax in b.axes])
+        self.assertEqual(a.__dict__, b.__dict__)
+
+    def test_roundtrip(self):
+        store = HistStore(self.h5)
+        self.assertEqual(set(store.keys()), set(self.output['hists']))
+        for name, h in self.output['hists'].items():
+            self._assert_equal(store[name], h)
+        output = load_hists([self.h5])[0]
+        self.assertEqual(output['nEvent'], self.output['nEvent'])
+        self.assertEqual(output['categories'], self.output['categories'])
+
+    def test_select(self):
+        store = HistStore(self.h5)
+        h = self.output['hists']['jet_pt_eta_0']
+        selected = store.get('jet_pt_eta_0', process=['ZZ4b', 'data'], year='UL18', passPreSel=True)
+        self.assertEqual([*selected.axes['process']], ['ZZ4b', 'data'])
+        self.assertEqual([*selected.axes['year']], ['UL18'])
+        for process in ['ZZ4b', 'data']:
+            sel = {'process': process, 'year': 'UL18', 'passPreSel': True}
+            self.assertTrue(np.array_equal(selected[sel].values(flow=True), h[sel].values(flow=True)))
+        self.assertEqual(selected[{'passPreSel': False}].sum(flow=True).value, 0)
+
+    def test_select_overflow(self):
+        store = HistStore(self.h5)
+        h = self.output['hists']['fixed']
+        for selection, index in [
+            ({'process': ['c', 'a']}, {'process': ['c', 'a']}),
+            ({'process': 'b', 'tag': 4}, {'process': ['b'], 'tag': [loc(4)]}),
+            ({'tag': [4, 3]}, {'tag': [loc(4), loc(3)]}),
+        ]:
+            self._assert_equal(store.get('fixed', **selection), h[index])
+
+    def test_lazy(self):
+        hists = LazyHists(HistStore(self.h5))
+        h = hists['m4j_0']
+        self.assertIs(hists['m4j_0'], h)
+        hists['m4j_sum'] = h + hists['m4j_1']
+        del hists['m4j_0']
+        self.assertNotIn('m4j_0', hists)
+        self.assertIn('m4j_sum', hists)
+        self.assertEqual(len(hists), len(self.output['hists']))
+        with self.assertRaises(KeyError):
+            hists['m4j_0']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import unittest.mock
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import hist
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from base_class.hist import Collection
+from base_class.plots import jobs as plot_jobs
+from base_class.plots import plots
+from base_class.plots.jobs import plan_jobs, project, render, run_jobs
+from base_class.plots.plots import _select, get_cut_dict, load_config, makePlot, read_axes_and_cuts
+
+
+#
+# python base_class/tests/plot_jobs_test.py
+#
+
+PROCESSES = ['data', 'TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu', 'HH4b', 'ZZ4b', 'ZH4b']
+YEARS = ['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18']
+VAR_2D = 'quadJet_selected.lead_vs_subl_m'
+
+
+def make_output(nVars, seed=0):
+    rng = np.random.default_rng(seed)
+    hist = Collection(process=PROCESSES, year=YEARS, tag=[3, 4, 0], region=[2, 1, 0],
+                      passPreSel=..., failSvB=..., passSvB=...)
+    for i in range(nVars):
+        hist.add(f'var{i}.x', (60, 0, 300, ('x', 'x')))
+    hist.add(VAR_2D, (50, 0, 250, ('lead', 'lead')), (50, 0, 250, ('subl', 'subl')))
+    output = hist.output
+    for h in output['hists'].values():
+        view = h.view(flow=True)
+        view['value'] = rng.exponential(1, view.shape)
+        view['variance'] = view['value']
+    return output
+
+
+class PlotJobsTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.plotConfig = load_config('analysis/metadata/plotsAll.yml')
+        self.output = make_output(24)
+        _, self.cutList = read_axes_and_cuts([self.output], self.plotConfig)
+        self.modifiers = {VAR_2D: {'2d': True}}
+        self.varList = list(self.output['hists'])
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def test_plan(self):
+        jobs = plan_jobs(self.varList, self.modifiers, self.plotConfig)
+        self.assertEqual(sum(job['kind'] == '1d' for job in jobs), 2 * 24)
+        self.assertEqual(sum(job['kind'] == '2d' for job in jobs), 2 * 4)
+
+    def test_project(self):
+        jobs = plan_jobs(self.varList, self.modifiers, self.plotConfig)
+        projected = project(self.output, jobs, self.cutList, self.plotConfig)
+        self.assertEqual(len(projected), len(self.varList))
+        h, p = self.output['hists']['var0.x'], projected['var0.x', 'passPreSel']
+        self.assertEqual(p.axes.name, ('process', 'tag', 'region', 'x'))
+        for process in PROCESSES:
+            for tag in [3, 4]:
+                selection = {'process': process, 'year': sum, 'tag': hist.loc(tag), 'region': hist.loc(2)}
+                selection |= get_cut_dict('passPreSel', self.cutList)
+                self.assertTrue(np.allclose(h[selection].values(flow=True), _select(p, selection).values(flow=True)))
+
+        kwargs = {'var': 'var0.x', 'cut': 'passPreSel', 'region': 'SR', 'doRatio': False, 'rebin': 2}
+        _, ax_full = makePlot(self.output, self.cutList, self.plotConfig, **kwargs)
+        _, ax_projected = makePlot({'hists': {'var0.x': p}}, self.cutList, self.plotConfig, **kwargs)
+        self.assertTrue(np.allclose(ax_full.lines[-1].get_ydata(), ax_projected.lines[-1].get_ydata()))
+
+    def test_cache(self):
+        outputFolder = os.path.join(self.tmpdir.name, 'cache')
+        jobs = plan_jobs(self.varList, self.modifiers, self.plotConfig, outputFolder=outputFolder)
+        report = run_jobs(jobs, self.output, self.cutList, self.plotConfig, workers=2, cache=outputFolder)
+        self.assertEqual(report['rendered'], len(jobs))
+
+        report = run_jobs(jobs, self.output, self.cutList, self.plotConfig, workers=2, cache=outputFolder)
+        self.assertEqual(report['skipped'], len(jobs))
+
+        changed = make_output(24)
+        changed['hists']['var3.x'] = make_output(24, seed=1)['hists']['var3.x']
+        report = run_jobs(jobs, changed, self.cutList, self.plotConfig, workers=2, cache=outputFolder)
+        self.assertEqual(report['rendered'], 2)
+
+    def test_version(self):
+        version = plot_jobs._version()
+        self.assertEqual(version, plot_jobs._version())
+        with unittest.mock.patch.object(plot_jobs, '_LIBRARIES', plot_jobs._LIBRARIES + ('pyyaml',)):
+            self.assertNotEqual(version, plot_jobs._version())
+
+    def test_saved_files(self):
+        outputFolder = os.path.join(self.tmpdir.name, 'saved')
+        jobs = plan_jobs(self.varList, self.modifiers, self.plotConfig, outputFolder=outputFolder)[:3]
+        for job in jobs:
+            projected = project(self.output, [job], self.cutList, self.plotConfig)
+            files = render(job, {'hists': {job['var']: projected[job['var'], 'passPreSel']}}, self.cutList, self.plotConfig)
+            self.assertEqual(len(files), 1)
+            self.assertEqual(plots.saved_files, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import uproot
+
+from base_class.root import Chunk, TreeReader, TreeWriter
+from base_class.root._cache import FileCache
+
+
+#
+# python base_class/tests/root_cache_test.py
+#
+
+class RootCacheTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.nFiles = 50
+        self.nEntries = 1000
+        self.nRepeat = 10
+        self.paths = []
+        for i in range(self.nFiles):
+            path = os.path.join(self.tmpdir.name, f'chunk{i}.root')
+            with uproot.recreate(path) as f:
+                f['Events'] = {
+                    'event': np.arange(i * self.nEntries, (i + 1) * self.nEntries),
+                    'x': np.random.rand(self.nEntries),
+                }
+            self.paths.append(path)
+
+    @classmethod
+    def tearDownClass(self):
+        FileCache.clear()
+        self.tmpdir.cleanup()
+
+    def _read_chain(self):
+        chunks = [Chunk(path) for path in self.paths]
+        reader = TreeReader()
+        for _ in range(self.nRepeat):
+            data = reader.concat(*chunks, library='np')
+        return data
+
+    def test_cache_saves_opens(self):
+        maxsize = FileCache.maxsize
+        try:
+            FileCache.clear()
+            FileCache.maxsize = 0
+            uncached = self._read_chain()
+            opens_uncached = FileCache.opens
+
+            FileCache.clear()
+            FileCache.maxsize = maxsize
+            cached = self._read_chain()
+            opens_cached = FileCache.opens
+        finally:
+            FileCache.maxsize = maxsize
+
+        self.assertEqual(opens_cached, self.nFiles)
+        self.assertLess(opens_cached, opens_uncached)
+        for k in ('event', 'x'):
+            self.assertTrue(np.array_equal(cached[k], uncached[k]))
+
+    def test_invalidate_on_rewrite(self):
+        FileCache.clear()
+        path = os.path.join(self.tmpdir.name, 'rewrite.root')
+        for n in (10, 20):
+            with uproot.recreate(path) as f:
+                f['Events'] = {'x': np.zeros(n)}
+            os.utime(path, ns=(n, n))
+            self.assertEqual(Chunk(path, fetch=True).num_entries, n)
+
+    def test_integrity_bypasses_cache(self):
+        FileCache.clear()
+        path = os.path.join(self.tmpdir.name, 'remote.root')
+        try:
+            # emulate a remote file that is keyed by path only
+            FileCache._key = lambda path: (str(path), None, None)
+            for n in (10, 20):
+                with uproot.recreate(path) as f:
+                    f['Events'] = {'x': np.zeros(n)}
+                chunk = Chunk(path, fetch=True)
+                self.assertEqual(chunk.integrity().num_entries, n)
+        finally:
+            del FileCache._key
+
+    def test_writer_evicts_output(self):
+        FileCache.clear()
+        path = os.path.join(self.tmpdir.name, 'remote_output.root')
+        try:
+            # emulate a remote output that is keyed by path only
+            FileCache._key = lambda path: (str(path), None, None)
+            for n in (10, 20):
+                with TreeWriter()(path) as writer:
+                    writer.extend({'x': np.arange(n)})
+                data = TreeReader().arrays(Chunk(path), library='np')
+                self.assertTrue(np.array_equal(data['x'], np.arange(n)))
+        finally:
+            del FileCache._key
+
+    def test_from_path_after_fork(self):
+        FileCache.clear()
+        chunks = [Chunk(path, fetch=True) for path in self.paths]
+        forked = Chunk.from_path(*((path, 'Events') for path in self.paths), n_process=2)
+        for chunk, fetched in zip(chunks, forked):
+            self.assertEqual(chunk.uuid, fetched.uuid)
+            self.assertEqual(chunk.num_entries, fetched.num_entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
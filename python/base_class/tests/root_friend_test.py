@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import dask
+import numpy as np
+import uproot
+
+from base_class.root import Chunk, Friend
+
+
+#
+# python base_class/tests/root_friend_test.py
+#
+
+class RootFriendTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.nEntries = 50_000
+        self.nFragments = 500
+        self.partition = 7_000
+        path = os.path.join(self.tmpdir.name, 'target.root')
+        with uproot.recreate(path) as f:
+            f['Events'] = {'event': np.arange(self.nEntries)}
+        self.target = Chunk(path, fetch=True)
+
+        self.friend = self._make_friend(os.path.join(self.tmpdir.name, 'fragments'))
+        self.targets = [self.target.slice(start, min(start + self.partition, self.nEntries)) for start in range(0, self.nEntries, self.partition)]
+
+    @classmethod
+    def _make_friend(self, directory):
+        # fragments of random sizes
+        rng = np.random.default_rng(0)
+        edges = np.unique(np.concatenate([[0, self.nEntries], rng.choice(np.arange(1, self.nEntries), self.nFragments - 1, replace=False)]))
+        friend = Friend('test')
+        os.makedirs(directory)
+        for start, stop in zip(edges[:-1], edges[1:]):
+            fragment = os.path.join(directory, f'friend_{start}_{stop}.root')
+            with uproot.recreate(fragment) as f:
+                f['Events'] = {'x': np.arange(start, stop) * 2.0, 'y': np.arange(start, stop) % 7}
+            friend.add(self.target.slice(start, stop), Chunk(fragment, fetch=True))
+        return friend
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _check(self, data, start=0, stop=None):
+        stop = self.nEntries if stop is None else stop
+        self.assertTrue(np.array_equal(np.asarray(data['x']), np.arange(start, stop) * 2.0))
+        self.assertTrue(np.array_equal(np.asarray(data['y']), np.arange(start, stop) % 7))
+
+    def test_arrays(self):
+        for target in self.targets:
+            self._check(self.friend.arrays(target, library='np'), target.entry_start, target.entry_stop)
+
+    def test_dask(self):
+        (data,) = dask.compute(self.friend.dask(*self.targets, library='ak'))
+        self._check(data)
+        self.assertEqual(self.friend.dask(*self.targets).npartitions, len(self.targets))
+        (data,) = dask.compute(self.friend.dask(*self.targets, library='np'))
+        self._check(data)
+
+    def test_missing_entries(self):
+        friend = Friend('missing')
+        for item in self.friend._data[Friend._construct_key(self.target)][1:]:
+            friend.add(self.target.slice(item.start, item.stop), item.chunk)
+        with self.assertRaises(ValueError):
+            friend.arrays(self.targets[0])
+
+    def test_merge_time(self):
+        # merge() moves the fragments, use a separate copy
+        friend = self._make_friend(os.path.join(self.tmpdir.name, 'fragments_merge'))
+        start = time.perf_counter()
+        (data,) = dask.compute(friend.dask(*self.targets, library='np'))
+        elapsed_direct = time.perf_counter() - start
+        self._check(data)
+
+        merged_path = os.path.join(self.tmpdir.name, 'merged')
+        start = time.perf_counter()
+        merged = friend.merge(step=10_000, base_path=merged_path, naming='{name}_{start}_{stop}.root')
+        (data,) = dask.compute(merged.dask(*self.targets, library='np'))
+        elapsed_merge = time.perf_counter() - start
+        self._check(data)
+        written = sum(entry.stat().st_size for entry in os.scandir(merged_path))
+
+        print(f'\n{self.nEntries} entries in {self.nFragments} fragments, {len(self.targets)} partitions')
+        print(f'  cross-file dask = {elapsed_direct:.3f}s, 0 bytes written')
+        print(f'  merge + dask    = {elapsed_merge:.3f}s, {written} bytes written')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.getcwd())
+
+import awkward as ak
+import dask
+import numpy as np
+import uproot
+
+from base_class.awkward.zip import NanoAOD
+from base_class.root import Chunk, TreeReader, merge
+
+
+#
+# python base_class/tests/root_merge_test.py
+#
+
+class CountingSource(uproot.source.file.MemmapSource):
+    """Count the bytes requested from all files opened with this source."""
+    lock = threading.Lock()
+    requested = 0
+
+    @classmethod
+    def _count(cls, nbytes):
+        with cls.lock:
+            cls.requested += nbytes
+
+    def chunk(self, start, stop):
+        self._count(stop - start)
+        return super().chunk(start, stop)
+
+    def chunks(self, ranges, notifications):
+        self._count(sum(stop - start for start, stop in ranges))
+        return super().chunks(ranges, notifications)
+
+
+class RootMergeTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.nFiles = 200
+        self.chunk_size = 2_000
+        self.step = 500
+        self.options = {'transform': NanoAOD(regular=False, jagged=True)}
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _make_sources(self, directory):
+        # small skim outputs of random sizes with a jagged collection
+        rng = np.random.default_rng(0)
+        os.makedirs(directory)
+        sources, start = [], 0
+        for i in range(self.nFiles):
+            size = int(rng.integers(1, 60))
+            nJet = rng.integers(0, 6, size)
+            path = os.path.join(directory, f'picoAOD_{i}.root')
+            with uproot.recreate(path) as f:
+                f['Events'] = {
+                    'event': np.arange(start, start + size),
+                    'Jet': ak.zip({'pt': ak.unflatten(rng.exponential(40, nJet.sum()), nJet)}),
+                }
+            sources.append(Chunk(path, fetch=True))
+            start += size
+        return sources, start
+
+    def _run(self, name, func):
+        sources, nEntries = self._make_sources(os.path.join(self.tmpdir.name, name))
+        output = os.path.join(self.tmpdir.name, f'{name}_merged', 'picoAOD.root')
+        CountingSource.requested = 0
+        (chunks,) = dask.compute(func(output, *sources, step=self.step, chunk_size=self.chunk_size, reader_options=self.options | {'handler': CountingSource}, dask=True))
+        self.assertFalse(any(os.path.exists(chunk.path) for chunk in sources))
+        self.assertTrue(all(len(chunk) <= self.chunk_size for chunk in chunks))
+        data = TreeReader(**self.options).concat(*chunks, library='ak')
+        self.assertTrue(np.array_equal(ak.to_numpy(data['event']), np.arange(nEntries)))
+        return data, CountingSource.requested
+
+    def test_stream(self):
+        resized, resize_read = self._run('resize', merge.resize)
+        streamed, stream_read = self._run('stream', merge.stream)
+        self.assertEqual(ak.to_list(streamed['Jet', 'pt']), ak.to_list(resized['Jet', 'pt']))
+        self.assertGreater(stream_read, 0)
+        self.assertLess(stream_read, resize_read)
+
+    def test_move_whole(self):
+        sources, nEntries = self._make_sources(os.path.join(self.tmpdir.name, 'whole'))
+        chunks = merge.stream(os.path.join(self.tmpdir.name, 'whole_merged', 'picoAOD.root'), sources[0], step=self.step, reader_options=self.options)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0].uuid, sources[0].uuid)
+        self.assertFalse(os.path.exists(sources[0].path))
+
+
+if __name__ == '__main__':
+    unittest.main()
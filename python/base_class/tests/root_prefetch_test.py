@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import uproot
+
+from base_class.root import Chunk, TreeReader
+
+
+#
+# python base_class/tests/root_prefetch_test.py
+#
+
+class RootPrefetchTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.chunks = []
+        start = 0
+        for i, n in enumerate((1000, 137, 2500, 1, 999, 4096)):
+            path = os.path.join(self.tmpdir.name, f'chunk{i}.root')
+            with uproot.recreate(path) as f:
+                f['Events'] = {
+                    'event': np.arange(start, start + n),
+                    'x': np.random.rand(n),
+                }
+            start += n
+            self.chunks.append(Chunk(path, fetch=True))
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _compare(self, expected, result):
+        self.assertEqual(len(expected), len(result))
+        for e, r in zip(expected, result):
+            for k in ('event', 'x'):
+                self.assertTrue(np.array_equal(e[k], r[k]))
+
+    def test_iterate(self):
+        reader = TreeReader()
+        for mode in ('partition', 'balance'):
+            for step in (..., 100, 777):
+                expected = [*reader.iterate(*self.chunks, step=step, mode=mode, library='np')]
+                for prefetch in (1, 4):
+                    with self.subTest(mode=mode, step=step, prefetch=prefetch):
+                        result = [*reader.iterate(*self.chunks, step=step, mode=mode, library='np', prefetch=prefetch)]
+                        self._compare(expected, result)
+                with self.subTest(mode=mode, step=step, pool='process'):
+                    with ProcessPoolExecutor(max_workers=2) as pool:
+                        result = [*reader.iterate(*self.chunks, step=step, mode=mode, library='np', prefetch=2, pool=pool)]
+                    self._compare(expected, result)
+
+    def test_iterate_early_stop(self):
+        reader = TreeReader()
+        expected = next(reader.iterate(*self.chunks, step=100, library='np'))
+        result = next(reader.iterate(*self.chunks, step=100, library='np', prefetch=4))
+        self._compare([expected], [result])
+
+    def test_concat(self):
+        reader = TreeReader()
+        expected = reader.concat(*self.chunks, library='np')
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            result = reader.concat(*self.chunks, library='np', pool=pool)
+        self._compare([expected], [result])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,281 @@
+import json
+import os
+import resource
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context as mp_get_context
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import ConcatDataset, StackDataset, Subset
+
+from base_class.system.eos import EOS
+from classifier.config.dataset.cache import _load_cache, _load_npy_cache, _npy_column
+from classifier.config.main.cache import _save_cache
+from classifier.config.model._kfold import _split
+from classifier.config.setting.HCR import InputBranch
+from classifier.discriminator.HCR import _HCRSkim
+from classifier.nn.blocks import HCR
+from classifier.nn.dataset import io_loader, mp_loader
+from classifier.nn.schedule import MultiStepBS
+from classifier.process import get_context, status
+
+
+#
+# python -m pytest benchmarks/classifier_test.py --benchmark-json=benchmarks.json
+#
+
+EPOCHS = 10
+BS_INIT = 2**10
+BS_MILESTONES = (1, 3, 6)
+NUM_WORKERS = 2
+CACHE_CHUNKS = 8
+
+
+@pytest.fixture(scope='module')
+def tensors(nEvents):
+    generator = torch.Generator().manual_seed(0)
+    return StackDataset(
+        CanJet=torch.rand(nEvents, 4, 4, generator=generator),
+        ancillary=torch.rand(nEvents, 3, generator=generator),
+        label=torch.randint(0, 4, (nEvents,), generator=generator),
+        weight=torch.rand(nEvents, generator=generator),
+    )
+
+
+@pytest.fixture(scope='module', autouse=True)
+def context():
+    # same as SetupMultiprocessing
+    status.context = get_context(method='forkserver', library='torch', preload=['torch'])
+    yield
+    status.context = None
+
+
+class _Rebuild(MultiStepBS):
+    """The batch scheduler before the persistent workers, a new loader and new workers for each epoch."""
+
+    @property
+    def dataloader(self):
+        return mp_loader(self.dataset, batch_size=self._bs, **self.kwargs)
+
+
+@pytest.mark.parametrize('scheduler', [_Rebuild, MultiStepBS], ids=['rebuild', 'persistent'])
+def test_batch_schedule(benchmark, tensors, nEvents, rounds, scheduler):
+    overheads = []
+
+    def schedule():
+        bs = scheduler(tensors, batch_size=BS_INIT, milestones=BS_MILESTONES, gamma=2.0,
+                       shuffle=True, drop_last=True, num_workers=NUM_WORKERS)
+        for _ in range(EPOCHS):
+            # the overhead of an epoch is the time to the first batch
+            start = time.perf_counter()
+            loader = iter(bs.dataloader)
+            batch = next(loader)
+            overheads.append(time.perf_counter() - start)
+            assert len(batch['label']) == bs._bs
+            for _ in loader:
+                pass
+            bs.step()
+        assert bs._bs == BS_INIT * 2 ** len(BS_MILESTONES)
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.extra_info['epochs'] = EPOCHS
+    benchmark.pedantic(schedule, rounds=rounds, iterations=1)
+    benchmark.extra_info['epoch_overhead'] = sum(overheads) / len(overheads)
+
+
+def _io_loader_split(dataset, key, kfolds, max_folds):
+    """The k-fold split before the sorted cache, one pass over the split key with io_loader."""
+    offset = np.concatenate([i.numpy() % kfolds for i in io_loader(dataset.datasets[key])])
+    indices = np.arange(len(offset))
+    folds = [Subset(dataset, indices[offset == i]) for i in range(kfolds)]
+    return [(ConcatDataset(folds[:i] + folds[i + 1:]), folds[i]) for i in range(max_folds)]
+
+
+@pytest.fixture(scope='module')
+def offsets(tmp_path_factory, foldEvents):
+    """The event offset column in 4 chunks, as tensors, memory-mapped and memory-mapped sorted by the cache."""
+    path = tmp_path_factory.mktemp('kfold')
+    chunks = np.array_split(np.random.default_rng(0).integers(0, 60, foldEvents, dtype=np.uint8), 4)
+    columns = {'io_loader': [], 'column': [], 'sorted': []}
+    for i, chunk in enumerate(chunks):
+        columns['io_loader'].append(torch.from_numpy(chunk))
+        np.save(path / f'chunk{i}.npy', chunk)
+        columns['column'].append(_npy_column(str(path / f'chunk{i}.npy'), len(chunk)))
+        values, counts = np.unique(chunk, return_counts=True)
+        np.save(path / f'sorted{i}.npy', np.sort(chunk, kind='stable'))
+        columns['sorted'].append(_npy_column(str(path / f'sorted{i}.npy'), len(chunk), (values.tolist(), counts.tolist())))
+    return {k: StackDataset(offset=ConcatDataset(v)) for k, v in columns.items()}
+
+
+@pytest.mark.parametrize('kfolds', [5, 10])
+@pytest.mark.parametrize('storage', ['io_loader', 'column', 'sorted'])
+def test_kfold_split(benchmark, offsets, foldEvents, rounds, storage, kfolds):
+    split = _io_loader_split if storage == 'io_loader' else _split
+
+    benchmark.extra_info['events'] = foldEvents
+    folds = benchmark.pedantic(split, args=(offsets[storage], 'offset', kfolds, kfolds), rounds=rounds, iterations=1)
+    assert sum(len(validation) for _, validation in folds) == foldEvents
+    assert all(len(training) + len(validation) == foldEvents for training, validation in folds)
+
+
+@pytest.fixture(scope='module')
+def caches(tmp_path_factory, cacheEvents):
+    """The same synthetic training set cached with torch.save and as memory-mapped npy, written chunk by chunk."""
+    paths = {}
+    for format in ('torch', 'npy'):
+        path = tmp_path_factory.mktemp(f'cache_{format}')
+        for i, size in enumerate(np.diff(np.linspace(0, cacheEvents, CACHE_CHUNKS + 1, dtype=int))):
+            generator = torch.Generator().manual_seed(i)
+            chunk = StackDataset(
+                CanJet=torch.rand(size, 4, 4, generator=generator),
+                NotCanJet=torch.rand(size, 8, 5, generator=generator),
+                ancillary=torch.rand(size, 3, generator=generator),
+                label=torch.randint(0, 4, (size,), generator=generator),
+                weight=torch.rand(size, generator=generator),
+            )
+            _save_cache(chunk, EOS(str(path)), format)((i, np.arange(size)))
+        with open(path / 'cache.json', 'w') as f:
+            json.dump({'size': cacheEvents, 'chunksize': -(-cacheEvents // CACHE_CHUNKS), 'shuffle': False, 'format': format, 'compression': None}, f)
+        paths[format] = str(path)
+    return paths
+
+
+def _cache_startup(format, path, batch_size):
+    """Time to the first shuffled batch and peak RSS of a fresh process loading all cached chunks, in s and MiB."""
+    start = time.perf_counter()
+    if format == 'npy':
+        chunks = [_load_npy_cache(path, i)() for i in range(CACHE_CHUNKS)]
+    else:
+        chunks = [_load_cache(f'{path}/chunk{i}.pt', None)() for i in range(CACHE_CHUNKS)]
+    dataset = StackDataset(**{k: ConcatDataset([c[k] for c in chunks]) for k in chunks[0]})
+    batch = next(iter(mp_loader(dataset, batch_size=batch_size, shuffle=True, num_workers=0)))
+    assert batch['CanJet'].shape == (batch_size, 4, 4)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@pytest.mark.parametrize('format', ['torch', 'npy'])
+def test_cache_startup(benchmark, caches, cacheEvents, rounds, format):
+    results = []
+
+    def startup():
+        # a new process for each round, so the peak RSS is not shared and the page cache is the only warm state
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp_get_context('spawn')) as pool:
+            results.append(pool.submit(_cache_startup, format, caches[format], BS_INIT).result())
+
+    benchmark.extra_info['events'] = cacheEvents
+    benchmark.extra_info['cache_MiB'] = sum(os.path.getsize(os.path.join(caches[format], f)) for f in os.listdir(caches[format])) / 2**20
+    benchmark.pedantic(startup, rounds=rounds, iterations=1)
+    benchmark.extra_info['time_to_first_batch'] = min(t for t, _ in results)
+    benchmark.extra_info['peak_rss_MiB'] = max(m for _, m in results)
+
+
+HCR_INPUTS = ('CanJet', 'NotCanJet', 'ancillary')
+
+
+def _hcr_inputs(rng, n):
+    """Jet 4-vectors (pt, eta, phi, mass), other jets with isSelJet (-1 if missing) and (nSelJets, year, xbW, xW)."""
+    j = np.stack([rng.exponential(60, (n, 4)) + 40, rng.uniform(-2.5, 2.5, (n, 4)),
+                  rng.uniform(-np.pi, np.pi, (n, 4)), rng.uniform(5, 30, (n, 4))], axis=1)
+    nOther = rng.integers(0, 9, n)
+    present = np.arange(8)[np.newaxis, :] < nOther[:, np.newaxis]
+    o = np.stack([rng.exponential(40, (n, 8)) + 20, rng.uniform(-2.5, 2.5, (n, 8)),
+                  rng.uniform(-np.pi, np.pi, (n, 8)), rng.uniform(2, 20, (n, 8)),
+                  rng.integers(0, 2, (n, 8))], axis=1) * present[:, np.newaxis, :]
+    o[:, 4, :][~present] = -1
+    a = np.stack([nOther + 4, np.full(n, 8), rng.exponential(2, n), rng.exponential(2, n)], axis=1)
+    return dict(zip(HCR_INPUTS, (x.astype(np.float32) for x in (j, o, a))))
+
+
+@pytest.fixture(scope='module')
+def hcr_inputs(tmp_path_factory, gbnEvents):
+    """Memory-mapped HCR inputs, so the dataset itself does not count in the peak RSS."""
+    path = tmp_path_factory.mktemp('hcr')
+    rng = np.random.default_rng(0)
+    shapes = {'CanJet': (4, 4), 'NotCanJet': (5, 8), 'ancillary': (4,)}
+    columns = {k: np.lib.format.open_memmap(path / f'{k}.npy', mode='w+', dtype=np.float32, shape=(gbnEvents, *shape))
+               for k, shape in shapes.items()}
+    for start in range(0, gbnEvents, 1_000_000):
+        block = _hcr_inputs(rng, min(1_000_000, gbnEvents - start))
+        for k, column in columns.items():
+            column[start:start + len(block[k])] = block[k]
+    for column in columns.values():
+        column.flush()
+    return str(path)
+
+
+def _hcr():
+    return HCR(dijetFeatures=8, quadjetFeatures=8, ancillaryFeatures=InputBranch.feature_ancillary,
+               useOthJets='attention', device='cpu', nClasses=4)
+
+
+class _Concatenate(_HCRSkim):
+    """The GBN setup before the running sums, all input tensors are kept and concatenated."""
+
+    def __init__(self, nn):
+        super().__init__(nn)
+        self.tensors = defaultdict(list)
+
+    def forward(self, batch):
+        for k in HCR_INPUTS:
+            self.tensors[k].append(batch[k])
+        return {}
+
+    def finalize(self):
+        self._nn.setMeanStd(*(torch.cat(self.tensors[k]) for k in HCR_INPUTS))
+
+
+class _Running(_HCRSkim):
+    def finalize(self):
+        self._nn.setMeanStd()
+
+
+def _gbn_setup(mode, path, nEvents):
+    """Time and peak RSS of the "Setup GBN" stage of a fresh process over all events, in s and MiB."""
+    start = time.perf_counter()
+    dataset = StackDataset(**{k: _npy_column(os.path.join(path, f'{k}.npy'), nEvents) for k in HCR_INPUTS})
+    skim = (_Concatenate if mode == 'concatenate' else _Running)(_hcr())
+    # same loader as SkimStep
+    for batch in io_loader(dataset, shuffle=False, drop_last=False, num_workers=0):
+        skim.forward(batch)
+    skim.finalize()
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@pytest.mark.parametrize('mode', ['concatenate', 'running'])
+def test_gbn_setup(benchmark, hcr_inputs, gbnEvents, rounds, mode):
+    results = []
+
+    def setup():
+        # a new process for each round, so the peak RSS is not shared
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp_get_context('spawn')) as pool:
+            results.append(pool.submit(_gbn_setup, mode, hcr_inputs, gbnEvents).result())
+
+    benchmark.extra_info['events'] = gbnEvents
+    benchmark.pedantic(setup, rounds=rounds, iterations=1)
+    benchmark.extra_info['peak_rss_MiB'] = max(m for _, m in results)
+
+
+def test_gbn_running_stats():
+    """The running sums over batches give the same mean and std as all events at once."""
+    inputs = {k: torch.from_numpy(v) for k, v in _hcr_inputs(np.random.default_rng(1), 10_000).items()}
+    expected, running = _hcr(), _hcr()
+    expected.setMeanStd(*(inputs[k].clone() for k in HCR_INPUTS))
+    for start in range(0, 10_000, 3_000):
+        running.updateMeanStd(*(inputs[k][start:start + 3_000].clone() for k in HCR_INPUTS))
+    running.setMeanStd()
+    for (name, m), (_, s) in zip(expected.named_buffers(), running.named_buffers()):
+        assert torch.allclose(m, s, rtol=1e-4, atol=1e-5), name
+
+
+def test_gbn_set_resets():
+    """Setting the mean and std from a batch ignores the sums accumulated before."""
+    inputs = {k: torch.from_numpy(v) for k, v in _hcr_inputs(np.random.default_rng(1), 10_000).items()}
+    expected, reset = _hcr(), _hcr()
+    expected.setMeanStd(*(inputs[k][:5_000].clone() for k in HCR_INPUTS))
+    reset.updateMeanStd(*(inputs[k][5_000:].clone() for k in HCR_INPUTS))
+    reset.setMeanStd(*(inputs[k][:5_000].clone() for k in HCR_INPUTS))
+    for (name, m), (_, s) in zip(expected.named_buffers(), reset.named_buffers()):
+        assert torch.equal(m, s), name
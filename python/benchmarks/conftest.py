@@ -0,0 +1,69 @@
+import os
+import sys
+sys.path.insert(0, os.getcwd())
+
+import pytest
+from coffea.nanoevents import NanoAODSchema, NanoEventsFactory
+
+from base_class.root import Chunk
+from benchmarks.synthetic import triggers, write
+
+YEAR = 'UL18'
+DATASET = f'data_{YEAR}'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--synthetic-events', type=int, default=50_000, help='Number of events in the synthetic file')
+    parser.addoption('--synthetic-rounds', type=int, default=3, help='Number of rounds of each benchmark')
+    parser.addoption('--fold-events', type=int, default=20_000_000, help='Number of entries of the k-fold split benchmarks')
+    parser.addoption('--gbn-events', type=int, default=2_000_000, help='Number of entries of the classifier GBN setup benchmark')
+    parser.addoption('--cache-events', type=int, default=10_000_000, help='Number of entries of the classifier cache benchmarks')
+
+
+@pytest.fixture(scope='session')
+def nEvents(request):
+    return request.config.getoption('--synthetic-events')
+
+
+@pytest.fixture(scope='session')
+def rounds(request):
+    return request.config.getoption('--synthetic-rounds')
+
+
+@pytest.fixture(scope='session')
+def foldEvents(request):
+    return request.config.getoption('--fold-events')
+
+
+@pytest.fixture(scope='session')
+def gbnEvents(request):
+    return request.config.getoption('--gbn-events')
+
+
+@pytest.fixture(scope='session')
+def cacheEvents(request):
+    return request.config.getoption('--cache-events')
+
+
+@pytest.fixture(scope='session')
+def synthetic(tmp_path_factory, nEvents):
+    """picoAOD.root and the FvT, SvB and SvB_MA friend trees, written once per session."""
+    path = tmp_path_factory.mktemp('synthetic') / DATASET / 'picoAOD.root'
+    return write(str(path), nEvents, YEAR, seed=0)
+
+
+@pytest.fixture(scope='session')
+def metadata():
+    return {'dataset': DATASET, 'year': YEAR, 'processName': 'data', 'trigger': triggers(YEAR)}
+
+
+@pytest.fixture(scope='session')
+def nanoevents(synthetic, metadata):
+    """New NanoEvents of the synthetic file on each call, as given by the coffea runner."""
+    chunk = Chunk(synthetic, fetch=True)
+    _metadata = metadata | {'filename': synthetic, 'treename': 'Events', 'fileuuid': str(chunk.uuid),
+                            'entrystart': 0, 'entrystop': chunk.num_entries}
+
+    def events():
+        return NanoEventsFactory.from_root(synthetic, treepath='Events', schemaclass=NanoAODSchema, metadata=dict(_metadata)).events()
+    return events
@@ -0,0 +1,372 @@
+import os
+import resource
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import awkward as ak
+import numpy as np
+import pytest
+
+from base_class.awkward.zip import NanoAOD
+from base_class.hist import Collection, Fill
+from base_class.root import Chain, Chunk, Friend, FriendJoin, TreeReader, merge
+from base_class.root._cache import FileCache
+from classifier.config.dataset._df import _load_df_from_root, _stream_df_from_root
+from classifier.df.io import FromRoot
+from classifier.process import get_context as classifier_context
+from classifier.process import status
+
+
+#
+# python -m pytest benchmarks/io_test.py --benchmark-json=benchmarks.json
+#
+
+FRIENDS = ['FvT', 'SvB', 'SvB_MA']
+COLLECTIONS = ('Jet_', 'Muon_', 'Electron_')
+CACHE_FILES = 50
+CACHE_REPEAT = 10
+MERGE_OUTPUTS = 200
+
+
+def _flat(branches):
+    return {b for b in branches if not b.startswith(COLLECTIONS)}
+
+
+def _friends(path):
+    target = Chunk(path, fetch=True)
+    directory = os.path.dirname(path)
+    friends = []
+    for name in FRIENDS:
+        friend = Friend(name)
+        friend.add(target, Chunk(os.path.join(directory, f'{name}.root'), fetch=True))
+        friends.append(friend)
+    return friends
+
+
+@pytest.fixture(scope='module')
+def small_files(tmp_path_factory, synthetic):
+    """The flat branches of the synthetic file split into small files."""
+    import uproot
+
+    path = tmp_path_factory.mktemp('small')
+    data = TreeReader(filter=_flat).arrays(Chunk(synthetic, fetch=True), library='np')
+    files = []
+    for i, index in enumerate(np.array_split(np.arange(len(data['event'])), CACHE_FILES)):
+        files.append(str(path / f'chunk{i}.root'))
+        with uproot.recreate(files[-1]) as f:
+            f['Events'] = {k: v[index] for k, v in data.items()}
+    return files
+
+
+@pytest.mark.parametrize('maxsize', [0, 128])
+def test_file_cache(benchmark, small_files, rounds, maxsize):
+    reader = TreeReader()
+
+    def read():
+        for _ in range(CACHE_REPEAT):
+            reader.concat(*(Chunk(path) for path in small_files), library='np')
+        return FileCache.opens
+
+    _maxsize = FileCache.maxsize
+    try:
+        FileCache.maxsize = maxsize
+        benchmark.extra_info['files'] = CACHE_FILES
+        benchmark.extra_info['repeat'] = CACHE_REPEAT
+        benchmark.extra_info['opens'] = benchmark.pedantic(read, setup=FileCache.clear, rounds=rounds, iterations=1)
+    finally:
+        FileCache.maxsize = _maxsize
+        FileCache.clear()
+
+
+@pytest.mark.parametrize('method', ['resize', 'stream'])
+def test_merge(benchmark, small_files, tmp_path_factory, nEvents, rounds, method):
+    def setup():
+        path = tmp_path_factory.mktemp(f'merge_{method}')
+        sources = []
+        for file in small_files:
+            sources.append(Chunk(shutil.copy(file, path / os.path.basename(file)), fetch=True))
+        return (str(path / 'merged' / 'picoAOD.root'), *sources), {}
+
+    def run(output, *sources):
+        return getattr(merge, method)(output, *sources, step=nEvents // 20, chunk_size=nEvents // 4)
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.extra_info['files'] = CACHE_FILES
+    chunks = benchmark.pedantic(run, setup=setup, rounds=rounds, iterations=1)
+    assert sum(len(chunk) for chunk in chunks) == nEvents
+
+
+@pytest.mark.parametrize('method', ['nanoevents', 'friend_join'])
+def test_friend_join(benchmark, synthetic, nEvents, rounds, method):
+    from coffea.nanoevents import NanoEventsFactory
+
+    from analysis.helpers.FriendTreeSchema import FriendTreeSchema
+    from analysis.processors.processor_HH4b import FvT_fields, SvB_fields, friend_branches, read_friends
+
+    directory = os.path.dirname(synthetic)
+    fields = {'FvT': FvT_fields(), 'SvB': SvB_fields(), 'SvB_MA': SvB_fields()}
+    target = Chunk(synthetic, fetch=True)
+    chunks = [target.slice(start, min(start + nEvents // 5, nEvents)) for start in range(0, nEvents, nEvents // 5)]
+
+    def nanoevents():
+        for chunk in chunks:
+            event = NanoEventsFactory.from_root(synthetic, entry_start=chunk.entry_start, entry_stop=chunk.entry_stop).events()
+            for name, friend_fields in fields.items():
+                friend = getattr(NanoEventsFactory.from_root(os.path.join(directory, f'{name}.root'), entry_start=chunk.entry_start, entry_stop=chunk.entry_stop,
+                                                             schemaclass=FriendTreeSchema).events(), name)
+                assert ak.all(friend.event == event.event)
+                for field in friend_fields:
+                    ak.to_numpy(friend[field])
+
+    def friend_join():
+        for chunk in chunks:
+            friends = FriendJoin(keys={'event': '{name}_event'})
+            for name in fields:
+                friends.add_file(name, chunk, os.path.join(directory, f'{name}.root'))
+            assert friends.check(chunk) == []
+            read_friends(friends, chunk, {name: friend_branches(name, friend_fields, weight=name == 'FvT') for name, friend_fields in fields.items()})
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.pedantic(locals()[method], setup=FriendJoin._hashes.clear, rounds=rounds, iterations=1)
+
+
+@pytest.mark.parametrize('library', ['ak', 'np'])
+def test_chain_iterate(benchmark, synthetic, nEvents, rounds, library):
+    chain = Chain()
+    chain += Chunk(synthetic, fetch=True)
+    for friend in _friends(synthetic):
+        chain.add_friend(friend)
+    options = {} if library == 'ak' else {'filter': _flat}
+
+    def iterate():
+        return sum(len(data['event']) for data in chain.iterate(step=nEvents // 5, library=library, reader_options=options))
+
+    benchmark.extra_info['events'] = nEvents
+    assert benchmark.pedantic(iterate, rounds=rounds, iterations=1) == nEvents
+
+
+def test_fill(benchmark, synthetic, nEvents, rounds):
+    events = TreeReader(transform=NanoAOD(regular=False, jagged=True)).arrays(Chunk(synthetic, fetch=True))
+    nTagged = ak.sum(events.Jet.btagDeepFlavB >= 0.6, axis=1)
+    events['tag'] = np.where(nTagged >= 4, 4, np.where(nTagged == 3, 3, 0))
+    events['region'] = np.asarray(events.event % 3)
+    events['passPreSel'] = events.tag > 0
+    events['weight'] = np.ones(len(events))
+    events['nJet'] = ak.num(events.Jet)
+
+    def fill():
+        hist = Collection(process=['data'], year=['UL18'], tag=[3, 4, 0], region=[2, 1, 0], passPreSel=...)
+        fill = Fill(process='data', year='UL18', weight='weight')
+        fill += hist.add('nJet', (16, -0.5, 15.5, ('nJet', 'Number of Jets')))
+        fill += hist.add('jet_pt', (100, 0, 500, ('Jet.pt', 'Jet p_{T} [GeV]')))
+        fill += hist.add('jet_eta', (100, -5, 5, ('Jet.eta', 'Jet $\\eta$')))
+        fill += hist.add('jet_btag', (100, 0, 1, ('Jet.btagDeepFlavB', 'Jet DeepFlavB')))
+        fill += hist.add('jet_pt_eta', (50, 0, 500, ('Jet.pt', 'Jet p_{T} [GeV]')), (50, -5, 5, ('Jet.eta', 'Jet $\\eta$')))
+        fill.fill(events, hist)
+        return hist.output
+
+    benchmark.extra_info['events'] = nEvents
+    output = benchmark.pedantic(fill, rounds=rounds, iterations=1)
+    assert output['hists']['nJet'].sum(flow=True).value == nEvents
+
+
+PROCESSES = ['data', 'TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu', 'HH4b', 'ZZ4b', 'ZH4b']
+YEARS = ['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18']
+TAGS = ['threeTag', 'fourTag']
+REGIONS = ['SR', 'SB']
+
+
+@pytest.mark.parametrize('mode', ['per_cell', 'single_pass'])
+def test_fill_categories(benchmark, synthetic, nEvents, rounds, mode):
+    events = TreeReader(transform=NanoAOD(regular=False, jagged=True)).arrays(Chunk(synthetic, fetch=True))
+    nTagged = ak.to_numpy(ak.sum(events.Jet.btagDeepFlavB >= 0.6, axis=1))
+    event = ak.to_numpy(events.event)
+    events['process'] = ak.zip({p: event % len(PROCESSES) == i for i, p in enumerate(PROCESSES)})
+    events['year'] = ak.zip({y: event // len(PROCESSES) % len(YEARS) == i for i, y in enumerate(YEARS)})
+    events['tag'] = ak.zip({'threeTag': nTagged == 3, 'fourTag': nTagged >= 4})
+    events['region'] = ak.zip({'SR': event % 3 == 0, 'SB': event % 3 > 0})
+    events['passPreSel'] = nTagged >= 3
+    events['weight'] = np.ones(len(events))
+    events['nJet'] = ak.num(events.Jet)
+
+    def fill():
+        hist = Collection(process=PROCESSES, year=YEARS, tag=TAGS, region=REGIONS, passPreSel=...)
+        fill = Fill(weight='weight')
+        fill += hist.add('nJet', (16, -0.5, 15.5, ('nJet', 'Number of Jets')))
+        fill += hist.add('jet_pt', (100, 0, 500, ('Jet.pt', 'Jet p_{T} [GeV]')))
+        fill += hist.add('jet_pt_eta', (50, 0, 500, ('Jet.pt', 'Jet p_{T} [GeV]')), (50, -5, 5, ('Jet.eta', 'Jet $\\eta$')))
+        if mode == 'single_pass':
+            fill.fill(events, hist)
+        else:
+            for p in PROCESSES:
+                for y in YEARS:
+                    for t in TAGS:
+                        for r in REGIONS:
+                            mask = events.process[p] & events.year[y] & events.tag[t] & events.region[r]
+                            fill.fill(events[mask], hist, process=p, year=y, tag=t, region=r)
+        return hist.output
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.extra_info['cells'] = len(PROCESSES) * len(YEARS) * len(TAGS) * len(REGIONS)
+    output = benchmark.pedantic(fill, rounds=rounds, iterations=1)
+    assert output['hists']['nJet'].sum(flow=True).value == np.sum(nTagged >= 3)
+
+
+def _template_output(rng, processes, years):
+    """A processor output booked with the HH4b templates, a few random cells filled."""
+    from analysis.helpers.hist_templates import FvTHists, QuadJetHists, SvBHists
+    from base_class.hist import Template
+
+    hist = Collection(process=processes, year=years, tag=[3, 4, 0], region=[2, 1, 0], passPreSel=...)
+    for prefix, template in [('SvB', SvBHists), ('SvB_MA', SvBHists), ('FvT', FvTHists), ('quadJet_selected', QuadJetHists)]:
+        for name, h in vars(template).items():
+            if isinstance(h, Template._Hist):
+                hist.add(f'{prefix}.{name}', *[axis for _, axis in h._axes])
+    output = hist.output
+    for h in output['hists'].values():
+        view = h.view(flow=True)
+        cells = rng.integers(0, view.size, 50)
+        view['value'].flat[cells] += rng.exponential(1, 50)
+        view['variance'].flat[cells] += rng.exponential(1, 50)
+    return output
+
+
+@pytest.fixture(scope='module')
+def coffea_outputs(tmp_path_factory):
+    """Processor outputs booked with the HH4b histogram templates, one process and year per output."""
+    from coffea.util import save
+
+    path = tmp_path_factory.mktemp('coffea')
+    files = []
+    for i in range(MERGE_OUTPUTS):
+        rng = np.random.default_rng(i)
+        output = _template_output(rng, [PROCESSES[i % len(PROCESSES)]], [YEARS[i % len(YEARS)]])
+        output['nEvent'] = {f'dataset{i}': int(rng.integers(1000))}
+        files.append(str(path / f'hists_{i}.coffea'))
+        save(output, files[-1])
+    return files
+
+
+@pytest.mark.parametrize(('method', 'workers'), [('sequential', 1), ('tree', 1), ('tree', 4)])
+def test_merge_coffea(benchmark, coffea_outputs, tmp_path, rounds, method, workers):
+    from analysis.merge_coffea_files import merge_files, tree_merge
+
+    def run():
+        if method == 'sequential':
+            return merge_files(coffea_outputs, str(tmp_path / 'merged.coffea'))
+        return tree_merge(coffea_outputs, str(tmp_path / 'merged.coffea'), workers=workers)
+
+    benchmark.extra_info['files'] = MERGE_OUTPUTS
+    benchmark.pedantic(run, rounds=rounds, iterations=1)
+    assert all(os.path.exists(file) for file in coffea_outputs)
+
+
+@pytest.mark.parametrize('fmt', ['coffea', 'h5'])
+def test_first_plot(benchmark, tmp_path, rounds, fmt):
+    from coffea.util import load, save
+    from hist import loc
+
+    from base_class.hist.store import HistStore
+    from base_class.hist.store import save as save_store
+
+    output = _template_output(np.random.default_rng(0), PROCESSES, YEARS)
+    path = str(tmp_path / f'hists.{fmt}')
+    (save if fmt == 'coffea' else save_store)(output, path)
+    name = 'SvB.ps_hh'
+    sel = {'process': 'data', 'year': 'UL18', 'tag': 4, 'region': 2, 'passPreSel': True}
+    index = sel | {'tag': loc(4), 'region': loc(2)}
+
+    def first_plot():
+        if fmt == 'coffea':
+            return load(path)['hists'][name][index]
+        return HistStore(path).get(name, **sel)[index]
+
+    benchmark.extra_info['hists'] = len(output['hists'])
+    benchmark.extra_info['bytes'] = os.path.getsize(path)
+    h = benchmark.pedantic(first_plot, rounds=rounds, iterations=1)
+    assert np.array_equal(h.values(flow=True), output['hists'][name][index].values(flow=True))
+
+
+@pytest.mark.parametrize('workers', [1, 2, 4])
+def test_plot_jobs(benchmark, tmp_path, rounds, workers):
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from base_class.plots.jobs import plan_jobs, run_jobs
+    from base_class.plots.plots import load_config, read_axes_and_cuts
+
+    output = _template_output(np.random.default_rng(0), PROCESSES, YEARS)
+    output['hists'] = {k: h for k, h in output['hists'].items() if h.ndim == 6}
+    plotConfig = load_config('analysis/metadata/plotsAll.yml')
+    _, cutList = read_axes_and_cuts([output], plotConfig)
+    jobs = plan_jobs(list(output['hists']), {}, plotConfig, outputFolder=str(tmp_path))
+
+    benchmark.extra_info['plots'] = len(jobs)
+    report = benchmark.pedantic(run_jobs, args=(jobs, output, cutList, plotConfig), kwargs={'workers': workers}, rounds=rounds, iterations=1)
+    assert report['rendered'] == len(jobs)
+
+
+def _setup_multiprocessing():
+    # same as SetupMultiprocessing
+    status.context = classifier_context(method='forkserver', library='torch', preload=['torch'])
+
+
+@pytest.fixture
+def context():
+    _setup_multiprocessing()
+    yield
+    status.context = None
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_classifier_loader(benchmark, context, synthetic, nEvents, rounds, max_workers):
+    from_root = FromRoot(friends=_friends(synthetic), branches=_flat, metadata={'year': 2018})
+    loader = _load_df_from_root((from_root, [synthetic]), max_workers=max_workers, chunksize=nEvents // 5, tree='Events')
+
+    benchmark.extra_info['events'] = nEvents
+    df = benchmark.pedantic(loader.load, rounds=rounds, iterations=1)
+    assert len(df) == nEvents
+    assert {'event', 'FvT', 'SvB_ps', 'SvB_MA_ps', 'year'} <= set(df.columns)
+
+
+def _first_batch(mode, path, nEvents, batch_size):
+    """Time to the first training batch and peak RSS of a fresh process, in s and MiB."""
+    from torch.utils.data import StackDataset
+
+    from classifier.df.io import ToTensor
+    from classifier.nn.dataset import mp_loader
+
+    start = time.perf_counter()
+    _setup_multiprocessing()
+    from_root = FromRoot(friends=_friends(path), branches=_flat, metadata={'year': 2018})
+    kwargs = dict(max_workers=1, chunksize=nEvents // 10, tree='Events')
+    if mode == 'stream':
+        loader = _stream_df_from_root((from_root, [path]), **kwargs, buffer_size=nEvents // 5, seed=0)
+    else:
+        loader = _load_df_from_root((from_root, [path]), **kwargs)
+    loader.to_tensor = ToTensor().add('FvT', 'float32').columns('FvT_pd4', 'FvT_pd3', 'FvT_pt4', 'FvT_pt3').add('offset', 'int64').columns('event')
+    loader.postprocessors = []
+    dataset = loader()
+    if mode == 'eager':
+        # the tensors are stacked as in load_training_sets
+        dataset = StackDataset(**dataset)
+    batch = next(iter(mp_loader(dataset, batch_size=batch_size, shuffle=True, drop_last=True)))
+    assert batch['FvT'].shape == (batch_size, 4)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@pytest.mark.parametrize('mode', ['eager', 'stream'])
+def test_classifier_first_batch(benchmark, synthetic, nEvents, rounds, mode):
+    results = []
+
+    def first_batch():
+        # a new process for each round, so the peak RSS is not shared
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results.append(pool.submit(_first_batch, mode, synthetic, nEvents, 1024).result())
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.pedantic(first_batch, rounds=rounds, iterations=1)
+    benchmark.extra_info['time_to_first_batch'] = min(t for t, _ in results)
+    benchmark.extra_info['peak_rss_MiB'] = max(m for _, m in results)
@@ -0,0 +1,216 @@
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import awkward as ak
+import numpy as np
+import pytest
+import yaml
+from coffea.lumi_tools import LumiMask
+from coffea.nanoevents.methods import vector
+
+from analysis.helpers.chunkPlanner import plan_chunksizes
+from analysis.helpers.common import _build_jet_factory
+from analysis.helpers.correctionFunctions import _registry, cached_correction, lumi_mask
+from analysis.helpers.jetCombinatoricModel import jetCombinatoricModel as JCMWeight
+from analysis.helpers.topCandReconstruction import buildTop, find_best_tops, find_tops
+from analysis.processors.processor_HH4b import analysis
+from skimmer.processor.skimmer_4b import Skimmer
+
+
+#
+# python -m pytest benchmarks/processors_test.py --benchmark-json=benchmarks.json
+#
+
+JCM = 'analysis/weights/JCM/2023/dataRunII/jetCombinatoricModel_SB_00-00-02.yml'
+JCM_TEST = 'analysis/tests/jetCombinatoricModel_SB_Coffea_new.yml'
+SETUP_CHUNKS = 10
+
+
+@pytest.mark.parametrize('run_topreco', [False, True])
+def test_processor_HH4b(benchmark, nanoevents, nEvents, rounds, run_topreco):
+    processor = analysis(JCM=JCM, run_topreco=run_topreco)
+    benchmark.extra_info['events'] = nEvents
+    output = benchmark.pedantic(processor.process, setup=lambda: ((nanoevents(),), {}), rounds=rounds, iterations=1)
+    assert output['nEvent'] == {'data_UL18': nEvents}
+    assert output['hists']['nPVs'].sum().value > 0
+
+
+@pytest.mark.parametrize('profile', [False, True])
+def test_stage_profile(benchmark, nanoevents, nEvents, rounds, profile):
+    processor = analysis(JCM=JCM, run_topreco=False, profile=profile)
+    benchmark.extra_info['events'] = nEvents
+    output = benchmark.pedantic(processor.process, setup=lambda: ((nanoevents(),), {}), rounds=rounds, iterations=1)
+    assert ('profile' in output) == profile
+    if profile:
+        benchmark.extra_info['stages'] = {stage: v['wall'] / rounds for stage, v in output['profile'].breakdown().items()}
+
+
+def test_skimmer(benchmark, nanoevents, nEvents, rounds, tmp_path):
+    skimmer = Skimmer(base_path=str(tmp_path), step=10_000)
+    benchmark.extra_info['events'] = nEvents
+    output = benchmark.pedantic(skimmer.process, setup=lambda: ((nanoevents(),), {}), rounds=rounds, iterations=1)
+    result = output['data_UL18']
+    assert result['total_events'] == nEvents
+    assert 0 < result['saved_events'] < nEvents
+    benchmark.extra_info['saved_events'] = result['saved_events']
+
+
+def test_chunk_plan(benchmark, synthetic, metadata, nEvents, rounds, tmp_path):
+    processor = analysis(JCM=JCM, make_classifier_input=str(tmp_path))
+    fileset = {metadata['dataset']: {'files': [synthetic], 'metadata': metadata}}
+
+    def plan():
+        return plan_chunksizes(fileset, processor, memory='2GB', max_chunksize=nEvents, min_chunksize=100)
+
+    benchmark.extra_info['events'] = nEvents
+    result = benchmark.pedantic(plan, rounds=rounds, iterations=1)[metadata['dataset']]
+    benchmark.extra_info.update(result)
+    assert 'bytes_per_event' in result
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('mode', ['rebuild', 'registry'])
+def test_chunk_setup(benchmark, rounds, mode):
+    corrections = yaml.safe_load(open('analysis/metadata/corrections.yml', 'r'))['UL18']
+    juncWS = [corrections['JERC'][0].replace('STEP', istep)
+              for istep in ['L1FastJet', 'L2Relative', 'L2L3Residual', 'L3Absolute']] + corrections['JERC'][1:]
+    paths = [w.split()[-1] for w in juncWS]
+
+    def setup():
+        for _ in range(SETUP_CHUNKS):
+            if mode == 'rebuild':
+                LumiMask(corrections['goldenJSON'])
+                _build_jet_factory(juncWS, True)
+            else:
+                lumi_mask(corrections['goldenJSON'])
+                cached_correction('jet_factory_isMC=True', paths, lambda: _build_jet_factory(juncWS, True))
+
+    benchmark.extra_info['chunks'] = SETUP_CHUNKS
+    benchmark.pedantic(setup, setup=_registry.clear, rounds=rounds, iterations=1)
+
+
+@pytest.mark.parametrize('nJet', [6, 9, 12])
+@pytest.mark.parametrize('method', ['buildTop', 'find_best_tops'])
+def test_top_reconstruction(benchmark, nEvents, rounds, method, nJet):
+    rng = np.random.default_rng(0)
+    n = nEvents * nJet
+    jets = ak.unflatten(ak.zip(
+        {
+            'pt': (rng.exponential(60, n) + 40).astype(np.float32),
+            'eta': rng.uniform(-2.4, 2.4, n).astype(np.float32),
+            'phi': rng.uniform(-np.pi, np.pi, n).astype(np.float32),
+            'mass': rng.uniform(5, 30, n).astype(np.float32),
+            'btagDeepFlavB': rng.random(n).astype(np.float32),
+            'bRegCorr': rng.normal(1.05, 0.05, n).astype(np.float32),
+        },
+        with_name='PtEtaPhiMLorentzVector',
+        behavior=vector.behavior,
+    ), nJet)
+    jets = jets[ak.argsort(jets.btagDeepFlavB, axis=1, ascending=False)]
+    find_best_tops(jets[:10])  # compile
+
+    def best():
+        if method == 'buildTop':
+            return buildTop(jets, find_tops(jets))[:, 0]
+        return find_best_tops(jets)[:, 0]
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.extra_info['jets'] = nJet
+    assert len(benchmark.pedantic(best, rounds=rounds, iterations=1)) == nEvents
+
+
+def _jcm_combinations(JCM, untagged_jets, event):
+    """The pseudo-tag weight before the closed form, with one ak.combinations per number of pseudo-tags."""
+    nEvent = len(untagged_jets)
+    nlt = ak.to_numpy(ak.num(untagged_jets, axis=1))
+    nPseudoTagProb = np.zeros((13, nEvent))
+    nPseudoTagProb[0] = JCM.t * (1 - JCM.p)**nlt
+    for npt in range(1, 13):
+        nnt = np.maximum(nlt - npt, 0)
+        ncr = ak.to_numpy(ak.num(ak.combinations(untagged_jets, npt)))
+        w_npt = JCM.t * ncr * JCM.p**npt * (1 - JCM.p)**nnt
+        if (3 + npt) % 2 == 0:
+            w_npt *= 1 + JCM.e / nlt**JCM.d
+        nPseudoTagProb[npt] = w_npt
+    w = np.sum(nPseudoTagProb[1:], axis=0)
+    r = JCM._rng.float(event) * w + nPseudoTagProb[0]
+    return w, (r > np.cumsum(nPseudoTagProb, axis=0)).sum(axis=0)
+
+
+@pytest.mark.parametrize('method', ['combinations', 'closed_form'])
+def test_jcm_weight(benchmark, nEvents, rounds, method):
+    rng = np.random.default_rng(0)
+    nlt = rng.integers(1, 12, nEvents)
+    untagged_jets = ak.unflatten(ak.zip({'pt': rng.exponential(40, nlt.sum()) + 40}), nlt)
+    event = np.arange(nEvents, dtype=np.uint64)
+    JCM = JCMWeight(JCM_TEST)
+
+    def weight():
+        if method == 'combinations':
+            return _jcm_combinations(JCM, untagged_jets, event)
+        return JCM(untagged_jets, event)
+
+    benchmark.extra_info['events'] = nEvents
+    w, _ = benchmark.pedantic(weight, rounds=rounds, iterations=1)
+    assert len(w) == nEvents
+
+
+@pytest.fixture(scope='module')
+def hcr_models(tmp_path_factory):
+    """Three folds of a randomly initialized SvB_MA model."""
+    import torch
+    from analysis.helpers.networks import HCR
+
+    path = tmp_path_factory.mktemp('HCR')
+    torch.manual_seed(0)
+    for offset in range(3):
+        hcr = HCR(8, 8, ['year', 'nSelJets', 'xW', 'xbW'], useOthJets='attention', device='cpu', nClasses=5, architecture='HCR_MA')
+        torch.save({'model': hcr.state_dict()}, path / f'SvB_MA_HCR+attention_8_np753_seed0_lr0.01_epochs20_offset{offset}_epoch20.pkl')
+    return str(path / 'SvB_MA_HCR+attention_8_*offset*_epoch20.pkl')
+
+
+def _hcr_inputs(n):
+    import torch
+
+    rng = np.random.default_rng(0)
+    j = np.stack([rng.exponential(60, (n, 4)) + 40, rng.uniform(-2.5, 2.5, (n, 4)),
+                  rng.uniform(-np.pi, np.pi, (n, 4)), rng.uniform(5, 30, (n, 4))], axis=1)
+    o = np.zeros((n, 5, 8))
+    o[:, 4, :] = -1
+    a = np.stack([np.full(n, 8), np.full(n, 4), rng.exponential(2, n), rng.exponential(2, n)], axis=1)
+    return [torch.tensor(x, dtype=torch.float) for x in (j, o, a)] + [torch.tensor(rng.integers(0, 3, n))]
+
+
+def _hcr_inference(method, path, nEvents, export_dir):
+    """Time and peak RSS increase of the evaluation of nEvents in a fresh process, in s and MiB."""
+    from analysis.helpers.inference import HCRInference
+    from analysis.helpers.networks import HCREnsemble
+
+    inputs = _hcr_inputs(nEvents)
+    if method == 'HCREnsemble':
+        model = HCREnsemble(path)
+    else:
+        model = HCRInference(path, backend=method, export_dir=export_dir)
+        model.folds  # export and load outside of the measurement
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    model(*inputs)
+    return time.perf_counter() - start, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base) / 1024
+
+
+@pytest.mark.parametrize('method', ['HCREnsemble', 'eager', 'torchscript'])
+def test_hcr_inference(benchmark, hcr_models, nEvents, rounds, method, tmp_path):
+    results = []
+
+    def evaluate():
+        # a new process for each round, so the peak RSS is not shared
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results.append(pool.submit(_hcr_inference, method, hcr_models, nEvents, str(tmp_path)).result())
+
+    benchmark.extra_info['events'] = nEvents
+    benchmark.pedantic(evaluate, rounds=rounds, iterations=1)
+    benchmark.extra_info['evaluation_time'] = min(t for t, _ in results)
+    benchmark.extra_info['peak_rss_increase_MiB'] = max(m for _, m in results)
@@ -0,0 +1,193 @@
+import os
+import json
+import argparse
+import logging
+from functools import lru_cache
+
+import awkward as ak
+import numpy as np
+import uproot
+import yaml
+
+#
+# Synthetic NanoAOD-like data files for offline tests and benchmarks.
+#   picoAOD.root has the event, trigger, noise filter, jet and lepton branches read by the 4b selection,
+#   FvT.root, SvB.root and SvB_MA.root next to it are the friend trees read by processor_HH4b.
+#   The run and lumi blocks are taken from the golden JSON of the year, so every event passes the lumi mask.
+#   Only data is generated: the MC weights need the pileup and b-tag corrections from cvmfs.
+#
+# python benchmarks/synthetic.py -o synthetic/data_UL18/picoAOD.root -n 1000000
+#
+
+FvT_CLASSES = ['d4', 'd3', 't4', 't3']
+SvB_CLASSES = ['mj', 'tt', 'zz', 'zh', 'hh']
+QUADJETS = ['q_1234', 'q_1324', 'q_1423']
+
+
+@lru_cache
+def golden_lumis(year, corrections_metadata='analysis/metadata/corrections.yml'):
+    """All certified (run, luminosityBlock) of year."""
+    with open(corrections_metadata) as f:
+        goldenJSON = yaml.safe_load(f)[year]['goldenJSON']
+    with open(goldenJSON) as f:
+        certified = json.load(f)
+    runs, lumis = [], []
+    for run, ranges in certified.items():
+        for first, last in ranges:
+            lumis.append(np.arange(first, last + 1, dtype=np.uint32))
+            runs.append(np.full(last - first + 1, int(run), dtype=np.uint32))
+    return np.concatenate(runs), np.concatenate(lumis)
+
+
+def triggers(year, datasets_metadata='metadata/datasets_HH4b.yml'):
+    with open(datasets_metadata) as f:
+        return yaml.safe_load(f)['datasets']['data'][year]['trigger']
+
+
+def noise_filters(year, corrections_metadata='analysis/metadata/corrections.yml'):
+    with open(corrections_metadata) as f:
+        return yaml.safe_load(f)[year]['NoiseFilter']
+
+
+def _jagged(counts, values):
+    return ak.unflatten(values, counts)
+
+
+def make_jets(rng, n, mean_jets=5.5, b_fraction=0.45):
+    """
+    Jets sorted by pt. The multiplicity is at least 2 with a Poisson tail,
+    b jets have DeepFlavour scores close to 1, light jets close to 0.
+    """
+    nJet = 2 + rng.poisson(mean_jets - 2, n)
+    total = nJet.sum()
+    isB = rng.random(total) < b_fraction
+    pt = (20 + rng.exponential(55, total)).astype(np.float32)
+    btag = np.where(isB, rng.beta(6.0, 1.0, total), rng.beta(0.4, 8.0, total)).astype(np.float32)
+    jets = {
+        'pt': pt,
+        'eta': np.clip(rng.normal(0, 1.4, total), -4.7, 4.7).astype(np.float32),
+        'phi': rng.uniform(-np.pi, np.pi, total).astype(np.float32),
+        'mass': (pt * rng.uniform(0.08, 0.2, total)).astype(np.float32),
+        'btagDeepFlavB': btag,
+        'bRegCorr': np.where(isB, rng.normal(1.1, 0.08, total), rng.normal(1.0, 0.05, total)).astype(np.float32),
+        'puId': rng.choice(np.array([0, 4, 6, 7], dtype=np.int32), total, p=[0.05, 0.05, 0.1, 0.8]),
+        'jetId': rng.choice(np.array([0, 2, 6], dtype=np.int32), total, p=[0.01, 0.04, 0.95]),
+    }
+    jets = ak.zip({k: _jagged(nJet, v) for k, v in jets.items()})
+    return jets[ak.argsort(jets.pt, axis=1, ascending=False)]
+
+
+def make_leptons(rng, n, mean, mass, isolation):
+    count = rng.poisson(mean, n)
+    total = count.sum()
+    leptons = {
+        'pt': (5 + rng.exponential(15, total)).astype(np.float32),
+        'eta': rng.uniform(-2.5, 2.5, total).astype(np.float32),
+        'phi': rng.uniform(-np.pi, np.pi, total).astype(np.float32),
+        'mass': np.full(total, mass, dtype=np.float32),
+        'charge': rng.choice(np.array([-1, 1], dtype=np.int32), total),
+    }
+    for name in isolation:
+        leptons[name] = rng.exponential(0.1, total).astype(np.float32)
+    return count, total, leptons
+
+
+def make_events(n, year='UL18', seed=0, first_event=0, mean_jets=5.5, b_fraction=0.45):
+    """Branches of n synthetic data events."""
+    rng = np.random.default_rng(seed)
+    runs, lumis = golden_lumis(year)
+    picked = np.sort(rng.integers(0, len(runs), n))
+
+    events = {
+        'run': runs[picked],
+        'luminosityBlock': lumis[picked],
+        'event': np.arange(first_event, first_event + n, dtype=np.uint64),
+        'fixedGridRhoFastjetAll': rng.normal(25, 6, n).astype(np.float32),
+    }
+    events['PV_npvs'] = rng.poisson(30, n).astype(np.int32)
+    events['PV_npvsGood'] = (events['PV_npvs'] - rng.binomial(events['PV_npvs'], 0.05)).astype(np.int32)
+    for trigger in triggers(year):
+        events[f'HLT_{trigger}'] = rng.random(n) < 0.9
+    for flag in noise_filters(year):
+        events[f'Flag_{flag}'] = rng.random(n) < 0.995
+
+    events['Jet'] = make_jets(rng, n, mean_jets, b_fraction)
+
+    count, total, muons = make_leptons(rng, n, 0.3, 0.105658, ['pfRelIso04_all', 'pfRelIso03_all', 'pfRelIso03_chg'])
+    muons['looseId'] = rng.random(total) < 0.9
+    events['Muon'] = ak.zip({k: _jagged(count, v) for k, v in muons.items()})
+
+    count, total, electrons = make_leptons(rng, n, 0.2, 0.000511, ['pfRelIso03_all', 'pfRelIso03_chg'])
+    electrons['mvaFall17V2Iso_WP90'] = rng.random(total) < 0.8
+    events['Electron'] = ak.zip({k: _jagged(count, v) for k, v in electrons.items()})
+    return events
+
+
+def make_friends(event, seed=0):
+    """FvT, SvB and SvB_MA branches for the events, with the "{name}_event" key of FriendJoin."""
+    rng = np.random.default_rng(seed)
+    n = len(event)
+
+    def quadjets(name):
+        return {f'{name}_{q}': p for q, p in zip(QUADJETS, rng.dirichlet(np.ones(3), n).T.astype(np.float32))}
+
+    p = dict(zip(FvT_CLASSES, rng.dirichlet([6, 4, 1, 1], n).T.astype(np.float32)))
+    FvT = {
+        'FvT_event': event,
+        'FvT': rng.lognormal(0, 0.3, n).astype(np.float32),
+        'FvT_std': rng.uniform(0.01, 0.2, n).astype(np.float32),
+        'FvT_pm4': p['d4'] - p['t4'],
+        'FvT_pm3': p['d3'] - p['t3'],
+        'FvT_pt': p['t4'] + p['t3'],
+    } | {f'FvT_p{k}': v for k, v in p.items()} | quadjets('FvT')
+
+    friends = {'FvT': FvT}
+    for name in ['SvB', 'SvB_MA']:
+        p = dict(zip(SvB_CLASSES, rng.dirichlet([8, 3, 1, 1, 1], n).T.astype(np.float32)))
+        friends[name] = {
+            f'{name}_event': event,
+            f'{name}_ps': p['zz'] + p['zh'] + p['hh'],
+        } | {f'{name}_p{k}': v for k, v in p.items()} | quadjets(name)
+    return friends
+
+
+def write(path, n, year='UL18', seed=0, step=100_000, **kwargs):
+    """
+    Write n events to path and the friend trees to FvT.root, SvB.root and SvB_MA.root in the same directory.
+    The events are generated in blocks of step, so the memory does not grow with n.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    names = ['FvT', 'SvB', 'SvB_MA']
+    files = {'Events': uproot.recreate(path)} | {name: uproot.recreate(os.path.join(directory, f'{name}.root')) for name in names}
+    try:
+        for i, start in enumerate(range(0, n, step)):
+            size = min(step, n - start)
+            events = make_events(size, year, seed=(seed, i), first_event=start, **kwargs)
+            friends = make_friends(events['event'], seed=(seed, i, 1))
+            for name, data in [('Events', events)] + [(name, friends[name]) for name in names]:
+                if i == 0:
+                    files[name]['Events'] = data
+                else:
+                    files[name]['Events'].extend(data)
+    finally:
+        for f in files.values():
+            f.close()
+    return path
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Write synthetic NanoAOD-like data with FvT and SvB friend trees', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-o', '--output', default='synthetic/data_UL18/picoAOD.root', help='Output file, the friend trees are written in the same directory')
+    parser.add_argument('-n', '--nEvents', type=int, default=100_000, help='Number of events')
+    parser.add_argument('-y', '--year', default='UL18', choices=['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18'], help='Year of the trigger, noise filters and golden JSON')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--step', type=int, default=100_000, help='Number of events generated at once')
+    parser.add_argument('--meanJets', type=float, default=5.5, help='Mean jet multiplicity')
+    parser.add_argument('--bFraction', type=float, default=0.45, help='Fraction of b jets')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    write(args.output, args.nEvents, args.year, seed=args.seed, step=args.step, mean_jets=args.meanJets, b_fraction=args.bFraction)
+    logging.info(f'{args.nEvents} events written to {args.output}')
@@ -101,6 +101,23 @@ class LoadRoot(ABC, Dataframe):
         default="Events",
         help="the name of the TTree",
     )
+    argparser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream the chunks from the ROOT files during training instead of loading all of them in memory",
+    )
+    argparser.add_argument(
+        "--shuffle-buffer",
+        type=converter.int_pos,
+        default=1_000_000,
+        help="the number of entries to shuffle together when streaming",
+    )
+    argparser.add_argument(
+        "--stream-seed",
+        type=int,
+        default=0,
+        help="the seed of the shuffle when streaming",
+    )
 
     def _parse_files(self, files: list[str], filelists: list[str]) -> list[str]:
         return unique(
@@ -120,14 +137,22 @@ class LoadRoot(ABC, Dataframe):
         yield self.from_root(), self.files
 
     def train(self):
-        self._trainables.append(
-            _load_df_from_root(
-                *self._from_root(),
-                max_workers=self.opts.max_workers,
-                chunksize=self.opts.chunksize,
-                tree=self.opts.tree,
-            )
+        kwargs = dict(
+            max_workers=self.opts.max_workers,
+            chunksize=self.opts.chunksize,
+            tree=self.opts.tree,
         )
+        if self.opts.stream:
+            self._trainables.append(
+                _stream_df_from_root(
+                    *self._from_root(),
+                    **kwargs,
+                    buffer_size=self.opts.shuffle_buffer,
+                    seed=self.opts.stream_seed,
+                )
+            )
+        else:
+            self._trainables.append(_load_df_from_root(*self._from_root(), **kwargs))
         return super().train()
 
     @cached_property
@@ -207,27 +232,59 @@ class _load_df_from_root(_load_df):
         self._chunksize = chunksize
         self._tree = tree
 
-    def load(self) -> pd.DataFrame:
+    def _balanced(self, pool):
+        from base_class.root import Chunk
+
+        chunks = []
+        for _, files in self._from_root:
+            chunks.append(pool.map(Chunk._fetch, (Chunk(f, self._tree) for f in files)))
+        for i in range(len(chunks)):
+            yield self._from_root[i][0], Chunk.balance(
+                self._chunksize, *chunks[i], common_branches=True
+            )
+
+    def _pool(self):
         from concurrent.futures import ProcessPoolExecutor
 
-        import pandas as pd
-        from base_class.root import Chunk
         from classifier.process import status
 
-        dfs = []
-        with ProcessPoolExecutor(
+        return ProcessPoolExecutor(
             max_workers=self._max_workers,
             mp_context=status.context,
             initializer=status.initializer,
-        ) as pool:
-            chunks = []
-            for _, files in self._from_root:
-                chunks.append(
-                    pool.map(Chunk._fetch, (Chunk(f, self._tree) for f in files))
-                )
-            for i in range(len(chunks)):
-                balanced = Chunk.balance(
-                    self._chunksize, *chunks[i], common_branches=True
-                )
-                dfs.append(pool.map(self._from_root[i][0].read, balanced))
+        )
+
+    def load(self) -> pd.DataFrame:
+        import pandas as pd
+
+        dfs = []
+        with self._pool() as pool:
+            for from_root, balanced in self._balanced(pool):
+                dfs.append(pool.map(from_root.read, balanced))
         return pd.concat(chain(*dfs), ignore_index=True, copy=False)
+
+
+class _stream_df_from_root(_load_df_from_root):
+    def __init__(
+        self,
+        *from_root: tuple[FromRoot, list[str]],
+        max_workers: int,
+        chunksize: int,
+        tree: str,
+        buffer_size: int,
+        seed: int,
+    ):
+        super().__init__(
+            *from_root, max_workers=max_workers, chunksize=chunksize, tree=tree
+        )
+        self._buffer_size = buffer_size
+        self._seed = seed
+
+    def __call__(self):
+        from classifier.nn.stream import StreamDataset
+
+        dataset = StreamDataset(buffer_size=self._buffer_size, seed=self._seed)
+        with self._pool() as pool:
+            for from_root, balanced in self._balanced(pool):
+                dataset.add(from_root, balanced, self.to_tensor, self.postprocessors)
+        return dataset
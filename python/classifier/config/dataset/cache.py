@@ -41,8 +41,10 @@ class Torch(Dataset):
             if chunks[-1] == total - 1:
                 count -= total * metadata["chunksize"] - metadata["size"]
             logging.info(
-                f'Loading {count}/{metadata["size"]} entries from {len(chunks)}/{total} cached chunks (shuffle={metadata["shuffle"]}, compression={metadata["compression"]})'
+                f'Loading {count}/{metadata["size"]} entries from {len(chunks)}/{total} cached chunks (shuffle={metadata["shuffle"]}, format={metadata.get("format", "torch")}, compression={metadata["compression"]})'
             )
+        if metadata.get("format", "torch") == "npy":
+            return [_load_npy_cache(str(base), i) for i in chunks]
         return [
             _load_cache(str(base / f"chunk{i}.pt"), metadata["compression"])
             for i in chunks
@@ -59,3 +61,73 @@ class _load_cache:
 
         with fsspec.open(self.path, "rb", compression=self.compression) as f:
             return torch.load(f)
+
+
+class _load_npy_cache:
+    def __init__(self, base: str, chunk: int):
+        self.base = base
+        self.chunk = chunk
+
+    def __call__(self):
+        from base_class.system.eos import EOS
+
+        base = EOS(self.base)
+        with fsspec.open(base / f"chunk{self.chunk}.json", "rt") as f:
+            manifest = json.load(f)
+        runs = manifest.get("runs", {})
+        return {
+            k: _npy_column(
+                str(base / f"chunk{self.chunk}.{k}.npy"),
+                manifest["size"],
+                (runs["values"], runs["counts"]) if runs.get("key") == k else None,
+            )
+            for k in manifest["columns"]
+        }
+
+
+class _npy_column:
+    """
+    A column of a cached chunk. Local files are memory-mapped on first access, so only the requested rows are read and the dataset can be sent to other processes without copying the data.
+
+    If the chunk is sorted by this column, ``runs`` gives the values and the number of entries of the consecutive runs.
+    """
+
+    def __init__(
+        self, path: str, size: int, runs: tuple[list[int], list[int]] = None
+    ):
+        self.path = path
+        self.size = size
+        self.runs = runs
+        self._array = None
+
+    def __getstate__(self):
+        return self.__dict__ | {"_array": None}
+
+    @property
+    def array(self):
+        if self._array is None:
+            import numpy as np
+            from base_class.system.eos import EOS
+
+            path = EOS(self.path)
+            if path.is_local:
+                self._array = np.load(path.path, mmap_mode="r")
+            else:
+                with fsspec.open(self.path, "rb") as f:
+                    self._array = np.load(f)
+        return self._array
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        import numpy as np
+        import torch
+
+        return torch.from_numpy(np.array(self.array[index]))
+
+    def __getitems__(self, indices: list[int]):
+        import numpy as np
+        import torch
+
+        return [*torch.from_numpy(self.array[np.asarray(indices)])]
@@ -71,6 +71,7 @@ class LoadTrainingSets(SetupMultiprocessing):
     def load_training_sets(self, parser: EntryPoint):
         from concurrent.futures import ProcessPoolExecutor as Pool
 
+        from classifier.nn.stream import StreamDataset
         from classifier.process import status
         from torch.utils.data import ConcatDataset, StackDataset
 
@@ -89,6 +90,9 @@ class LoadTrainingSets(SetupMultiprocessing):
             datasets = [*pool.map(_load_datasets(), d_loaders)]
         logging.info(f"Loaded {len(d_loaders)} datasets in {datetime.now() - timer}")
         # concatenate datasets
+        streams = [isinstance(d, StreamDataset) for d in datasets]
+        if any(streams) and not all(streams):
+            raise ValueError("Cannot mix streamed and loaded datasets")
         d_keys = [set(d.keys()) for d in datasets]
         kept = set.intersection(*d_keys)
         ignored = set.union(*d_keys) - kept
@@ -96,6 +100,10 @@ class LoadTrainingSets(SetupMultiprocessing):
         logging.info(f"The following keys will be kept: {kept}")
         if ignored:
             logging.warn(f"The following keys will be ignored: {sorted(ignored)}")
+        if all(streams):
+            dataset = StreamDataset.concat(*datasets, keys=kept)
+            logging.info(f"Streaming {dataset.num_entries} data entries")
+            return dataset
         datasets = {k: ConcatDataset(d[k] for d in datasets) for k in kept}
         logging.info(f"Loaded {len(next(iter(datasets.values())))} data entries")
         return StackDataset(**datasets)
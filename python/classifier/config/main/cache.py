@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import logging
 import math
 from datetime import datetime
@@ -14,6 +15,7 @@ from ._utils import LoadTrainingSets
 
 if TYPE_CHECKING:
     import numpy.typing as npt
+    import torch
     from base_class.system.eos import EOS
     from torch.utils.data import StackDataset
 
@@ -42,10 +44,21 @@ class Main(LoadTrainingSets):
         type=converter.int_pos,
         help="size of each chunk, will be ignored if [yellow]--nchunks[/yellow] is given",
     )
+    argparser.add_argument(
+        "--format",
+        choices=["npy", "torch"],
+        default=None,
+        help="[green]npy[/green]: one memory-mappable file per column and chunk, [green]torch[/green]: one [green]torch.save[/green] file per chunk, default to [green]torch[/green] if [yellow]--compression[/yellow] is given, otherwise [green]npy[/green]",
+    )
     argparser.add_argument(
         "--compression",
         choices=fsspec.available_compressions(),
-        help="compression algorithm to use",
+        help="compression algorithm to use, only for [yellow]--format[/yellow] [green]torch[/green]",
+    )
+    argparser.add_argument(
+        "--fold-key",
+        default="offset",
+        help="sort each chunk by this integer column, the k-folds of the memory-mapped chunks are then split as index ranges without reading the data, use an empty string to keep the order",
     )
     argparser.add_argument(
         "--max-writers",
@@ -60,7 +73,16 @@ class Main(LoadTrainingSets):
         import numpy as np
         from classifier.process import status
 
+        if self.opts.format is None:
+            self.opts.format = "npy" if self.opts.compression is None else "torch"
+        if self.opts.format == "npy" and self.opts.compression is not None:
+            raise ValueError("Compression is not supported for memory-mapped chunks")
+
         datasets = self.load_training_sets(parser)
+        fold_key = self.opts.fold_key or None
+        if fold_key is not None and fold_key not in datasets.datasets:
+            logging.warn(f'The fold key "{fold_key}" is not found, chunks are not sorted')
+            fold_key = None
         size = len(datasets)
         chunks = np.arange(size)
         if self.opts.shuffle:
@@ -80,7 +102,13 @@ class Main(LoadTrainingSets):
             initializer=status.initializer,
         ) as pool:
             _ = pool.map(
-                _save_cache(datasets, IOSetting.output, self.opts.compression),
+                _save_cache(
+                    datasets,
+                    IOSetting.output,
+                    self.opts.format,
+                    self.opts.compression,
+                    fold_key,
+                ),
                 zip(range(len(chunks)), chunks),
             )
         logging.info(
@@ -91,15 +119,26 @@ class Main(LoadTrainingSets):
             "size": size,
             "chunksize": chunksize,
             "shuffle": self.opts.shuffle,
+            "format": self.opts.format,
             "compression": self.opts.compression,
+            "fold_key": fold_key,
         }
 
 
 class _save_cache:
-    def __init__(self, dataset: StackDataset, path: EOS, compression: str = None):
+    def __init__(
+        self,
+        dataset: StackDataset,
+        path: EOS,
+        format: str = "npy",
+        compression: str = None,
+        fold_key: str = None,
+    ):
         self.dataset = dataset
         self.path = path
+        self.format = format
         self.compression = compression
+        self.fold_key = fold_key
 
     def __call__(self, args: tuple[int, npt.ArrayLike]):
         import torch
@@ -109,7 +148,34 @@ class _save_cache:
         subset = Subset(self.dataset, indices)
         chunks = [*io_loader(subset)]
         data = {k: torch.cat([c[k] for c in chunks]) for k in self.dataset.datasets}
-        with fsspec.open(
-            self.path / f"chunk{chunk}.pt", "wb", compression=self.compression
-        ) as f:
-            torch.save(data, f)
+        if self.fold_key is not None:
+            # stable, the shuffled order is kept within each fold
+            order = torch.sort(data[self.fold_key], stable=True).indices
+            data = {k: v[order] for k, v in data.items()}
+        if self.format == "npy":
+            self._save_npy(chunk, data)
+        else:
+            with fsspec.open(
+                self.path / f"chunk{chunk}.pt", "wb", compression=self.compression
+            ) as f:
+                torch.save(data, f)
+
+    def _save_npy(self, chunk: int, data: dict[str, torch.Tensor]):
+        import numpy as np
+
+        manifest = {"size": len(next(iter(data.values()))), "columns": {}}
+        for k, v in data.items():
+            v = v.numpy()
+            with fsspec.open(self.path / f"chunk{chunk}.{k}.npy", "wb") as f:
+                np.save(f, v)
+            manifest["columns"][k] = {"dtype": v.dtype.str, "shape": v.shape}
+        if self.fold_key is not None:
+            values, counts = np.unique(data[self.fold_key].numpy(), return_counts=True)
+            manifest["runs"] = {
+                "key": self.fold_key,
+                "values": values.tolist(),
+                "counts": counts.tolist(),
+            }
+        # the manifest is written last and marks the chunk as complete
+        with fsspec.open(self.path / f"chunk{chunk}.json", "wt") as f:
+            json.dump(manifest, f)
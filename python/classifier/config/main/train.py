@@ -49,6 +49,21 @@ class Main(SelectDevice, LoadTrainingSets):
     )
 
     def run(self, parser: EntryPoint):
+        from classifier.process.monitor import Monitor
+
+        from ..setting.default import IO as IOSetting
+        from ..setting.default import Monitor as MonitorSetting
+
+        if MonitorSetting.enable:
+            Monitor.start(
+                IOSetting.output / MonitorSetting.file, flush=MonitorSetting.flush
+            )
+        try:
+            return self._run(parser)
+        finally:
+            Monitor.stop()
+
+    def _run(self, parser: EntryPoint):
         from concurrent.futures import ProcessPoolExecutor as Pool
 
         from classifier.process import status
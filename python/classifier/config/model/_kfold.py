@@ -9,8 +9,10 @@ from classifier.nn.dataset import io_loader
 from classifier.task import ArgParser, Model, converter
 
 if TYPE_CHECKING:
+    import numpy.typing as npt
     from classifier.discriminator import Classifier
     from classifier.process.device import Device
+    from torch import Tensor
     from torch.utils.data import Dataset, StackDataset
 
 
@@ -49,29 +51,95 @@ class KFoldClassifier(ABC, Model):
                 )
             ]
         else:
-            import numpy as np
-            from torch.utils.data import ConcatDataset, Subset
-
-            key = dataset.datasets[self.opts.kfold_split_key]
-            offset = []
-            for i in io_loader(key):
-                offset.append(i.numpy() % self.kfolds)
-            offset = np.concatenate(offset)
-            indices = np.arange(len(offset))
-            folds = [Subset(dataset, indices[offset == i]) for i in range(self.kfolds)]
+            from classifier.nn.stream import StreamDataset
+
             max_folds = min(
                 self.kfolds, getattr(self.opts, "kfold_max_folds", self.kfolds)
             )
+            if isinstance(dataset, StreamDataset):
+                return [
+                    _train_classifier(
+                        self.initializer(kfolds=self.kfolds, offset=i),
+                        dataset.select(
+                            _fold(self.opts.kfold_split_key, self.kfolds, i, False)
+                        ),
+                        dataset.select(
+                            _fold(self.opts.kfold_split_key, self.kfolds, i, True)
+                        ),
+                    )
+                    for i in range(max_folds)
+                ]
+
             return [
                 _train_classifier(
-                    self.initializer(kfolds=self.kfolds, offset=i),
-                    ConcatDataset(folds[:i] + folds[i + 1 :]),
-                    folds[i],
+                    self.initializer(kfolds=self.kfolds, offset=i), training, validation
+                )
+                for i, (training, validation) in enumerate(
+                    _split(
+                        dataset, self.opts.kfold_split_key, self.kfolds, max_folds
+                    )
                 )
-                for i in range(max_folds)
             ]
 
 
+def _split(dataset: StackDataset, key: str, kfolds: int, max_folds: int):
+    """
+    Training and validation sets of the first ``max_folds`` folds. The columns of the cached chunks sorted by ``key`` give the folds as index ranges without reading the data, other columns are read once.
+    """
+    import numpy as np
+    from classifier.nn.fold import IndexRanges, RangeSubset
+    from torch.utils.data import ConcatDataset, Subset
+
+    column = dataset.datasets[key]
+    parts = column.datasets if isinstance(column, ConcatDataset) else [column]
+    runs = [getattr(part, "runs", None) for part in parts]
+    if all(r is not None for r in runs):
+        runs = [
+            (start, *r)
+            for start, r in zip(np.cumsum([0, *map(len, parts[:-1])]), runs)
+        ]
+        return [
+            (
+                RangeSubset(
+                    dataset, IndexRanges.from_runs(runs, _fold(None, kfolds, i, False))
+                ),
+                RangeSubset(
+                    dataset, IndexRanges.from_runs(runs, _fold(None, kfolds, i, True))
+                ),
+            )
+            for i in range(max_folds)
+        ]
+    offset = np.concatenate([_read_column(part) for part in parts]) % kfolds
+    indices = np.arange(len(offset))
+    return [
+        (Subset(dataset, indices[offset != i]), Subset(dataset, indices[offset == i]))
+        for i in range(max_folds)
+    ]
+
+
+def _read_column(column: Dataset):
+    import numpy as np
+    import torch
+
+    if isinstance(column, torch.Tensor):
+        return column.numpy()
+    if hasattr(column, "array"):
+        return np.asarray(column.array)
+    return np.concatenate([batch.numpy() for batch in io_loader(column)])
+
+
+class _fold:
+    def __init__(self, key: str, kfolds: int, offset: int, validation: bool):
+        self._key = key
+        self._kfolds = kfolds
+        self._offset = offset
+        self._validation = validation
+
+    def __call__(self, batch: dict[str, Tensor] | npt.NDArray):
+        offset = batch if self._key is None else batch[self._key]
+        return (offset % self._kfolds == self._offset) == self._validation
+
+
 class _train_classifier:
     def __init__(
         self,
@@ -22,3 +22,10 @@ class DataLoader(Cascade):
     batch_io: int = 1_000_000
     batch_eval: int = 2**15
     num_workers: int = 0
+
+
+class Monitor(Cascade):
+    enable: bool = False
+    file: str = "monitor.jsonl"
+    interval: int = 10
+    flush: float = 1.0
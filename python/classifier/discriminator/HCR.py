@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Callable
 
@@ -9,6 +8,7 @@ import torch
 from ..config.scheduler import SkimStep
 from ..config.setting.HCR import Input, InputBranch, Output
 from ..config.state.label import MultiClass
+from ..monitor.training import roc_auc
 from ..nn.blocks import HCR
 from ..nn.schedule import MilestoneStep
 from ..utils import noop
@@ -39,8 +39,8 @@ class GBN(MilestoneStep):
 
 
 class _HCRSkim(Model):
-    def __init__(self):
-        self.tensors = defaultdict(list)
+    def __init__(self, nn: HCR):
+        self._nn = nn
 
     @property
     def n_parameters(self) -> int:
@@ -51,8 +51,10 @@ class _HCRSkim(Model):
         return noop()
 
     def forward(self, batch: dict[str, Tensor]):
-        for k in [Input.CanJet, Input.NotCanJet, Input.ancillary]:
-            self.tensors[k].append(batch[k])
+        # only the running sums of the GBN layers are kept, the memory does not grow with the dataset
+        self._nn.updateMeanStd(
+            batch[Input.CanJet], batch[Input.NotCanJet], batch[Input.ancillary]
+        )
         return {}
 
     def loss(self, _):
@@ -142,13 +144,6 @@ class HCRClassifier(Classifier):
         self._HCR: HCRModel = None
 
     def training_stages(self):
-        skim = _HCRSkim()
-        yield TrainingStage(
-            name="Setup GBN",
-            model=skim,
-            schedule=SkimStep(),
-            do_benchmark=False,
-        )
         if self._HCR is None:
             self._HCR = HCRModel(
                 arch=self._arch,
@@ -156,12 +151,13 @@ class HCRClassifier(Classifier):
             )
             self._HCR.ghost_batch = self._ghost_batch
             self._HCR.to(self.device)
-            self._HCR.module.setMeanStd(
-                torch.cat(skim.tensors[Input.CanJet]),
-                torch.cat(skim.tensors[Input.NotCanJet]),
-                torch.cat(skim.tensors[Input.ancillary]),
+            yield TrainingStage(
+                name="Setup GBN",
+                model=_HCRSkim(self._HCR.module),
+                schedule=SkimStep(),
+                do_benchmark=False,
             )
-            skim = None
+            self._HCR.module.setMeanStd()
         yield TrainingStage(
             name="Training",
             model=self._HCR,
@@ -170,3 +166,14 @@ class HCRClassifier(Classifier):
         )
         self._HCR.ghost_batch = None
         # TODO finetuning
+
+    @torch.no_grad()
+    def metrics(self, pred: dict[str, Tensor]):
+        score = torch.softmax(pred[Output.class_score], dim=-1)
+        label = pred[Input.label]
+        weight = pred[Input.weight]
+        return {
+            f"auc_{name}": roc_auc(score[:, i], label == i, weight)
+            for i, name in enumerate(MultiClass.labels)
+            if (label == i).any()
+        }
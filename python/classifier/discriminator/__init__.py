@@ -12,9 +12,12 @@ from torch import Tensor, nn
 from torch.utils.data import Dataset
 
 from ..config.setting.default import DataLoader as DLSetting
+from ..config.setting.default import Monitor as MonitorSetting
+from ..monitor.training import StepMonitor
 from ..nn.dataset import mp_loader
 from ..nn.schedule import Schedule
 from ..process.device import Device
+from ..process.monitor import Monitor
 from ..typetools import WithUUID
 
 
@@ -105,8 +108,22 @@ class Classifier(WithUUID, ABC):
         self,
     ): ...  # TODO evaluataion
 
-    def _benchmark(self, epoch: int, pred: dict[str, Tensor], *group: str):
-        return {}  # TODO monitor
+    def metrics(self, pred: dict[str, Tensor]) -> dict[str, float]:
+        return {}
+
+    def _benchmark(
+        self, epoch: int, model: Model, pred: dict[str, Tensor], *group: str
+    ):
+        benchmark = {"loss": model.loss(pred).item()} | self.metrics(pred)
+        Monitor.send(
+            "epoch",
+            classifier=self.name,
+            stage=group[0],
+            dataset=group[1],
+            epoch=epoch,
+            **benchmark,
+        )
+        return benchmark
 
     def _train(
         self,
@@ -131,25 +148,34 @@ class Classifier(WithUUID, ABC):
         for epoch in range(schedule.epoch):
             self.cleanup()
             model.train()
-            for batch in bs.dataloader:
+            steps = StepMonitor(
+                MonitorSetting.interval,
+                self.device,
+                classifier=self.name,
+                stage=stage.name,
+                epoch=epoch,
+            )
+            for batch in steps.iterate(bs.dataloader):
                 optimizer.zero_grad()
                 pred = model.forward(batch)
-                # TODO monitor pred
                 loss = model.loss(pred)
                 loss.backward()
                 optimizer.step()
+                steps.step(loss)
+            steps.flush()
             if stage.do_benchmark:
                 benchmark.append(
                     {
                         k: self._benchmark(
                             epoch,
+                            model,
                             self._evaluate(model, datasets[k]),
                             stage.name,
                             f"{k} set",
                         )
                         for k in datasets
                     }
-                )  # TODO monitor
+                )
             lr.step()
             bs.step()
             model.step()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Iterable
+
+import torch
+from torch import Tensor
+from base_class.system.memory import rss
+
+from ..process.monitor import Monitor
+
+
+def _cpu_time():
+    t = os.times()
+    return t.user + t.system
+
+
+class Usage:
+    """
+    CPU usage since the last call and memory of the current process, GPU usage and memory of ``device``. The GPU usage needs ``pynvml`` and is skipped if not available.
+    """
+
+    def __init__(self, device: torch.device = None):
+        self._device = device
+        self._last = time.perf_counter(), _cpu_time()
+
+    def __call__(self) -> dict[str, float]:
+        now, cpu = time.perf_counter(), _cpu_time()
+        usage = {
+            "cpu_percent": 100 * (cpu - self._last[1]) / max(now - self._last[0], 1e-9),
+            "memory_rss": rss(),
+        }
+        self._last = now, cpu
+        if self._device is not None and self._device.type == "cuda":
+            usage["gpu_memory"] = torch.cuda.memory_allocated(self._device)
+            usage["gpu_memory_peak"] = torch.cuda.max_memory_allocated(self._device)
+            try:
+                usage["gpu_percent"] = torch.cuda.utilization(self._device)
+            except Exception:
+                pass
+        return usage
+
+
+class StepMonitor:
+    """
+    Aggregate the training steps and send them to the :class:`~classifier.process.monitor.Monitor` every ``interval`` steps. The loss is only copied from the device when sent.
+    """
+
+    def __init__(self, interval: int, device: torch.device = None, **tags):
+        self.interval = interval
+        self.tags = tags
+        self._device = device
+        self._enabled = Monitor.running()
+        self._usage = Usage(device)
+        self._reset()
+
+    def _reset(self):
+        self._steps = 0
+        self._samples = 0
+        self._wait = 0.0
+        self._loss: Tensor = None
+        self._start = time.perf_counter()
+
+    def iterate(self, loader: Iterable[dict[str, Tensor]]):
+        """Iterate over the batches of ``loader`` and measure the time spent waiting for them."""
+        batches = iter(loader)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                return
+            self._wait += time.perf_counter() - start
+            self._samples += len(next(iter(batch.values())))
+            yield batch
+
+    def step(self, loss: Tensor):
+        if not self._enabled:
+            return
+        self._steps += 1
+        if isinstance(loss, Tensor):
+            loss = loss.detach()
+            self._loss = loss if self._loss is None else self._loss + loss
+        if self._steps >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if not self._enabled or self._steps == 0:
+            return
+        if self._device is not None and self._device.type == "cuda":
+            torch.cuda.synchronize(self._device)
+        elapsed = time.perf_counter() - self._start
+        record = {
+            "steps": self._steps,
+            "samples": self._samples,
+            "samples_per_second": self._samples / elapsed,
+            "data_wait_fraction": self._wait / elapsed,
+        }
+        if self._loss is not None:
+            record["loss"] = self._loss.item() / self._steps
+        Monitor.send("step", **self.tags, **record, **self._usage())
+        self._reset()
+
+
+def roc_auc(score: Tensor, label: Tensor, weight: Tensor = None) -> float:
+    """Weighted area under the ROC curve, ``label`` is ``True`` for the signal."""
+    if weight is None:
+        weight = torch.ones_like(score)
+    order = torch.argsort(score, descending=True)
+    weight = weight[order].double()
+    label = label[order]
+    tp = torch.cumsum(weight * label, 0)
+    fp = torch.cumsum(weight * ~label, 0)
+    if tp[-1] == 0 or fp[-1] == 0:
+        return float("nan")
+    zero = tp.new_zeros(1)
+    return float(torch.trapz(torch.cat([zero, tp / tp[-1]]), torch.cat([zero, fp / fp[-1]])))
@@ -399,10 +399,12 @@ class GhostBatchNorm1d(
         print()
 
     @torch.no_grad()
-    def setMeanStd(self, x, mask=None):
+    def updateMeanStd(self, x, mask=None):
+        """
+        Accumulate the count, sum and sum of squares of a batch, the mean and std are set by :meth:`setMeanStd`.
+        """
         batch_size = x.shape[0]
         pixels = x.shape[2]
-        pixel_groups = pixels // self.stride
         x = (
             x.detach()
             .transpose(1, 2)
@@ -413,10 +415,26 @@ class GhostBatchNorm1d(
             mask = mask.detach().view(batch_size * pixels)
             x = x[mask == 0, :, :]
         # this won't work for any layers with stride!=1
-        x = x.view(-1, 1, self.stride, self.features)
-        m64 = x.mean(dim=0, keepdim=True, dtype=torch.float64)  # .to(self.device)
-        self.m = m64.type(torch.float32).to(self.device)
-        self.s = x.std(dim=0, keepdim=True).to(self.device)
+        x = x.view(-1, 1, self.stride, self.features).type(torch.float64)
+        sums = getattr(self, "_sums", None)
+        if sums is None:
+            sums = self._sums = [0, 0.0, 0.0]
+        sums[0] += x.shape[0]
+        sums[1] = sums[1] + x.sum(dim=0, keepdim=True)
+        sums[2] = sums[2] + (x * x).sum(dim=0, keepdim=True)
+
+    @torch.no_grad()
+    def setMeanStd(self, x=None, mask=None):
+        if x is not None:
+            self._sums = None
+            self.updateMeanStd(x, mask)
+        n, s1, s2 = self._sums
+        self._sums = None
+        m64 = s1 / n
+        var64 = (s2 - s1 * m64) / (n - 1)
+        # on the device of the buffers, which follows the module
+        self.m = m64.type(torch.float32).to(self.m.device)
+        self.s = var64.clamp(min=0).sqrt().type(torch.float32).to(self.s.device)
         # if x.shape[0]>16777216: # too big for quantile???
         self.initialized = True
         # self.setGhostBatches(0)
@@ -427,7 +445,7 @@ class GhostBatchNorm1d(
         # if nGhostBatches==0 and self.nGhostBatches>0:
         #     print('Set # of ghost batches to zero: %s'%self.name)
         self.nGhostBatches = torch.tensor(nGhostBatches, dtype=torch.long).to(
-            self.device
+            self.nGhostBatches.device
         )
 
     def forward(self, x, mask=None, debug=False):
@@ -1787,13 +1805,13 @@ class InputEmbed(nn.Module):
 
         return j, d, q, a, o, ooMdPhi, doMdPhi, mask, mask_oo, mask_do
 
-    def setMeanStd(self, j, o, a):
+    def updateMeanStd(self, j, o, a):
         j, d, q, a, o, ooMdPhi, doMdPhi, mask, mask_oo, mask_do = self.dataPrep(
             j, o, a
         )  # , device='cpu')
-        self.ancillaryEmbed.setMeanStd(a)
+        self.ancillaryEmbed.updateMeanStd(a)
         if self.useOthJets:
-            self.othJetEmbed.setMeanStd(o, mask)
+            self.othJetEmbed.updateMeanStd(o, mask)
 
             n, self.dsl, self.osl = d.shape[0], d.shape[2], o.shape[2]
             MdPhi = torch.cat(
@@ -1810,13 +1828,28 @@ class InputEmbed(nn.Module):
                 ),
                 dim=1,
             )
-            self.MdPhi_embed.setMeanStd(MdPhi, mask_MdPhi)
+            self.MdPhi_embed.updateMeanStd(MdPhi, mask_MdPhi)
             # self. diMdPhi_embed.setMeanStd(ooMdPhi.view(n, 2, self.osl*self.osl), mask_oo.view(n, self.osl*self.osl))
             # self.triMdPhi_embed.setMeanStd(doMdPhi.view(n, 2, self.dsl*self.osl), mask_do.view(n, self.dsl*self.osl))
 
-        self.jetEmbed.setMeanStd(j)
-        self.dijetEmbed.setMeanStd(d)
-        self.quadjetEmbed.setMeanStd(q)
+        self.jetEmbed.updateMeanStd(j)
+        self.dijetEmbed.updateMeanStd(d)
+        self.quadjetEmbed.updateMeanStd(q)
+
+    def _embeds(self):
+        embeds = [self.ancillaryEmbed]
+        if self.useOthJets:
+            embeds += [self.othJetEmbed, self.MdPhi_embed]
+        return embeds + [self.jetEmbed, self.dijetEmbed, self.quadjetEmbed]
+
+    def setMeanStd(self, j=None, o=None, a=None):
+        if j is not None:
+            # the given batch replaces the accumulated sums, as in GhostBatchNorm1d.setMeanStd
+            for embed in self._embeds():
+                embed._sums = None
+            self.updateMeanStd(j, o, a)
+        for embed in self._embeds():
+            embed.setMeanStd()
 
     def setGhostBatches(self, nGhostBatches, subset=False):
         self.ancillaryEmbed.setGhostBatches(nGhostBatches)
@@ -2017,7 +2050,10 @@ class HCR(nn.Module):
         )  # [self.quadjetResNetBlock.reinforce[-1], self.select_q])
         self.forwardCalls = 0
 
-    def setMeanStd(self, j, o, a):
+    def updateMeanStd(self, j, o, a):
+        self.inputEmbed.updateMeanStd(j, o, a)
+
+    def setMeanStd(self, j=None, o=None, a=None):
         self.inputEmbed.setMeanStd(j, o, a)
 
     def setGhostBatches(self, nGhostBatches, subset=False):
@@ -11,7 +11,14 @@ if TYPE_CHECKING:
 def entry_size(dataset: Dataset) -> int:
     from torch.utils.data import DataLoader
 
-    entry = next(iter(DataLoader(dataset, batch_size=1, num_workers=0, shuffle=False)))
+    from .stream import StreamDataset
+
+    if isinstance(dataset, StreamDataset):
+        entry = next(iter(dataset.batched(1)))
+    else:
+        entry = next(
+            iter(DataLoader(dataset, batch_size=1, num_workers=0, shuffle=False))
+        )
     if isinstance(entry, (list, tuple)):
         tensors = entry
     elif isinstance(entry, dict):
@@ -24,7 +31,17 @@ def entry_size(dataset: Dataset) -> int:
 def mp_loader(dataset: Dataset, **kwargs):
     from torch.utils.data import DataLoader
 
+    from .stream import StreamDataset
+
     kwargs.setdefault("num_workers", DLSetting.num_workers)
+    if isinstance(dataset, StreamDataset):
+        # the batches are made and shuffled by the dataset
+        dataset = dataset.batched(
+            batch_size=kwargs.pop("batch_size", 1),
+            shuffle=kwargs.pop("shuffle", False),
+            drop_last=kwargs.pop("drop_last", False),
+        )
+        kwargs["batch_size"] = None
     loader = DataLoader(dataset, **kwargs)
     if loader.num_workers != 0:
         from ..process import status
@@ -33,6 +50,29 @@ def mp_loader(dataset: Dataset, **kwargs):
     return loader
 
 
+def mutable_loader(
+    dataset: Dataset,
+    batch_size: int,
+    shuffle: bool = False,
+    drop_last: bool = False,
+    **kwargs,
+):
+    """
+    The batch size can be changed in place by ``loader.batch_sampler.batch_size`` between epochs and the workers are persistent, so the processes are created only once.
+    """
+    from torch.utils.data import BatchSampler, RandomSampler, SequentialSampler
+
+    sampler = (RandomSampler if shuffle else SequentialSampler)(dataset)
+    kwargs.setdefault("num_workers", DLSetting.num_workers)
+    if kwargs["num_workers"] != 0:
+        kwargs.setdefault("persistent_workers", True)
+    return mp_loader(
+        dataset,
+        batch_sampler=BatchSampler(sampler, batch_size, drop_last=drop_last),
+        **kwargs,
+    )
+
+
 def io_loader(dataset: Dataset, **kwargs):
     if "batch_size" not in kwargs:
         kwargs["batch_size"] = int(DLSetting.batch_io // (entry_size(dataset) / 4))
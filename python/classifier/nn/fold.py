@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+from torch.utils.data import Dataset, Subset
+
+
+class IndexRanges(Sequence[int]):
+    """
+    Indices given by ``[start, stop)`` ranges, the indices are never materialized.
+    """
+
+    def __init__(self, starts: npt.ArrayLike, stops: npt.ArrayLike):
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        kept = stops > starts
+        self._starts = starts[kept]
+        self._cumsum = np.concatenate([[0], np.cumsum(stops[kept] - starts[kept])])
+
+    @classmethod
+    def from_runs(
+        cls,
+        runs: Iterable[tuple[int, npt.ArrayLike, npt.ArrayLike]],
+        selected: Callable[[np.ndarray], np.ndarray],
+    ):
+        """
+        Select the runs of sorted storage.
+
+        Parameters
+        ----------
+        runs : Iterable[tuple[int, ArrayLike, ArrayLike]]
+            The first index, the values and the number of entries of the consecutive runs of each part.
+        selected : Callable[[ndarray], ndarray]
+            Return a mask of the selected values.
+        """
+        starts, stops = [], []
+        for base, values, counts in runs:
+            edges = base + np.concatenate([[0], np.cumsum(counts)])
+            mask = selected(np.asarray(values))
+            starts.append(edges[:-1][mask])
+            stops.append(edges[1:][mask])
+        return cls(np.concatenate(starts), np.concatenate(stops))
+
+    def take(self, indices: npt.ArrayLike) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.int64)
+        ranges = np.searchsorted(self._cumsum, indices, side="right") - 1
+        return self._starts[ranges] + (indices - self._cumsum[ranges])
+
+    def __len__(self):
+        return int(self._cumsum[-1])
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index {index} out of range")
+        return int(self.take(index))
+
+
+class RangeSubset(Subset):
+    """
+    A :class:`~torch.utils.data.Subset` of :class:`IndexRanges`, the indices of a batch are mapped at once.
+    """
+
+    indices: IndexRanges
+
+    def __init__(self, dataset: Dataset, indices: IndexRanges):
+        super().__init__(dataset, indices)
+
+    def __getitems__(self, indices: list[int]):
+        indices = self.indices.take(indices).tolist()
+        if callable(getattr(self.dataset, "__getitems__", None)):
+            return self.dataset.__getitems__(indices)
+        return [self.dataset[i] for i in indices]
@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod
 from bisect import bisect_right
 from typing import TYPE_CHECKING, Iterable, Optional
 
-from .dataset import mp_loader
+from .dataset import mp_loader, mutable_loader
 
 if TYPE_CHECKING:
     from torch import optim
@@ -65,7 +65,7 @@ class MilestoneStep:
         return changed
 
 
-class MultiStepBS(BSScheduler, MilestoneStep):
+class MultiStepBS(MilestoneStep, BSScheduler):
     def __init__(
         self,
         dataset: Dataset,
@@ -82,13 +82,24 @@ class MultiStepBS(BSScheduler, MilestoneStep):
 
         self._bs = batch_size
         self._dataloader: DataLoader = None
+        self._dataloader_bs: int = None
 
     @property
     def dataloader(self):
-        if self._dataloader is None or self._dataloader.batch_size != self._bs:
-            self._dataloader = mp_loader(
-                self.dataset, batch_size=self._bs, **self.kwargs
-            )
+        if hasattr(self.dataset, "set_epoch"):
+            # streamed datasets make the batches in the workers
+            if self._dataloader is None or self._dataloader_bs != self._bs:
+                self._dataloader = mp_loader(
+                    self.dataset, batch_size=self._bs, **self.kwargs
+                )
+                self._dataloader_bs = self._bs
+            self._dataloader.dataset.set_epoch(self._step)
+        else:
+            if self._dataloader is None:
+                self._dataloader = mutable_loader(
+                    self.dataset, batch_size=self._bs, **self.kwargs
+                )
+            self._dataloader.batch_sampler.batch_size = self._bs
         return self._dataloader
 
     def step(self, epoch: int = None):
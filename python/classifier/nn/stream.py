@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import copy
+from typing import TYPE_CHECKING, Callable, Iterable
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from base_class.root import Chunk
+
+    from ..df.io import FromRoot, ToTensor
+
+
+def _cat(tensors: list[dict[str, torch.Tensor]]) -> dict[str, torch.Tensor]:
+    if len(tensors) == 1:
+        return tensors[0]
+    return {k: torch.cat([t[k] for t in tensors]) for k in tensors[0]}
+
+
+def _take(tensors: dict[str, torch.Tensor], index) -> dict[str, torch.Tensor]:
+    return {k: v[index] for k, v in tensors.items()}
+
+
+def _len(tensors: dict[str, torch.Tensor]) -> int:
+    return len(next(iter(tensors.values()))) if tensors else 0
+
+
+class StreamDataset(IterableDataset):
+    """
+    Stream the chunks of ROOT files as batches of tensors, without loading the whole dataset in memory.
+
+    Each chunk is read by :meth:`~classifier.df.io.FromRoot.read` and converted by the postprocessors and :meth:`~classifier.df.io.ToTensor.tensor` in the :class:`~torch.utils.data.DataLoader` workers. The chunks are split across the workers after a shuffle seeded by ``(seed, epoch)`` and the entries are shuffled in a buffer seeded by ``(seed, epoch, worker)``, so each epoch is reproducible for a given number of workers. The memory of each worker is bounded by the buffer and one chunk.
+
+    The batches are made by the dataset, use :meth:`batched` and ``batch_size=None`` in the :class:`~torch.utils.data.DataLoader`, or :func:`~classifier.nn.dataset.mp_loader` which does both.
+
+    Parameters
+    ----------
+    buffer_size : int, optional, default=1_000_000
+        Minimum number of entries to shuffle together.
+    seed : int, optional, default=0
+        Seed of the shuffle.
+    """
+
+    def __init__(self, buffer_size: int = 1_000_000, seed: int = 0):
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.epoch = 0
+        self.batch_size = 1
+        self.shuffle = False
+        self.drop_last = False
+        self._sources: list[
+            tuple[FromRoot, ToTensor, list[Callable[[pd.DataFrame], pd.DataFrame]]]
+        ] = []
+        self._chunks: list[tuple[int, Chunk]] = []
+        self._keys: set[str] = None
+        self._selection: Callable[[dict[str, torch.Tensor]], torch.Tensor] = None
+
+    def add(
+        self,
+        from_root: FromRoot,
+        chunks: Iterable[Chunk],
+        to_tensor: ToTensor,
+        postprocessors: Iterable[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    ):
+        """Stream ``chunks`` read by ``from_root``."""
+        self._chunks.extend((len(self._sources), chunk) for chunk in chunks)
+        self._sources.append((from_root, to_tensor, [*(postprocessors or ())]))
+        return self
+
+    def keys(self) -> set[str]:
+        """Names of the tensors given by all sources."""
+        keys = set.intersection(*(set(t._columns) for _, t, _ in self._sources))
+        if self._keys is not None:
+            keys &= self._keys
+        return keys
+
+    @classmethod
+    def concat(cls, *datasets: StreamDataset, keys: Iterable[str] = None):
+        """Stream the chunks of all ``datasets`` and only keep ``keys``, the options are taken from the first one."""
+        dataset = copy.copy(datasets[0])
+        dataset._sources, dataset._chunks = [], []
+        for d in datasets:
+            offset = len(dataset._sources)
+            dataset._sources.extend(d._sources)
+            dataset._chunks.extend((offset + i, chunk) for i, chunk in d._chunks)
+        if keys is not None:
+            dataset._keys = {*keys}
+        return dataset
+
+    @property
+    def num_entries(self) -> int:
+        """Number of entries before selection."""
+        return sum(len(chunk) for _, chunk in self._chunks)
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def batched(self, batch_size: int, shuffle: bool = False, drop_last: bool = False):
+        """A copy yielding batches of ``batch_size``."""
+        dataset = copy.copy(self)
+        dataset.batch_size = batch_size
+        dataset.shuffle = shuffle
+        dataset.drop_last = drop_last
+        return dataset
+
+    def select(self, selection: Callable[[dict[str, torch.Tensor]], torch.Tensor]):
+        """A copy only yielding the entries where ``selection`` is ``True``."""
+        dataset = copy.copy(self)
+        dataset._selection = selection
+        return dataset
+
+    def _read(self, index: int) -> dict[str, torch.Tensor]:
+        source, chunk = self._chunks[index]
+        from_root, to_tensor, postprocessors = self._sources[source]
+        df = from_root.read(chunk)
+        for postprocessor in postprocessors:
+            df = postprocessor(df)
+        tensors = to_tensor.tensor(df)
+        if self._keys is not None:
+            tensors = {k: v for k, v in tensors.items() if k in self._keys}
+        if self._selection is not None:
+            tensors = _take(tensors, self._selection(tensors))
+        return tensors
+
+    def _split(self, tensors: dict[str, torch.Tensor], keep: int):
+        """Yield the batches of ``tensors`` and return the last ``keep`` entries (at least) as the remainder."""
+        n = max(_len(tensors) - keep, 0) // self.batch_size * self.batch_size
+        for start in range(0, n, self.batch_size):
+            yield _take(tensors, slice(start, start + self.batch_size))
+        return _take(tensors, slice(n, None))
+
+    def __iter__(self):
+        worker = get_worker_info()
+        worker, n_workers = (0, 1) if worker is None else (worker.id, worker.num_workers)
+        order = np.arange(len(self._chunks))
+        if self.shuffle:
+            np.random.default_rng((self.seed, self.epoch)).shuffle(order)
+        generator = torch.Generator().manual_seed(
+            int(np.random.SeedSequence((self.seed, self.epoch, worker)).generate_state(1)[0])
+        )
+
+        buffer = []
+        size = 0
+        for index in order[worker::n_workers]:
+            tensors = self._read(index)
+            if _len(tensors) == 0:
+                continue
+            buffer.append(tensors)
+            size += _len(tensors)
+            if self.shuffle:
+                if size < self.buffer_size:
+                    continue
+                tensors = _cat(buffer)
+                tensors = _take(tensors, torch.randperm(size, generator=generator))
+                # keep half of the buffer to mix with the next chunks
+                remain = yield from self._split(tensors, self.buffer_size // 2)
+            else:
+                remain = yield from self._split(_cat(buffer), 0)
+            buffer, size = [remain], _len(remain)
+
+        if size > 0:
+            tensors = _cat(buffer)
+            if self.shuffle:
+                tensors = _take(tensors, torch.randperm(size, generator=generator))
+            remain = yield from self._split(tensors, 0)
+            if not self.drop_last and _len(remain) > 0:
+                yield remain
@@ -1,164 +1,97 @@
-raise NotImplementedError  # noqa # TODO work in progress
 from __future__ import annotations
 
+import json
 import logging
 import os
-from collections import defaultdict
-from multiprocessing import Lock as Lock_
-from multiprocessing.connection import Client, Connection, Listener
-from multiprocessing.synchronize import Lock
-from queue import Queue
-from threading import Thread
-from typing import Any, Callable
+import time
+from queue import Empty
+from typing import TYPE_CHECKING, Any
 
-from . import Context, get_context, is_main, is_poxis
-from ..static import Constant
+import fsspec
 
+from . import get_context
+from .initializer import status
 
-class Monitor:
-    # data
-    _queue: defaultdict[str, Queue[tuple[str, tuple, dict[str, Any]]]]
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+    from multiprocessing.queues import Queue
+
+    from . import Context
 
-    # connection
-    _authkey: bytes
 
-    _listener: Listener
-    _listener_thread: Thread
+class Monitor:
+    """
+    Collect the records sent by the main process and the workers in a listener process, which appends them to a JSON lines file.
 
-    _worker: Worker
+    Call :meth:`start` in the main process before creating the pools, the queue is given to the workers by :data:`status.initializer`. :meth:`send` does nothing if the monitor is not running.
+    """
 
-    # state
-    _queue_lock: Lock
-    _accepting: bool = False
-    _stopped: bool = True
+    _queue: Queue = None
+    _listener: BaseProcess = None
+
+    @classmethod
+    def running(cls):
+        return cls._queue is not None
 
-    @staticmethod
-    def start():
-        if not Monitor._stopped:
+    @classmethod
+    def start(cls, path: str, flush: float = 1.0, context: Context = None):
+        if not status.is_main:
+            raise RuntimeError("Monitor can only be started in the main process")
+        if cls.running():
             logging.warn("Monitor is already running")
             return
-        if is_main():
-            Monitor._stopped = False
-            Monitor._authkey = os.urandom(Constant.authkey_size)
-            Monitor._queue = defaultdict(Queue)
-            Monitor._listener = Listener(
-                address=..., authkey=Monitor._authkey  # TODO Address class
+        if context is None:
+            context = status.context or get_context()
+        cls._queue = context.Queue()
+        cls._listener = context.Process(
+            target=_listen, args=(cls._queue, str(path), flush), daemon=True
+        )
+        cls._listener.start()
+        status.initializer.add_unique(_connect_monitor)
+
+    @classmethod
+    def send(cls, category: str, **data: Any):
+        if cls._queue is not None:
+            cls._queue.put(
+                {"category": category, "time": time.time(), "pid": os.getpid()} | data
             )
-            Monitor._listener_thread = Thread(target=Monitor._listen)
-            Monitor._listener_thread.start()
-            Monitor._queue_lock = Lock_()
 
-    @staticmethod
-    def _handle(connection: Connection):
+    @classmethod
+    def stop(cls):
+        if status.is_main and cls.running():
+            cls._queue.put(None)
+            cls._listener.join()
+            cls._queue.close()
+            cls._queue = None
+            cls._listener = None
+
+
+def _listen(queue: Queue, path: str, flush: float):
+    with fsspec.open(path, "wt") as f:
+        flushed = time.monotonic()
         while True:
             try:
-                data = connection.recv()
-                Monitor._add(data)
-            except EOFError:
+                record = queue.get(timeout=flush)
+            except Empty:
+                record = ...
+            if record is None:
                 break
+            if record is not ...:
+                f.write(json.dumps(record, default=str))
+                f.write("\n")
+            if time.monotonic() - flushed >= flush:
+                f.flush()
+                flushed = time.monotonic()
 
-    @staticmethod
-    def _listen():
-        while True:
-            try:
-                Monitor._accepting = True
-                connection = Monitor._listener.accept()
-                Monitor._accepting = False
-                if not Monitor._stopped:
-                    Thread(target=Monitor._handle, args=(connection,)).start()
-                else:
-                    connection.close()
-                    break
-            except OSError:
-                break
-            finally:
-                Monitor._accepting = False
-
-    @staticmethod
-    def _add(data: tuple[str, str, tuple, dict[str, Any]]):
-        if is_main():
-            Monitor._queue_lock.acquire()
-            Monitor._queue[data[0]].put(data[1:])
-            Monitor._queue_lock.release()
-
-    @staticmethod
-    def stop():
-        if is_main() and not Monitor._stopped:
-            Monitor._stopped = True
-            Monitor._listener.close()
-            if is_poxis() and Monitor._accepting:
-                # in POSIX, the Listener.accept() will not raise an OSError after the Listener.close()
-                try:
-                    Client(..., authkey=Monitor._authkey).close()  # TODO Address class
-                except ConnectionRefusedError:
-                    pass
-            Monitor._listener_thread.join()
-
-    @staticmethod
-    def send(cls: str, method: str, *args, **kwargs):
-        if is_main():
-            Monitor._add(cls, method, *args, **kwargs)
-        else:
-            if Monitor._worker is None:
-                raise RuntimeError("no worker is available")
-            Monitor._worker.send(cls, method, *args, **kwargs)
-
-    def __init_subclass__(cls):
-        return super().__init_subclass__()
-
-
-class Worker:
-    def __init__(
-        self, address: str | tuple[str, int], authkey: bytes  # TODO make Address class
-    ):
-        self._address = address  # TODO Address class
-        self._authkey = authkey
-        self._sender: Connection = None
-
-    def send(self, cls: str, method: str, *args, **kwargs):
-        try:
-            if self._sender is None:
-                self._sender = Client(
-                    self._address, authkey=self._authkey
-                )  # TODO Address class
-            self._sender.send((cls, method, args, kwargs))
-        except ConnectionRefusedError:
-            if self._sender is not None:
-                self._sender.close()
-                self._sender = None
 
-    @classmethod
-    def _executor(
-        cls,
-        worker: Worker,
-        target: Callable,
-        args: tuple = None,
-        kwargs: dict[str] = None,
-    ):
-        if args is None:
-            args = ()
-        if kwargs is None:
-            kwargs = {}
-        Monitor._worker = worker
-        target(*args, **kwargs)
+class _connect_monitor:
+    def __getstate__(self):
+        return Monitor._queue
 
-    @classmethod
-    def Process(
-        cls,
-        target: Callable,
-        args: tuple = None,
-        kwargs: dict[str] = None,
-        context: Context = None,
-    ):
-        worker = Worker(..., Monitor._authkey)  # TODO Address class
-        if context is None:
-            context = get_context()
-        process = context.Process(
-            target=cls._executor,
-            kwargs={"worker": worker, "target": target, "args": args, "kwargs": kwargs},
-        )
-        return process
+    def __setstate__(self, queue: Queue):
+        self._queue = queue
 
-    ...  # TODO separate client and listener
-    ...  # TODO spawn process and start worker
-    ...  # TODO take authkey from Monitor
+    def __call__(self):
+        # forked workers already have the queue
+        if hasattr(self, "_queue"):
+            Monitor._queue = self._queue
@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import json
+import math
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import torch
+from torch.utils.data import StackDataset
+
+from classifier.config.model.HCR import FvT
+from classifier.config.scheduler import FixedStep
+from classifier.config.setting.default import Monitor as MonitorSetting
+from classifier.config.setting.HCR import Input, MassRegion
+from classifier.config.state.label import MultiClass
+from classifier.discriminator.HCR import GBN, HCRArch, HCRClassifier
+from classifier.monitor.training import roc_auc
+from classifier.process.device import Device
+from classifier.process.monitor import Monitor
+
+
+#
+# python classifier/tests/monitor_test.py
+#
+
+N = 1024
+EPOCHS = 2
+
+
+def make_dataset(n, seed=0):
+    """Random HCR inputs with the columns given by HCR.FvT."""
+    rng = np.random.default_rng(seed)
+    CanJet = np.stack([rng.exponential(60, (n, 4)) + 40,
+                       rng.uniform(-2.5, 2.5, (n, 4)),
+                       rng.uniform(-np.pi, np.pi, (n, 4)),
+                       rng.uniform(5, 30, (n, 4))], axis=1)
+    nOther = rng.integers(0, 9, n)
+    present = np.arange(8)[np.newaxis, :] < nOther[:, np.newaxis]
+    NotCanJet = np.stack([rng.exponential(40, (n, 8)) + 20,
+                          rng.uniform(-2.5, 2.5, (n, 8)),
+                          rng.uniform(-np.pi, np.pi, (n, 8)),
+                          rng.uniform(2, 20, (n, 8)),
+                          rng.integers(0, 2, (n, 8))], axis=1) * present[:, np.newaxis, :]
+    NotCanJet[:, 4, :][~present] = -1
+    # a constant feature would have a zero std in the GBN
+    ancillary = np.stack([nOther + 4, rng.choice([2016, 2017, 2018], n), rng.exponential(2, n), rng.exponential(2, n)], axis=1)
+    return StackDataset(**{
+        Input.offset: torch.from_numpy(rng.integers(0, 60, n).astype(np.uint8)),
+        Input.label: torch.from_numpy(rng.integers(0, len(MultiClass.labels), n)),
+        Input.region: torch.from_numpy(rng.choice(np.array([MassRegion.SB.value, MassRegion.SR.value], dtype=np.uint8), n)),
+        Input.weight: torch.from_numpy(rng.uniform(0.5, 1.5, n).astype(np.float32)),
+        Input.ancillary: torch.from_numpy(ancillary.astype(np.float32)),
+        Input.CanJet: torch.from_numpy(CanJet.reshape(n, -1).astype(np.float32)),
+        Input.NotCanJet: torch.from_numpy(NotCanJet.reshape(n, -1).astype(np.float32)),
+    })
+
+
+class MonitorTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'monitor.jsonl')
+        MultiClass.add('d4', 'd3', 't4', 't3')
+        MonitorSetting.interval = 4
+        torch.manual_seed(0)
+
+        classifier = HCRClassifier(
+            arch=HCRArch(loss=FvT.loss, n_features=4),
+            ghost_batch=GBN(n_batches=4, milestones=[]),
+            training_schedule=FixedStep(epoch=EPOCHS, bs_init=64, bs_milestones=[1], lr_milestones=[]),
+            kfolds=1,
+            offset=0,
+        )
+        Monitor.start(self.path)
+        try:
+            self.result = classifier.train(training=make_dataset(N), validation=make_dataset(N // 4, seed=1), device=Device('cpu'))
+        finally:
+            Monitor.stop()
+        with open(self.path) as f:
+            self.records = [json.loads(line) for line in f]
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def _records(self, category, stage):
+        return [r for r in self.records if r['category'] == category and r['stage'] == stage]
+
+    def test_steps(self):
+        steps = self._records('step', 'Training')
+        # 16 steps of 64 then 8 steps of 128, sent every 4 steps
+        self.assertEqual([r['epoch'] for r in steps], [0] * 4 + [1] * 2)
+        self.assertEqual(sum(r['samples'] for r in steps), EPOCHS * N)
+        self.assertEqual(sum(r['steps'] for r in steps), 16 + 8)
+        for r in steps:
+            self.assertGreater(r['samples_per_second'], 0)
+            self.assertTrue(0 <= r['data_wait_fraction'] <= 1)
+            self.assertGreaterEqual(r['cpu_percent'], 0)
+            self.assertGreater(r['memory_rss'], 0)
+            self.assertTrue(math.isfinite(r['loss']))
+            self.assertNotIn('gpu_memory', r)
+
+        # the skim has no loss
+        skim = self._records('step', 'Setup GBN')
+        self.assertEqual(sum(r['samples'] for r in skim), N)
+        self.assertTrue(all('loss' not in r for r in skim))
+
+    def test_epochs(self):
+        epochs = self._records('epoch', 'Training')
+        self.assertEqual([(r['epoch'], r['dataset']) for r in epochs],
+                         [(e, f'{k} set') for e in range(EPOCHS) for k in ['training', 'validation']])
+        for r in epochs:
+            self.assertTrue(math.isfinite(r['loss']))
+            for label in MultiClass.labels:
+                self.assertTrue(0 <= r[f'auc_{label}'] <= 1)
+
+        # the same metrics are returned by the training
+        benchmark = self.result['benchmark']['Training']
+        self.assertEqual(len(benchmark), EPOCHS)
+        for r in epochs:
+            returned = benchmark[r['epoch']][r['dataset'].removesuffix(' set')]
+            self.assertEqual(returned, {k: v for k, v in r.items() if k == 'loss' or k.startswith('auc_')})
+
+    def test_roc_auc(self):
+        score = torch.tensor([0.9, 0.8, 0.7, 0.6, 0.5, 0.4])
+        self.assertEqual(roc_auc(score, torch.tensor([True, True, True, False, False, False])), 1.0)
+        self.assertEqual(roc_auc(score, torch.tensor([False, False, False, True, True, True])), 0.0)
+        self.assertAlmostEqual(roc_auc(score, torch.tensor([True, False, True, False, True, False])), 2 / 3)
+        self.assertAlmostEqual(roc_auc(score, torch.tensor([True, False, True, False, True, False]), torch.tensor([1., 1., 1., 1., 0., 1.])), 5 / 6)
+        self.assertTrue(math.isnan(roc_auc(score, torch.ones(6, dtype=torch.bool))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -86,6 +86,14 @@ if __name__ == '__main__':
                         action="store_true", default=False, help='Run in condor')
     parser.add_argument('--debug', help="Print lots of debugging statements",
                         action="store_true", dest="debug", default=False)
+    parser.add_argument('--profile', help="Time each stage of the processor",
+                        action="store_true", dest="profile", default=False)
+    parser.add_argument('--checkpoint', dest="checkpoint", default=None,
+                        help='Folder to save the output of each chunk. A rerun with the same config skips the finished chunks.')
+    parser.add_argument('--eos-backend', dest="eos_backend", default=None, choices=['shell', 'fsspec'],
+                        help='Run EOS operations with xrdfs/xrdcp subprocesses (shell) or in-process with fsspec-xrootd (fsspec).')
+    parser.add_argument('--eos-stat-ttl', dest="eos_stat_ttl", default=None, type=float,
+                        help='Seconds to cache the existence and stat of remote files. 0 disables the cache.')
     args = parser.parse_args()
     logging_level = logging.DEBUG if args.debug else logging.INFO
     logging.basicConfig(
@@ -100,6 +108,8 @@ if __name__ == '__main__':
     #
     configs = yaml.safe_load(open(args.configs, 'r'))
     metadata = yaml.safe_load(open(args.metadata, 'r'))
+    if args.profile:
+        configs['config']['profile'] = True
 
     config_runner = configs['runner'] if 'runner' in configs.keys() else {}
     config_runner.setdefault('data_tier', 'picoAOD')
@@ -116,7 +126,28 @@ if __name__ == '__main__':
     config_runner.setdefault('min_workers', 1)
     config_runner.setdefault('max_workers', 100)
     config_runner.setdefault('skipbadfiles', False)
+    config_runner.setdefault('friend_merge', True)
+    config_runner.setdefault('branch_manifest', None)
+    config_runner.setdefault('adaptive_chunksize', False)
+    config_runner.setdefault('chunk_memory', None)
+    config_runner.setdefault('chunk_plan', None)
     config_runner.setdefault('dashboard_address', 10200)
+    config_runner.setdefault('checkpoint', None)
+    if args.checkpoint:
+        config_runner['checkpoint'] = args.checkpoint
+    config_runner.setdefault('eos_backend', None)
+    config_runner.setdefault('eos_stat_ttl', None)
+    if args.eos_backend:
+        config_runner['eos_backend'] = args.eos_backend
+    if args.eos_stat_ttl is not None:
+        config_runner['eos_stat_ttl'] = args.eos_stat_ttl
+
+    # the environment variables give the same settings to the workers
+    from base_class.system.eos import EOS
+    eos_env = EOS.configure(backend=config_runner['eos_backend'], stat_ttl=config_runner['eos_stat_ttl'])
+    os.environ.update(eos_env)
+    if eos_env:
+        logging.info(f"\nEOS backend: {type(EOS.backend).__name__}, stat cache TTL: {EOS.stat_ttl}s")
 
     if 'all' in args.datasets:
         metadata['datasets'].pop("mixeddata")   # AGE: this is temporary
@@ -280,6 +311,8 @@ if __name__ == '__main__':
                             f"--worker-port 10000:10100",
                             f"--nanny-port 10100:10200",
                         ]}
+        if eos_env:
+            cluster_args['job_script_prologue'] = [f'export {k}={v}' for k, v in eos_env.items()]
         logging.info("\nCluster arguments: ")
         logging.info(pretty_repr(cluster_args))
 
@@ -311,6 +344,12 @@ if __name__ == '__main__':
             cluster = LocalCluster(**cluster_args)
             client = Client(cluster)
 
+    if config_runner['branch_manifest']:
+        from analysis.helpers.branchManifest import load_manifest, pruned_schema
+        manifest = load_manifest(config_runner['branch_manifest'])
+        config_runner['schema'] = pruned_schema(manifest, config_runner['schema'])
+        logging.info(f"\nPruning input to {len(manifest)} branches from {config_runner['branch_manifest']}")
+
     executor_args = {
         'schema': config_runner['schema'],
         'savemetrics': True,
@@ -350,23 +389,61 @@ if __name__ == '__main__':
     #
     # Running the job
     #
-    def run_job():
-        output, metrics = processor.run_uproot_job(
+    def processor_instance():
+        processor_instance = analysis(**configs['config'])
+        if config_runner['checkpoint']:
+            from analysis.helpers.checkpoint import Checkpoint, config_hash, friend_files, shards
+            config = config_hash(analysis, configs['config'])
+            logging.info(f"\nCheckpoints in {config_runner['checkpoint']}/{config}, "
+                         f"{len(shards(config_runner['checkpoint'], config))} chunks already done")
+            processor_instance = Checkpoint(processor_instance, config_runner['checkpoint'], config, friends=friend_files)
+        return processor_instance
+
+    def run_uproot_job(fileset, chunksize):
+        return processor.run_uproot_job(
             fileset,
             treename='Events',
-            processor_instance=analysis(**configs['config']),
+            processor_instance=processor_instance(),
             executor=executor,
             executor_args=executor_args,
-            chunksize=config_runner['chunksize'],
+            chunksize=chunksize,
             maxchunks=config_runner['maxchunks'],
         )
+
+    def run_job():
+        if config_runner['adaptive_chunksize']:
+            from analysis.helpers.chunkPlanner import load_plan, parse_memory, plan_chunksizes, run_planned, save_plan
+            plan_file = config_runner['chunk_plan']
+            if plan_file and os.path.exists(plan_file):
+                plan = load_plan(plan_file)
+                logging.info(f'\nUsing chunk plan from {plan_file}')
+            else:
+                # by default, use half of the worker memory for one chunk
+                plan = plan_chunksizes(
+                    fileset, analysis(**configs['config']),
+                    memory=config_runner['chunk_memory'] or 0.5 * parse_memory(config_runner['condor_memory']),
+                    max_chunksize=config_runner['chunksize'],
+                    schemaclass=config_runner['schema'])
+                if plan_file:
+                    save_plan(plan_file, plan)
+            logging.info(pretty_repr(plan))
+            output, metrics = run_planned(fileset, plan, run_uproot_job, config_runner['chunksize'])
+        else:
+            output, metrics = run_uproot_job(fileset, config_runner['chunksize'])
         elapsed = time.time() - tstart
         nEvent = metrics['entries']
         processtime = metrics['processtime']
         logging.info(f'Metrics:')
         logging.info(pretty_repr(metrics))
+        if metrics.get('chunks'):
+            logging.info(f"\n{metrics['bytesread']/metrics['chunks']:,.0f} bytes read and "
+                         f"{metrics['processtime']/metrics['chunks']:.2f}s per chunk "
+                         f"({len(metrics.get('columns', ()))} columns)")
         logging.info(f'\n{nEvent/elapsed:,.0f} events/s total '
                      f'({nEvent}/{elapsed})')
+        if output.get('profile'):
+            logging.info(f"\nStage breakdown:\n{output['profile'].table()}")
+            logging.debug(f"\nStage breakdown by dataset:\n{output['profile'].table(by_dataset=True)}")
 
         #
         # Saving the output
@@ -431,7 +508,10 @@ if __name__ == '__main__':
             friend_base = configs["config"].get(_FRIEND_BASE_PROCESSOR_ARG, None)
             friends: dict[str, Friend] = output.get("friends", None)
             if friend_base is not None and friends is not None:
-                if args.condor:
+                if not config_runner['friend_merge']:
+                    # friend trees can be read across chunk boundaries, keep the dumped chunks as they are
+                    pass
+                elif args.condor:
                     (friends,) = dask.compute(
                         {
                             k: friends[k].merge(
@@ -450,7 +530,6 @@ if __name__ == '__main__':
                             base_path=friend_base,
                             naming=_friend_merge_name,
                         )
-                from base_class.system.eos import EOS
                 from base_class.utils.json import DefaultEncoder
                 with fsspec.open(EOS(friend_base) / _FRIEND_METADATA_FILENAME, "wt") as f:
                     json.dump(friends, f, cls=DefaultEncoder)
@@ -151,6 +151,12 @@ def integrity_check(
     for dataset in fileset:
         if len(output[dataset]['files']) == 0:
             logging.warning(f'No file is saved for "{dataset}"')
+        files = output[dataset]['files']
+        saved = EOS.exists_many(*(f.path for f in files))
+        output_missing = [str(f.path) for f, ok in zip(files, saved) if not ok]
+        for file in output_missing:
+            logging.error(f'The output file is missing: "{file}"')
+        output[dataset]['files'] = [f for f, ok in zip(files, saved) if ok]
         inputs = map(EOS, fileset[dataset]['files'])
         outputs = {EOS(k): v for k, v in output[dataset]['source'].items()}
         ns = None if num_entries is None else {
@@ -182,6 +188,8 @@ def integrity_check(
             miss_dict["file_missing"] = file_missing
         if chunk_missing:
             miss_dict["chunk_missing"] = chunk_missing
+        if output_missing:
+            miss_dict["output_missing"] = output_missing
     output[dataset].pop('source')
     output[dataset]['missing'] = miss_dict
     return output
@@ -197,7 +205,7 @@ def resize(
     transform = NanoAOD(regular=False, jagged=True)
     for dataset, chunks in output.items():
         if len(chunks['files']) > 0:
-            output[dataset]['files'] = merge.resize(
+            output[dataset]['files'] = merge.stream(
                 base / dataset/f'{_PICOAOD}{_ROOT}',
                 *chunks['files'],
                 step=step,
@@ -0,0 +1,222 @@
+import os, sys
+import argparse
+import logging
+import numpy as np
+import uproot
+from coffea.util import load
+
+#
+# Write the coffea hists directly to ROOT files for combine, without PyROOT.
+#   The bin contents and sumw2 of all processes, years, tags and regions of a hist
+#   are projected in one go and written as TH1F with uproot.
+#
+
+codes = {
+    'region' : {
+        2 : 'other',
+        1 : 'SB',
+        0 : 'SR'
+    },
+    'tag' : {
+        0 : 'threeTag',
+        1 : 'fourTag',
+        2 : 'other'
+    }
+}
+
+
+def load_hists(input_file):
+    if input_file.endswith('.h5'):
+        sys.path.insert(0, os.getcwd())
+        from base_class.hist.store import HistStore
+        return HistStore(input_file).output()["hists"]
+    return load(input_file)["hists"]
+
+
+def project(coffea_hist):
+    """Edges, values and variances with passPreSel, in shape (process, year, tag, region, bin). Negative entries are set to 0."""
+
+    h = coffea_hist[{'passPreSel': True, 'passSvB': sum, 'failSvB': sum}]
+    values = np.clip(h.values(), 0, None)
+    variances = np.clip(h.variances(), 0, None)
+    return h.axes[-1].edges, values, variances
+
+
+def rebin(edges, values, variances, ngroup):
+    """Merge groups of ngroup bins along the last axis like TH1::Rebin, the excess bins are moved to the overflow."""
+
+    if ngroup == 1:
+        return edges, values, variances, np.zeros(values.shape[:-1]), np.zeros(values.shape[:-1])
+    nbins = (len(edges) - 1) // ngroup
+    cut = nbins * ngroup
+    shape = values.shape[:-1] + (nbins, ngroup)
+    return (edges[:cut + 1:ngroup],
+            values[..., :cut].reshape(shape).sum(axis=-1),
+            variances[..., :cut].reshape(shape).sum(axis=-1),
+            values[..., cut:].sum(axis=-1),
+            variances[..., cut:].sum(axis=-1))
+
+
+def to_TH1(name, title, edges, values, variances, overflow=0, overflow_variance=0):
+    """TH1F with bin contents and sumw2."""
+
+    edges = np.asarray(edges, dtype=np.float64)
+    centers = (edges[1:] + edges[:-1]) / 2
+    data = np.concatenate([[0], values, [overflow]]).astype(np.float32)
+    sumw2 = np.concatenate([[0], variances, [overflow_variance]]).astype(np.float64)
+    uniform = np.allclose(np.diff(edges), edges[1] - edges[0])
+    fXaxis = uproot.writing.identify.to_TAxis(
+        fName="xaxis", fTitle="", fNbins=len(centers), fXmin=edges[0], fXmax=edges[-1],
+        fXbins=np.array([], dtype=np.float64) if uniform else edges)
+    return uproot.writing.identify.to_TH1x(
+        fName=name, fTitle=title, data=data,
+        fEntries=float(data.sum()), fTsumw=float(values.sum()), fTsumw2=float(variances.sum()),
+        fTsumwx=float((values * centers).sum()), fTsumwx2=float((values * centers**2).sum()),
+        fSumw2=sumw2, fXaxis=fXaxis)
+
+
+def create_root_file(file_to_convert, histos, output_dir):
+
+    coffea_hists = load_hists(file_to_convert)
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    output = output_dir + "/" + os.path.splitext(file_to_convert.split("/")[-1])[0] + ".root"
+
+    with uproot.recreate(output) as root_file:
+        for ih in histos:
+            edges, values, variances = project(coffea_hists[ih])
+            axes = coffea_hists[ih].axes
+            for ip, iprocess in enumerate(axes['process']):
+                for iy, iyear in enumerate(axes['year']):
+                    for itag in range(values.shape[2]):
+                        for iregion in range(values.shape[3]):
+                            name = "_".join([ih.replace(".", "_"), iprocess, iyear, codes['tag'][itag], codes['region'][iregion]])
+                            root_file[name] = to_TH1(name, name, edges, values[ip, iy, itag, iregion], variances[ip, iy, itag, iregion])
+
+    logging.info("\n File " + output + " created.")
+
+
+def combine_name(iprocess):
+    """Name of the process in the datacards."""
+
+    if 'TTTo' in iprocess:
+        return 'tt'
+    if 'data' in iprocess:
+        return 'data_obs'
+    if '4b' in iprocess:
+        return iprocess.split("4b")[0]
+    return iprocess.split("_")[0]
+
+
+def create_combine_root_file(file_to_convert, rebin_channels, classifier, output_dir, merge_2016=False):
+
+    coffea_hists = load_hists(file_to_convert)
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    tag = {v: k for k, v in codes['tag'].items()}
+    region = {v: k for k, v in codes['region'].items()}
+
+    for iclass in classifier:
+
+        #
+        #  channel_year -> name -> [title, edges, values, variances, overflow, overflow_variance]
+        #
+        root_hists = {}
+        for channel in rebin_channels.keys():
+
+            ih = iclass + '.ps_' + channel
+            ihName = ih.replace('.', '_')
+            edges, values, variances = project(coffea_hists[ih])
+            edges, values, variances, overflow, overflow_variance = rebin(edges, values, variances, rebin_channels[channel])
+            sr, threeTag, fourTag = region['SR'], tag['threeTag'], tag['fourTag']
+
+            processes = list(coffea_hists[ih].axes['process'])
+            idata = processes.index('data')
+            for iy, iyear in enumerate(coffea_hists[ih].axes['year']):
+                channel_year = channel + "_" + iyear
+                hists = root_hists[channel_year] = {}
+
+                ### For multijets
+                hists['mj'] = ["mj_" + ihName + "_passPreSel_SR_" + iyear, edges,
+                               values[idata, iy, threeTag, sr], variances[idata, iy, threeTag, sr],
+                               overflow[idata, iy, threeTag, sr], overflow_variance[idata, iy, threeTag, sr]]
+
+                ### SR 4b
+                for ip, iprocess in enumerate(processes):
+                    name = combine_name(iprocess)
+                    if name in ['tt', 'data_obs']:
+                        title = name + "_" + iclass + "_ps_" + channel_year + "_passPreSel_SR"
+                    else:
+                        title = iprocess + "_" + ihName + "_passPreSel_SR_" + iyear
+                    this_hist = [title, edges,
+                                 values[ip, iy, fourTag, sr], variances[ip, iy, fourTag, sr],
+                                 overflow[ip, iy, fourTag, sr], overflow_variance[ip, iy, fourTag, sr]]
+                    if name in hists:
+                        for i in range(2, 6):
+                            hists[name][i] = hists[name][i] + this_hist[i]
+                    else:
+                        hists[name] = this_hist
+
+        if merge_2016:
+            logging.info("\n Merging UL16_preVFP and UL16_postVFP")
+            for iy in list(root_hists.keys()):
+                if 'UL16_preVFP' in iy:
+                    post = root_hists.pop(iy.replace('pre', 'post'))
+                    for ip, this_hist in root_hists[iy].items():
+                        for i in range(2, 6):
+                            this_hist[i] = this_hist[i] + post[ip][i]
+                    root_hists['_'.join(iy.split('_')[:-1])] = root_hists.pop(iy)
+
+        output = output_dir + "/hists_" + iclass + ".root"
+
+        with uproot.recreate(output) as root_file:
+            for channel, hists in root_hists.items():
+                for name, (title, *this_hist) in hists.items():
+                    root_file[channel + "/" + name] = to_TH1(name, title, *this_hist)
+
+        logging.info("\n File " + output + " created.")
+
+
+if __name__ == '__main__':
+
+    #
+    # input parameters
+    #
+    parser = argparse.ArgumentParser(
+        description='Convert coffea hists to root TH1F', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-o', '--output_dir', dest="output_dir",
+                        default="./datacards/", help='Output directory.')
+    parser.add_argument('--histos', dest="histos", nargs="+",
+                        default=['SvB.ps_zz', 'SvB.ps_zh', 'SvB.ps_hh', 'SvB_MA.ps_zz', 'SvB_MA.ps_zh',
+                                 'SvB_MA.ps_hh' ], help='List of histograms to convert')
+    parser.add_argument('--classifier', dest="classifier", nargs="+",
+                        default=["SvB_MA", "SvB"], help='Classifier to make histograms.')
+    parser.add_argument('-i', '--input_file', dest='input_file',
+                        default="../analysis/hists/histAll.coffea", help="File with coffea hists (.coffea or .h5)")
+    parser.add_argument('--make_combine_inputs', dest='make_combine_inputs', action="store_true",
+                        default=False, help="Make a combine output root files")
+    parser.add_argument('--merge2016', dest='merge_2016', action="store_true",
+                        default=False, help="(Temporary. Merge 2016 datasets)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.info("\nRunning with these parameters: ")
+    logging.info(args)
+
+    if args.make_combine_inputs:
+        rebin_channels = {'zz': 4, 'zh': 5, 'hh': 10}  # temp
+        logging.info("Creating root files for combine")
+        create_combine_root_file(
+            args.input_file,
+            rebin_channels,
+            args.classifier,
+            args.output_dir,
+            args.merge_2016)
+
+    else:
+        logging.info("Creating root files from coffea hists")
+        create_root_file(args.input_file, args.histos, args.output_dir)
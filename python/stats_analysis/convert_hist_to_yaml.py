@@ -55,7 +55,12 @@ if __name__ == '__main__':
         }
     }
 
-    coffea_hists = load(args.input_file)["hists"]
+    if args.input_file.endswith('.h5'):
+        sys.path.insert(0, os.getcwd())
+        from base_class.hist.store import HistStore
+        coffea_hists = HistStore(args.input_file).output()["hists"]
+    else:
+        coffea_hists = load(args.input_file)["hists"]
 
     yml_dict = {}
     for ih in args.histos:
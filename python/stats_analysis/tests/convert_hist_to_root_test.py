@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import uproot
+from coffea.util import save
+
+from base_class.hist import Collection
+from stats_analysis.convert_hist_to_root import create_combine_root_file, create_root_file, rebin
+from stats_analysis.convert_hist_to_yaml import hist_to_yml
+
+
+#
+# python stats_analysis/tests/convert_hist_to_root_test.py
+#
+
+PROCESSES = ['data', 'TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu', 'HH4b', 'ZZ4b', 'ZH4b']
+YEARS = ['UL16_preVFP', 'UL16_postVFP', 'UL17', 'UL18']
+REBIN = {'zz': 4, 'zh': 5, 'hh': 10}
+TAGS = {'threeTag': 0, 'fourTag': 1}
+REGIONS = {'SR': 0, 'SB': 1}
+
+
+def make_output(seed=0):
+    rng = np.random.default_rng(seed)
+    hist = Collection(process=PROCESSES, year=YEARS, tag=[3, 4, 0], region=[2, 1, 0],
+                      passPreSel=..., failSvB=..., passSvB=...)
+    for channel in REBIN:
+        hist.add(f'SvB_MA.ps_{channel}', (100, 0, 1, ('ps', 'ps')))
+    output = hist.output
+    for h in output['hists'].values():
+        view = h.view(flow=True)
+        # a few negative weights to check that they are set to 0
+        view['value'] = rng.normal(1, 0.6, view.shape)
+        view['variance'] = rng.exponential(1, view.shape)
+    return output
+
+
+def from_yml(coffea_hist, process, year, tag, region):
+    """Reference from the YAML path, without dropping the last bin."""
+    yhist = hist_to_yml(coffea_hist[{
+        'process': process, 'year': year, 'tag': TAGS[tag], 'region': REGIONS[region],
+        'passPreSel': True, 'passSvB': sum, 'failSvB': sum}])
+    return np.array(yhist['values']), np.array(yhist['variances'])
+
+
+def rebinned(values, ngroup):
+    return values.reshape(-1, ngroup).sum(axis=1)
+
+
+class ConvertHistToRootTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output = make_output()
+        self.input_file = os.path.join(self.tmpdir.name, 'histAll.coffea')
+        save(self.output, self.input_file)
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmpdir.cleanup()
+
+    def test_rebin(self):
+        edges = np.arange(8.)
+        values = np.arange(7.)[None, :].repeat(2, axis=0)
+        new_edges, new_values, new_variances, overflow, _ = rebin(edges, values, values, 3)
+        self.assertTrue(np.array_equal(new_edges, [0, 3, 6]))
+        self.assertTrue(np.array_equal(new_values, [[3, 12], [3, 12]]))
+        self.assertTrue(np.array_equal(overflow, [6, 6]))
+
+    def test_root_file(self):
+        output_dir = os.path.join(self.tmpdir.name, 'all')
+        create_root_file(self.input_file, ['SvB_MA.ps_hh'], output_dir)
+        h = self.output['hists']['SvB_MA.ps_hh']
+        with uproot.open(os.path.join(output_dir, 'histAll.root')) as f:
+            for process in PROCESSES:
+                for year in YEARS:
+                    for tag in TAGS:
+                        for region in REGIONS:
+                            values, variances = from_yml(h, process, year, tag, region)
+                            th1 = f[f'SvB_MA_ps_hh_{process}_{year}_{tag}_{region}']
+                            self.assertTrue(np.allclose(th1.values(), values, rtol=1e-6))
+                            self.assertTrue(np.allclose(th1.variances(), variances))
+
+    def test_combine(self):
+        output_dir = os.path.join(self.tmpdir.name, 'datacards')
+        create_combine_root_file(self.input_file, REBIN, ['SvB_MA'], output_dir, merge_2016=True)
+        with uproot.open(os.path.join(output_dir, 'hists_SvB_MA.root')) as f:
+            for channel, ngroup in REBIN.items():
+                h = self.output['hists'][f'SvB_MA.ps_{channel}']
+                for era, years in [('UL16', ['UL16_preVFP', 'UL16_postVFP']), ('UL17', ['UL17']), ('UL18', ['UL18'])]:
+                    expected = {}
+                    for name, processes, tag in [('data_obs', ['data'], 'fourTag'),
+                                                 ('mj', ['data'], 'threeTag'),
+                                                 ('tt', ['TTToHadronic', 'TTToSemiLeptonic', 'TTTo2L2Nu'], 'fourTag'),
+                                                 ('HH', ['HH4b'], 'fourTag'),
+                                                 ('ZZ', ['ZZ4b'], 'fourTag'),
+                                                 ('ZH', ['ZH4b'], 'fourTag')]:
+                        cells = [from_yml(h, p, y, tag, 'SR') for p in processes for y in years]
+                        expected[name] = [rebinned(sum(c[i] for c in cells), ngroup) for i in range(2)]
+                    directory = f[f'{channel}_{era}']
+                    self.assertEqual(set(directory.keys(cycle=False)), set(expected))
+                    for name, (values, variances) in expected.items():
+                        th1 = directory[name]
+                        self.assertEqual(th1.member('fName'), name)
+                        self.assertEqual(len(th1.axis().edges()), 100 // ngroup + 1)
+                        self.assertTrue(np.allclose(th1.values(), values, rtol=1e-6))
+                        self.assertTrue(np.allclose(th1.variances(), variances))
+
+
+if __name__ == '__main__':
+    unittest.main()